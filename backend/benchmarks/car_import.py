@@ -0,0 +1,171 @@
+"""Compare importing cars in bulk with creating them one POST at a time.
+
+Logs in as a user that is not seeded and creates `--cars` cars three ways:
+one `POST /cars/` per car (`--concurrency` at a time), one
+`POST /cars/import` with a JSON array, and one with a CSV file. Every car
+must be created; the exit code is 1 otherwise. The user's cars are deleted
+directly in the database before each method and at the end.
+
+    python -m benchmarks.car_import --cars 1000 --output car_import.json
+
+Needs the API, database and fake auth server from benchmarks/README.md.
+"""
+
+import argparse
+import asyncio
+import csv
+import io
+import json
+import random
+import sys
+import time
+
+import httpx
+from sqlalchemy import delete, select
+
+from src.database import SessionLocal
+from src.models.car import Car, ConnectorType
+from src.models.user import User
+
+API_PREFIX = "/api/v1"
+
+
+def generate_cars(count: int, rng: random.Random) -> list[dict]:
+    connector_types = [ct.value for ct in ConnectorType]
+    return [
+        {
+            "name": f"Fleet car {n}",
+            "connector_types": rng.sample(connector_types, k=rng.randint(1, 3)),
+            "battery_charge_limit": rng.choice((80, 90, 100)),
+            "battery_size": rng.randint(40, 110),
+            "max_kw_ac": rng.choice((7, 11, 22)),
+            "max_kw_dc": rng.choice((50, 150, 250)),
+        }
+        for n in range(count)
+    ]
+
+
+def to_csv(cars: list[dict]) -> str:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(cars[0]))
+    writer.writeheader()
+    writer.writerows(
+        {**car, "connector_types": ";".join(car["connector_types"])} for car in cars
+    )
+    return buffer.getvalue()
+
+
+def delete_cars(user_number: int) -> None:
+    with SessionLocal() as db:
+        db.execute(
+            delete(Car).where(
+                Car.user_id
+                == select(User.id)
+                .where(User.external_user_id == user_number)
+                .scalar_subquery()
+            )
+        )
+        db.commit()
+
+
+async def single_posts(
+    client: httpx.AsyncClient, headers: dict, cars: list[dict], concurrency: int
+) -> int:
+    """Create the cars one request each; returns how many were created"""
+    queue = list(reversed(cars))
+    created = 0
+
+    async def worker():
+        nonlocal created
+        while queue:
+            response = await client.post(
+                f"{API_PREFIX}/cars/", json=queue.pop(), headers=headers
+            )
+            created += response.status_code == 201
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return created
+
+
+async def bulk_import(
+    client: httpx.AsyncClient, headers: dict, content: str, content_type: str
+) -> int:
+    response = await client.post(
+        f"{API_PREFIX}/cars/import",
+        content=content,
+        headers={**headers, "Content-Type": content_type},
+    )
+    if response.status_code != 201:
+        print(f"  import failed with {response.status_code}: {response.text[:500]}")
+        return 0
+    return len(response.json())
+
+
+async def run(args) -> dict:
+    cars = generate_cars(args.cars, random.Random(args.seed))
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=None) as client:
+        login = await client.post(
+            f"{API_PREFIX}/auth/login",
+            json={"username": f"user{args.user}", "password": f"pass{args.user}"},
+        )
+        login.raise_for_status()
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        methods = {
+            "single_posts": lambda: single_posts(
+                client, headers, cars, args.concurrency
+            ),
+            "import_json": lambda: bulk_import(
+                client, headers, json.dumps(cars), "application/json"
+            ),
+            "import_csv": lambda: bulk_import(
+                client, headers, to_csv(cars), "text/csv"
+            ),
+        }
+        results = {}
+        for name, method in methods.items():
+            delete_cars(args.user)
+            start = time.perf_counter()
+            created = await method()
+            elapsed = time.perf_counter() - start
+            results[name] = {
+                "created": created,
+                "seconds": round(elapsed, 3),
+                "cars_per_second": round(created / elapsed, 1),
+            }
+        delete_cars(args.user)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8080")
+    parser.add_argument("--cars", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument(
+        "--user", type=int, default=900_000, help="User number, kept out of seeds"
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="car_import.json")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    with open(args.output, "w") as f:
+        json.dump(
+            {"cars": args.cars, "concurrency": args.concurrency, **results},
+            f,
+            indent=2,
+            sort_keys=True,
+        )
+        f.write("\n")
+    for name, result in results.items():
+        print(
+            f"{name:12s} {result['created']:6d} cars in {result['seconds']:8.3f}s "
+            f"({result['cars_per_second']} cars/s)"
+        )
+    if any(result["created"] != args.cars for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
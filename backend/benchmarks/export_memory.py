@@ -0,0 +1,131 @@
+"""Check that reservation exports run in constant server memory.
+
+Starts a single-process `python -m src.server` and logs in as a seeded user.
+It then downloads that user's full history from `GET /reservations/export`
+in both formats, and optionally from `GET /reservations/` for contrast. The
+server's resident set size is sampled while each request runs. The exit code
+is 1 if an export grows it by more than `--max-growth-mb`. Seed one user with
+a large history first:
+
+    python -m benchmarks.seed --reset --users 1 --reservations-per-user 1000000
+    python -m benchmarks.export_memory --compare-list
+
+Needs the database and fake upstreams from benchmarks/README.md; the server
+inherits the current environment.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+
+from benchmarks.worker_scaling import wait_until_healthy
+
+API_PREFIX = "/api/v1"
+
+
+def rss_bytes(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    raise RuntimeError(f"No VmRSS for process {pid}")
+
+
+class RSSSampler(threading.Thread):
+    def __init__(self, pid: int, interval: float = 0.02):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.baseline = rss_bytes(pid)
+        self.peak = self.baseline
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        while not self._done.is_set():
+            self.peak = max(self.peak, rss_bytes(self.pid))
+            time.sleep(self.interval)
+
+    def stop(self) -> int:
+        """Stop sampling; returns the growth over the baseline in bytes"""
+        self._done.set()
+        self.join()
+        return self.peak - self.baseline
+
+
+def download(client: httpx.Client, pid: int, path: str, headers: dict) -> dict:
+    sampler = RSSSampler(pid)
+    sampler.start()
+    size = lines = 0
+    start = time.perf_counter()
+    with client.stream("GET", path, headers=headers) as response:
+        response.raise_for_status()
+        for chunk in response.iter_bytes():
+            size += len(chunk)
+            lines += chunk.count(b"\n")
+    elapsed = time.perf_counter() - start
+    growth = sampler.stop()
+    return {
+        "bytes": size,
+        "lines": lines,
+        "seconds": round(elapsed, 2),
+        "rss_growth_mb": round(growth / 2**20, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--user", type=int, default=1, help="Seeded user number")
+    parser.add_argument("--max-growth-mb", type=float, default=50.0)
+    parser.add_argument("--compare-list", action="store_true")
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    env = {**os.environ, "WEB_CONCURRENCY": "1", "PORT": str(args.port)}
+    server = subprocess.Popen([sys.executable, "-m", "src.server"], env=env)
+    try:
+        wait_until_healthy(base_url)
+        with httpx.Client(base_url=base_url, timeout=None) as client:
+            login = client.post(
+                f"{API_PREFIX}/auth/login",
+                json={"username": f"user{args.user}", "password": f"pass{args.user}"},
+            )
+            login.raise_for_status()
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+            results = {
+                export_format: download(
+                    client,
+                    server.pid,
+                    f"{API_PREFIX}/reservations/export?format={export_format}",
+                    headers,
+                )
+                for export_format in ("ndjson", "csv")
+            }
+            if args.compare_list:
+                results["list"] = download(
+                    client, server.pid, f"{API_PREFIX}/reservations/", headers
+                )
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+    for name, result in results.items():
+        print(
+            f"{name:8s} {result['bytes'] / 2**20:9.1f} MB in {result['seconds']}s, "
+            f"server RSS +{result['rss_growth_mb']} MB"
+        )
+    if any(
+        results[name]["rss_growth_mb"] > args.max_growth_mb
+        for name in ("ndjson", "csv")
+    ):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Local stand-ins for DummyJSON auth and the charging-points service.
+
+    python -m benchmarks.fake_upstreams auth --port 9001
+    python -m benchmarks.fake_upstreams charging-points --port 8081 \\
+        --latency-ms 20 --error-rate 0.01
+
+Seeded users log in as `user<n>` / `pass<n>` and get external id `n`, which
+matches the rows written by `benchmarks.seed`. The charging-points service
+also stands in for the provider that receives reservation events from the
+outbox. It keeps them in memory, fails `--event-error-rate` of the batches,
+and lists what it received at `GET /api/v1/reservation-events`.
+"""
+
+import argparse
+import asyncio
+import random
+import re
+import time
+
+import uvicorn
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+USERNAME_PATTERN = re.compile(r"^user(\d+)$")
+CONNECTOR_TYPES = ("Type 2", "Schuko", "CCS", "CHAdeMO")
+
+
+def _access_token(user_id: int) -> str:
+    return f"access-{user_id}-{random.getrandbits(32):08x}"
+
+
+def _refresh_token(user_id: int) -> str:
+    return f"refresh-{user_id}-{random.getrandbits(32):08x}"
+
+
+def _user_id_from_token(authorization: str | None) -> int | None:
+    if not authorization or not authorization.startswith("Bearer access-"):
+        return None
+    try:
+        return int(authorization.removeprefix("Bearer access-").split("-")[0])
+    except ValueError:
+        return None
+
+
+def create_auth_app(latency_ms: float = 0.0, error_rate: float = 0.0) -> FastAPI:
+    """DummyJSON-compatible `/auth/login`, `/auth/refresh` and `/auth/me`"""
+    app = FastAPI(title="Fake DummyJSON auth")
+
+    @app.middleware("http")
+    async def inject_latency_and_errors(request: Request, call_next):
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        if random.random() < error_rate:
+            return JSONResponse({"message": "Injected failure"}, status_code=500)
+        return await call_next(request)
+
+    @app.post("/auth/login")
+    async def login(payload: dict):
+        match = USERNAME_PATTERN.match(payload.get("username", ""))
+        if not match or payload.get("password") != f"pass{match.group(1)}":
+            raise HTTPException(status_code=400, detail="Invalid credentials")
+
+        user_id = int(match.group(1))
+        return {
+            "id": user_id,
+            "username": payload["username"],
+            "accessToken": _access_token(user_id),
+            "refreshToken": _refresh_token(user_id),
+        }
+
+    @app.post("/auth/refresh")
+    async def refresh(payload: dict):
+        try:
+            user_id = int(payload.get("refreshToken", "").split("-")[1])
+        except (IndexError, ValueError):
+            raise HTTPException(status_code=401, detail="Invalid refresh token")
+        return {
+            "accessToken": _access_token(user_id),
+            "refreshToken": _refresh_token(user_id),
+        }
+
+    @app.get("/auth/me")
+    async def me(authorization: str | None = Header(default=None)):
+        user_id = _user_id_from_token(authorization)
+        if user_id is None:
+            raise HTTPException(status_code=401, detail="Invalid/expired token")
+        return {"id": user_id, "username": f"user{user_id}"}
+
+    return app
+
+
+def create_charging_points_app(
+    latency_ms: float = 0.0, error_rate: float = 0.0, event_error_rate: float = 0.0
+) -> FastAPI:
+    """Charging-points API with configurable latency and error rate"""
+    app = FastAPI(title="Fake charging points")
+    # Reservation events in order of arrival, duplicates included
+    received: list[dict] = []
+
+    @app.middleware("http")
+    async def inject_latency_and_errors(request: Request, call_next):
+        if latency_ms:
+            await asyncio.sleep(random.uniform(0.5, 1.5) * latency_ms / 1000)
+        if random.random() < error_rate:
+            return JSONResponse({"detail": "Injected failure"}, status_code=503)
+        return await call_next(request)
+
+    @app.get("/api/v1/charging-points/{charging_point_id}")
+    async def get_charging_point(charging_point_id: str):
+        index = sum(charging_point_id.encode())
+        return {
+            "id": charging_point_id,
+            "name": f"Charging point {charging_point_id}",
+            "connector_type": CONNECTOR_TYPES[index % len(CONNECTOR_TYPES)],
+            "charging_type": "DC" if index % 2 else "AC",
+            "max_power_kw": 50 if index % 2 else 22,
+            "status": "available",
+        }
+
+    @app.post("/api/v1/reservation-events")
+    async def receive_reservation_events(payload: dict):
+        if random.random() < event_error_rate:
+            return JSONResponse({"detail": "Injected failure"}, status_code=503)
+        received_at = time.time()
+        for event in payload["events"]:
+            received.append({**event, "received_at": received_at})
+        return {"received": len(payload["events"])}
+
+    @app.get("/api/v1/reservation-events")
+    async def list_reservation_events():
+        return received
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("service", choices=["auth", "charging-points"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--event-error-rate",
+        type=float,
+        default=0.0,
+        help="Share of reservation event batches to fail (charging-points only)",
+    )
+    args = parser.parse_args()
+
+    if args.service == "auth":
+        app = create_auth_app(latency_ms=args.latency_ms, error_rate=args.error_rate)
+    else:
+        app = create_charging_points_app(
+            latency_ms=args.latency_ms,
+            error_rate=args.error_rate,
+            event_error_rate=args.event_error_rate,
+        )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
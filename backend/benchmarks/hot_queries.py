@@ -0,0 +1,179 @@
+"""Measure the hot queries as plain Core statements and as lambda statements.
+
+For every query in `src.queries`, reports the Python cost of building the
+statement and computing its cache key, which SQLAlchemy repeats on every
+execution. With a database, it also times executions before (Core
+statements, no prepared statements) and after (lambda statements, server-side
+prepared statements with the configured `DATABASE_PREPARE_THRESHOLD`):
+
+    python -m benchmarks.hot_queries --iterations 5000 --output hot_queries.json
+
+Run `benchmarks.seed` first, or pass `--no-db` to only measure Python cost.
+"""
+
+import argparse
+import json
+import statistics
+import time
+import uuid
+from typing import Callable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src import queries
+from src.database import (
+    DATABASE_PREPARE_THRESHOLD,
+    DATABASE_URL,
+    create_database_engine,
+)
+from src.models.car import Car, ConnectorType, masks_supporting
+from src.models.reservation import Reservation
+from src.models.user import User
+
+
+def core_statements(ids: dict) -> dict[str, Callable]:
+    """The statements as the routes built them before `src.queries`"""
+    return {
+        "user_by_external_id": lambda: select(User).where(
+            User.external_user_id == ids["external_user_id"]
+        ),
+        "cars_of_user": lambda: select(Car).where(Car.user_id == ids["user_id"]),
+        "cars_of_user_by_connector": lambda: select(Car).where(
+            Car.user_id == ids["user_id"],
+            Car.connector_mask.in_(masks_supporting(ConnectorType.CCS)),
+        ),
+        "car_version": lambda: select(Car.version).where(
+            Car.id == ids["car_id"], Car.user_id == ids["user_id"]
+        ),
+        "reservations_of_user": lambda: select(Reservation).where(
+            Reservation.user_id == ids["user_id"]
+        ),
+        "reservation_of_user": lambda: select(Reservation).where(
+            Reservation.id == ids["reservation_id"],
+            Reservation.user_id == ids["user_id"],
+        ),
+    }
+
+
+def lambda_statements(ids: dict) -> dict[str, Callable]:
+    return {
+        "user_by_external_id": lambda: queries.user_by_external_id(
+            ids["external_user_id"]
+        ),
+        "cars_of_user": lambda: queries.cars_of_user(ids["user_id"]),
+        "cars_of_user_by_connector": lambda: queries.cars_of_user(
+            ids["user_id"], ConnectorType.CCS
+        ),
+        "car_version": lambda: queries.car_version(ids["car_id"], ids["user_id"]),
+        "reservations_of_user": lambda: queries.reservations_of_user(ids["user_id"]),
+        "reservation_of_user": lambda: queries.reservation_of_user(
+            ids["reservation_id"], ids["user_id"]
+        ),
+    }
+
+
+def summarise(durations: list[float]) -> dict:
+    ordered = sorted(durations)
+    return {
+        "mean_us": round(statistics.fmean(ordered) * 1e6, 1),
+        "p50_us": round(ordered[len(ordered) // 2] * 1e6, 1),
+        "p95_us": round(ordered[int(len(ordered) * 0.95) - 1] * 1e6, 1),
+    }
+
+
+def build_cost(build: Callable, iterations: int) -> dict:
+    durations = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        build()._generate_cache_key()
+        durations.append(time.perf_counter() - start)
+    return summarise(durations)
+
+
+def execution_time(db: Session, build: Callable, iterations: int) -> dict:
+    durations = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        db.execute(build()).all()
+        durations.append(time.perf_counter() - start)
+    return summarise(durations)
+
+
+def sample_ids(db: Session) -> dict:
+    row = db.execute(
+        select(User.id, User.external_user_id, Car.id, Reservation.id)
+        .join(Car, Car.user_id == User.id)
+        .join(Reservation, Reservation.user_id == User.id)
+        .limit(1)
+    ).first()
+    if row is None:
+        raise SystemExit("No user with cars and reservations, run benchmarks.seed")
+    return dict(zip(("user_id", "external_user_id", "car_id", "reservation_id"), row))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--database-url", default=DATABASE_URL)
+    parser.add_argument("--no-db", action="store_true")
+    parser.add_argument("--output", default="hot_queries.json")
+    args = parser.parse_args()
+
+    if args.no_db:
+        ids = {
+            "user_id": uuid.uuid4(),
+            "external_user_id": 1,
+            "car_id": uuid.uuid4(),
+            "reservation_id": uuid.uuid4(),
+        }
+    else:
+        unprepared = create_database_engine(args.database_url, prepare_threshold="off")
+        prepared = create_database_engine(args.database_url)
+        with Session(unprepared) as db:
+            ids = sample_ids(db)
+
+    before, after = core_statements(ids), lambda_statements(ids)
+    report = {}
+    for name in before:
+        report[name] = {
+            "build_before": build_cost(before[name], args.iterations),
+            "build_after": build_cost(after[name], args.iterations),
+        }
+        if not args.no_db:
+            with Session(unprepared) as db:
+                report[name]["execute_before"] = execution_time(
+                    db, before[name], args.iterations
+                )
+            with Session(prepared) as db:
+                report[name]["execute_after"] = execution_time(
+                    db, after[name], args.iterations
+                )
+
+    with open(args.output, "w") as f:
+        json.dump(
+            {
+                "iterations": args.iterations,
+                "prepare_threshold": DATABASE_PREPARE_THRESHOLD,
+                "queries": report,
+            },
+            f,
+            indent=2,
+            sort_keys=True,
+        )
+        f.write("\n")
+    for name, result in report.items():
+        line = (
+            f"{name:26s} build {result['build_before']['p50_us']:7.1f} -> "
+            f"{result['build_after']['p50_us']:7.1f} us"
+        )
+        if "execute_before" in result:
+            line += (
+                f", execute {result['execute_before']['p50_us']:8.1f} -> "
+                f"{result['execute_after']['p50_us']:8.1f} us"
+            )
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Microbenchmark for the cost of request instrumentation.
+
+Run from the backend directory:
+
+    python -m benchmarks.metrics_overhead
+"""
+
+import asyncio
+import timeit
+
+from src.instrumentation.metrics import Histogram, Registry
+from src.instrumentation.middleware import MetricsMiddleware
+from src.instrumentation.profiling import Profiler, ProfilingMiddleware
+
+ITERATIONS = 100_000
+
+
+async def _noop_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def _receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def _send(message):
+    pass
+
+
+async def _drive(app, iterations: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/bench", "headers": []}
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    for _ in range(iterations):
+        await app(dict(scope), _receive, _send)
+    return loop.time() - start
+
+
+def bench_observe() -> float:
+    histogram = Histogram("bench_seconds", "Benchmark", ("route",), registry=Registry())
+    seconds = timeit.timeit(
+        lambda: histogram.observe(0.042, "/api/v1/cars/"), number=ITERATIONS
+    )
+    return seconds / ITERATIONS
+
+
+def bench_middleware() -> tuple[float, float]:
+    bare = asyncio.run(_drive(_noop_app, ITERATIONS))
+    wrapped = asyncio.run(_drive(MetricsMiddleware(_noop_app), ITERATIONS))
+    return bare / ITERATIONS, wrapped / ITERATIONS
+
+
+def bench_profiling() -> tuple[float, float]:
+    """Per-request cost of the profiling middleware when it does not profile"""
+    disabled = Profiler()
+    disabled.token, disabled.sample_rate, disabled.enabled = None, 0.0, False
+    armed = Profiler()
+    armed.token, armed.sample_rate, armed.enabled = "token", 0.0, True
+    return tuple(
+        asyncio.run(_drive(ProfilingMiddleware(_noop_app, profiler), ITERATIONS))
+        / ITERATIONS
+        for profiler in (disabled, armed)
+    )
+
+
+def bench_render(series: int = 50) -> float:
+    registry = Registry()
+    histogram = Histogram("bench_seconds", "Benchmark", ("route",), registry=registry)
+    for i in range(series):
+        histogram.observe(0.01, f"/route/{i}")
+    return timeit.timeit(registry.render, number=1_000) / 1_000
+
+
+if __name__ == "__main__":
+    observe = bench_observe()
+    bare, wrapped = bench_middleware()
+    profiling_off, profiling_armed = bench_profiling()
+    render = bench_render()
+    print(f"Histogram.observe:        {observe * 1e9:8.0f} ns")
+    print(f"ASGI request (bare):      {bare * 1e6:8.2f} us")
+    print(f"ASGI request (metrics):   {wrapped * 1e6:8.2f} us")
+    print(f"Middleware overhead:      {(wrapped - bare) * 1e6:8.2f} us/request")
+    print(f"Profiling (disabled):     {(profiling_off - bare) * 1e6:8.2f} us/request")
+    print(f"Profiling (no header):    {(profiling_armed - bare) * 1e6:8.2f} us/request")
+    print(f"Render 50 series:         {render * 1e6:8.1f} us")
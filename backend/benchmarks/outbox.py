@@ -0,0 +1,283 @@
+"""Check that reservation events reach the provider through the outbox.
+
+Starts the fake charging-points service as the provider, failing
+`--event-error-rate` of the event batches, and a two-worker
+`python -m src.server` pointed at it with short retry delays. It books
+`--reservations` windows for an unseeded user and cancels every
+`--cancel-every`th. It then waits until the provider has them all and
+checks that:
+
+1. every booking and cancellation arrived as an event, and no others did,
+2. the newest event of each reservation carries its final status,
+3. no outbox row of the run is left undelivered.
+
+Duplicates are allowed, since delivery is at least once. It reports them
+together with the delay from each change to its first delivery. The exit
+code is 1 if any check fails.
+
+    python -m benchmarks.outbox --reservations 100 --event-error-rate 0.3
+
+Needs the database and fake auth service from benchmarks/README.md, without
+reservation shards.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from sqlalchemy import delete, func, select
+
+from benchmarks.worker_scaling import wait_until_healthy
+from src.database import SessionLocal
+from src.models.car import Car
+from src.models.charging_point_status import ChargingPointStatus
+from src.models.charging_point_usage import ChargingPointUsage
+from src.models.outbox_event import OutboxEvent
+from src.models.reservation import Reservation
+from src.models.user import User
+
+API_PREFIX = "/api/v1"
+
+POINT_PREFIX = "OUTBOX-CHECK-"
+
+CAR = {
+    "name": "Outbox check",
+    "connector_types": ["CCS"],
+    "battery_size": 60,
+    "max_kw_ac": 11,
+    "max_kw_dc": 100,
+}
+
+
+def wait_for_provider(provider: httpx.Client, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if provider.get(f"{API_PREFIX}/reservation-events").status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("The fake provider did not start")
+
+
+def make_changes(
+    client: httpx.Client, headers: dict, reservations: int, cancel_every: int
+) -> dict[str, str]:
+    """Book and cancel; returns the final status per reservation id"""
+    created = client.post(f"{API_PREFIX}/cars/", json=CAR, headers=headers)
+    created.raise_for_status()
+    car_id = created.json()["id"]
+
+    start = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(days=1)
+    final = {}
+    for i in range(reservations):
+        response = client.post(
+            f"{API_PREFIX}/reservations/",
+            json={
+                "car_id": car_id,
+                "charging_point_id": f"{POINT_PREFIX}{i}",
+                "start_time": start.isoformat(),
+                "end_time": (start + timedelta(hours=1)).isoformat(),
+            },
+            headers=headers,
+        )
+        response.raise_for_status()
+        reservation_id = response.json()["id"]
+        final[reservation_id] = "active"
+        if cancel_every and i % cancel_every == 0:
+            client.post(
+                f"{API_PREFIX}/reservations/{reservation_id}/cancel", headers=headers
+            ).raise_for_status()
+            final[reservation_id] = "cancelled"
+    return final
+
+
+def expected_events(final: dict[str, str]) -> set[tuple[str, str]]:
+    expected = {(r, "reservation.booked") for r in final}
+    expected |= {
+        (r, "reservation.cancelled") for r, s in final.items() if s != "active"
+    }
+    return expected
+
+
+def wait_for_events(
+    provider: httpx.Client, final: dict[str, str], timeout: float
+) -> list[dict]:
+    """Events of this run received by the provider, once all are in or on timeout"""
+    expected = expected_events(final)
+    deadline = time.monotonic() + timeout
+    while True:
+        received = [
+            e
+            for e in provider.get(f"{API_PREFIX}/reservation-events").json()
+            if e["reservation_id"] in final
+        ]
+        seen = {(e["reservation_id"], e["event_type"]) for e in received}
+        if expected <= seen or time.monotonic() > deadline:
+            return received
+        time.sleep(0.5)
+
+
+def count_undelivered(final: dict[str, str], timeout: float = 10.0) -> int:
+    """Outbox rows of the run not marked delivered, allowing for the last batch"""
+    deadline = time.monotonic() + timeout
+    while True:
+        with SessionLocal() as db:
+            undelivered = db.scalar(
+                select(func.count())
+                .select_from(OutboxEvent)
+                .where(
+                    OutboxEvent.aggregate_id.in_([uuid.UUID(r) for r in final]),
+                    OutboxEvent.delivered_at.is_(None),
+                )
+            )
+        if not undelivered or time.monotonic() > deadline:
+            return undelivered
+        time.sleep(0.5)
+
+
+def check_events(final: dict[str, str], received: list[dict]) -> list[str]:
+    failures = []
+    expected = expected_events(final)
+    seen = {(e["reservation_id"], e["event_type"]) for e in received}
+    if missing := expected - seen:
+        failures.append(f"{len(missing)} events never arrived")
+    if unexpected := seen - expected:
+        failures.append(f"{len(unexpected)} unexpected events arrived")
+
+    newest = {}
+    for event in sorted(received, key=lambda e: e["occurred_at"]):
+        newest[event["reservation_id"]] = event["status"]
+    wrong = [r for r, status in final.items() if newest.get(r, status) != status]
+    if wrong:
+        failures.append(f"{len(wrong)} reservations end in the wrong status")
+
+    if undelivered := count_undelivered(final):
+        failures.append(f"{undelivered} outbox rows are still undelivered")
+    return failures
+
+
+def report(received: list[dict]) -> None:
+    counts = Counter(e["event_id"] for e in received)
+    first = {}
+    for event in received:
+        first.setdefault(event["event_id"], event)
+    delays = sorted(
+        e["received_at"] - datetime.fromisoformat(e["occurred_at"]).timestamp()
+        for e in first.values()
+    )
+    print(
+        f"{len(counts)} events, {sum(counts.values()) - len(counts)} duplicate "
+        f"deliveries"
+    )
+    if delays:
+        p95 = delays[int(0.95 * (len(delays) - 1))]
+        print(
+            f"Delay to first delivery: p50 {statistics.median(delays):.2f}s, "
+            f"p95 {p95:.2f}s, max {delays[-1]:.2f}s"
+        )
+
+
+def clean_up(user_number: int) -> None:
+    with SessionLocal() as db:
+        reservation_ids = select(Reservation.id).where(
+            Reservation.charging_point_id.like(f"{POINT_PREFIX}%")
+        )
+        db.execute(
+            delete(OutboxEvent).where(OutboxEvent.aggregate_id.in_(reservation_ids))
+        )
+        for model in (Reservation, ChargingPointUsage, ChargingPointStatus):
+            db.execute(
+                delete(model).where(model.charging_point_id.like(f"{POINT_PREFIX}%"))
+            )
+        db.execute(
+            delete(Car).where(
+                Car.user_id
+                == select(User.id)
+                .where(User.external_user_id == user_number)
+                .scalar_subquery()
+            )
+        )
+        db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reservations", type=int, default=50)
+    parser.add_argument("--cancel-every", type=int, default=3)
+    parser.add_argument("--event-error-rate", type=float, default=0.3)
+    parser.add_argument("--port", type=int, default=8093)
+    parser.add_argument("--provider-port", type=int, default=8094)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument(
+        "--user", type=int, default=900_004, help="User number, kept out of seeds"
+    )
+    args = parser.parse_args()
+
+    provider_url = f"http://127.0.0.1:{args.provider_port}"
+    base_url = f"http://127.0.0.1:{args.port}"
+    env = {
+        **os.environ,
+        "WEB_CONCURRENCY": "2",
+        "PORT": str(args.port),
+        "CHARGING_POINTS_URL": provider_url,
+        "OUTBOX_EVENTS_URL": f"{provider_url}{API_PREFIX}/reservation-events",
+        "OUTBOX_BATCH_SIZE": "10",
+        "OUTBOX_POLL_INTERVAL_SECONDS": "0.2",
+        "OUTBOX_BACKOFF_BASE_SECONDS": "0.1",
+        "OUTBOX_BACKOFF_MAX_SECONDS": "1",
+    }
+    provider_process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.fake_upstreams",
+            "charging-points",
+            f"--port={args.provider_port}",
+            f"--event-error-rate={args.event_error_rate}",
+        ]
+    )
+    server = None
+    try:
+        with (
+            httpx.Client(base_url=provider_url, timeout=10.0) as provider,
+            httpx.Client(base_url=base_url, timeout=30.0) as client,
+        ):
+            wait_for_provider(provider)
+            server = subprocess.Popen([sys.executable, "-m", "src.server"], env=env)
+            wait_until_healthy(base_url)
+            login = client.post(
+                f"{API_PREFIX}/auth/login",
+                json={"username": f"user{args.user}", "password": f"pass{args.user}"},
+            )
+            login.raise_for_status()
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+            final = make_changes(client, headers, args.reservations, args.cancel_every)
+            received = wait_for_events(provider, final, args.timeout)
+            failures = check_events(final, received)
+            report(received)
+    finally:
+        for process in (server, provider_process):
+            if process is not None:
+                process.terminate()
+                process.wait(timeout=60)
+        clean_up(args.user)
+
+    for failure in failures:
+        print(f"  {failure}")
+    if failures:
+        sys.exit(1)
+    print("Every change reached the provider, in its final state")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Compare goodput under overload with admission control off and on.
+
+Starts `python -m src.server` once without and once with
+`ADMISSION_CONTROL_ENABLED`, and drives a scenario from `benchmarks.run` at a
+concurrency well above what the server sustains. Clients give up after
+`--timeout` seconds, so goodput counts only successful responses within that
+budget. Per-client rate limits are turned off for both runs so that only the
+queueing and shedding differ. Needs the database, seed data and fake upstreams
+from benchmarks/README.md.
+
+    python -m benchmarks.overload --scenario booking_contention --concurrency 400
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.run import SCENARIOS, parse_args, run_scenario
+from benchmarks.worker_scaling import wait_until_healthy
+from src.admission.middleware import ROUTE_LIMITS
+
+
+def measure(admission: bool, workers: int, scenario: str, run_args) -> dict:
+    port = run_args.base_url.rsplit(":", 1)[-1]
+    env = {
+        **os.environ,
+        "ADMISSION_CONTROL_ENABLED": str(admission).lower(),
+        "WEB_CONCURRENCY": str(workers),
+        "PORT": port,
+        **{f"ADMISSION_{name.upper()}_RATE": "0" for name in ROUTE_LIMITS},
+    }
+    server = subprocess.Popen([sys.executable, "-m", "src.server"], env=env)
+    try:
+        wait_until_healthy(run_args.base_url)
+        return asyncio.run(run_scenario(scenario, run_args))
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scenario", choices=sorted(SCENARIOS), default="booking_contention"
+    )
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--concurrency", type=int, default=400)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    parser.add_argument("--output", default="overload.json")
+    args = parser.parse_args()
+
+    run_args = parse_args(
+        [
+            f"--base-url=http://127.0.0.1:{args.port}",
+            f"--duration={args.duration}",
+            f"--concurrency={args.concurrency}",
+            f"--timeout={args.timeout}",
+        ]
+    )
+
+    results = {}
+    for admission in (False, True):
+        label = "admission_control" if admission else "baseline"
+        summary = measure(admission, args.workers, args.scenario, run_args)
+        results[label] = summary
+        print(
+            f"{label:18s} {summary['goodput_rps']:9.1f} good req/s  "
+            f"{summary['throughput_rps']:9.1f} req/s  "
+            f"p99 {summary['latency_ms']['p99']} ms  {summary['statuses']}"
+        )
+
+    with open(args.output, "w") as f:
+        json.dump(
+            {
+                "scenario": args.scenario,
+                "concurrency": args.concurrency,
+                "timeout_s": args.timeout,
+                "results": results,
+            },
+            f,
+            indent=2,
+            sort_keys=True,
+        )
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Check read-replica routing against two local databases.
+
+A second database on the same Postgres server stands in for the replica.
+It gets the schema but never receives the primary's rows, so a read served
+by it is recognisable: it finds no cars. The script starts a
+single-process `python -m src.server` with `DATABASE_REPLICA_URLS` set to
+that database. It logs in as an unseeded user and checks that:
+
+1. a car read right after creating it comes from the primary,
+2. a later read, once the write is older than the replica's position and the
+   commit margin, comes from the replica,
+3. after another write the user's reads are back on the primary.
+
+The exit code is 1 if any check fails.
+
+    createdb car_charging_replica
+    python -m benchmarks.replica_routing \\
+        --replica-url postgresql+psycopg://.../car_charging_replica
+
+Needs the database and fake auth server from benchmarks/README.md.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+from sqlalchemy import create_engine, delete, select
+
+from benchmarks.worker_scaling import wait_until_healthy
+from src.database import REPLICA_COMMIT_MARGIN, Base, SessionLocal
+from src.models import (  # noqa: F401
+    car,
+    charging_point_status,
+    charging_point_usage,
+    idempotency_key,
+    reservation,
+    user,
+)
+from src.models.car import Car
+from src.models.user import User
+
+API_PREFIX = "/api/v1"
+
+CHECK_INTERVAL_SECONDS = 0.1
+
+CAR = {
+    "name": "Replica check",
+    "connector_types": ["CCS"],
+    "battery_size": 60,
+    "max_kw_ac": 11,
+    "max_kw_dc": 100,
+}
+
+
+def delete_cars(user_number: int) -> None:
+    with SessionLocal() as db:
+        db.execute(
+            delete(Car).where(
+                Car.user_id
+                == select(User.id)
+                .where(User.external_user_id == user_number)
+                .scalar_subquery()
+            )
+        )
+        db.commit()
+
+
+def check_routing(client: httpx.Client, headers: dict) -> list[str]:
+    """Run the checks; returns the failures"""
+    failures = []
+
+    created = client.post(f"{API_PREFIX}/cars/", json=CAR, headers=headers)
+    created.raise_for_status()
+    car_id = created.json()["id"]
+    if client.get(f"{API_PREFIX}/cars/{car_id}", headers=headers).status_code != 200:
+        failures.append("read right after a write was not served by the primary")
+
+    # Older than the commit margin, and the replica position is rechecked
+    time.sleep(REPLICA_COMMIT_MARGIN.total_seconds() + 5 * CHECK_INTERVAL_SECONDS)
+    cars = client.get(
+        f"{API_PREFIX}/cars/", params={"connector_type": "CCS"}, headers=headers
+    )
+    cars.raise_for_status()
+    if cars.json():
+        failures.append("read after the commit margin was not served by the replica")
+
+    created = client.post(f"{API_PREFIX}/cars/", json=CAR, headers=headers)
+    created.raise_for_status()
+    car_id = created.json()["id"]
+    if client.get(f"{API_PREFIX}/cars/{car_id}", headers=headers).status_code != 200:
+        failures.append("read after a second write was not served by the primary")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--replica-url", required=True)
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument(
+        "--user", type=int, default=900_001, help="User number, kept out of seeds"
+    )
+    args = parser.parse_args()
+
+    replica = create_engine(args.replica_url)
+    Base.metadata.create_all(replica)
+    replica.dispose()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    env = {
+        **os.environ,
+        "WEB_CONCURRENCY": "1",
+        "PORT": str(args.port),
+        "DATABASE_REPLICA_URLS": args.replica_url,
+        "REPLICA_CHECK_INTERVAL_SECONDS": str(CHECK_INTERVAL_SECONDS),
+    }
+    server = subprocess.Popen([sys.executable, "-m", "src.server"], env=env)
+    try:
+        wait_until_healthy(base_url)
+        with httpx.Client(base_url=base_url, timeout=30.0) as client:
+            login = client.post(
+                f"{API_PREFIX}/auth/login",
+                json={"username": f"user{args.user}", "password": f"pass{args.user}"},
+            )
+            login.raise_for_status()
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+            failures = check_routing(client, headers)
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+        delete_cars(args.user)
+
+    for failure in failures:
+        print(f"  {failure}")
+    if failures:
+        sys.exit(1)
+    print("Reads went to the replica, and to the primary after each write")
+
+
+if __name__ == "__main__":
+    main()
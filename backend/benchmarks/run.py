@@ -0,0 +1,252 @@
+"""Drive the API with scripted scenarios and write latency percentiles as JSON.
+
+    python -m benchmarks.run --base-url http://localhost:8080 \\
+        --scenario login_storm --scenario list_heavy --output results.json
+
+The API must be running against the fake upstreams and a seeded database,
+see benchmarks/README.md.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+import httpx
+
+API_PREFIX = "/api/v1"
+
+
+@dataclass
+class Session:
+    """A logged-in benchmark user"""
+
+    username: str
+    token: str
+    car_ids: list[str] = field(default_factory=list)
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+@dataclass
+class ScenarioResult:
+    latencies: list[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    errors: int = 0
+    elapsed: float = 0.0
+
+    def record(self, status: int | None, latency: float) -> None:
+        self.latencies.append(latency)
+        if status is None:
+            self.errors += 1
+            self.statuses["error"] += 1
+        else:
+            self.statuses[str(status)] += 1
+
+    def summary(self) -> dict:
+        latencies = sorted(self.latencies)
+        requests = len(latencies)
+        ok = sum(n for status, n in self.statuses.items() if status.startswith("2"))
+        return {
+            "requests": requests,
+            "successful": ok,
+            "errors": self.errors,
+            "statuses": dict(sorted(self.statuses.items())),
+            "throughput_rps": round(requests / self.elapsed, 2) if self.elapsed else 0,
+            "goodput_rps": round(ok / self.elapsed, 2) if self.elapsed else 0,
+            "latency_ms": {
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "max": round(latencies[-1] * 1000, 2) if latencies else None,
+            },
+        }
+
+
+def percentile(sorted_values: list[float], pct: float) -> float | None:
+    """Nearest-rank percentile in milliseconds"""
+    if not sorted_values:
+        return None
+    rank = max(
+        0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1)
+    )
+    return round(sorted_values[rank] * 1000, 2)
+
+
+async def timed(
+    result: ScenarioResult, request: Awaitable[httpx.Response]
+) -> httpx.Response | None:
+    start = time.perf_counter()
+    try:
+        response = await request
+    except httpx.HTTPError:
+        result.record(None, time.perf_counter() - start)
+        return None
+    result.record(response.status_code, time.perf_counter() - start)
+    return response
+
+
+async def login(client: httpx.AsyncClient, user_number: int) -> Session | None:
+    username = f"user{user_number}"
+    response = await client.post(
+        f"{API_PREFIX}/auth/login",
+        json={"username": username, "password": f"pass{user_number}"},
+    )
+    if response.status_code != 200:
+        return None
+    session = Session(username=username, token=response.json()["access_token"])
+    cars = await client.get(f"{API_PREFIX}/cars/", headers=session.headers)
+    if cars.status_code == 200:
+        session.car_ids = [car["id"] for car in cars.json()]
+    return session
+
+
+async def login_sessions(
+    client: httpx.AsyncClient, users: int, count: int
+) -> list[Session]:
+    numbers = random.sample(range(1, users + 1), k=min(count, users))
+    sessions = await asyncio.gather(*(login(client, n) for n in numbers))
+    return [s for s in sessions if s is not None]
+
+
+async def login_storm(client: httpx.AsyncClient, args, result: ScenarioResult):
+    """Many users logging in at once"""
+
+    async def step():
+        n = random.randint(1, args.users)
+        await timed(
+            result,
+            client.post(
+                f"{API_PREFIX}/auth/login",
+                json={"username": f"user{n}", "password": f"pass{n}"},
+            ),
+        )
+
+    return step
+
+
+async def list_heavy(client: httpx.AsyncClient, args, result: ScenarioResult):
+    """Logged-in users repeatedly reading their cars and reservations"""
+    sessions = await login_sessions(client, args.users, args.sessions)
+
+    async def step():
+        session = random.choice(sessions)
+        path = random.choice(("/cars/", "/reservations/"))
+        await timed(result, client.get(API_PREFIX + path, headers=session.headers))
+
+    return step
+
+
+async def booking_contention(client: httpx.AsyncClient, args, result: ScenarioResult):
+    """Users competing for a handful of charging points and time slots"""
+    sessions = await login_sessions(client, args.users, args.sessions)
+    sessions = [s for s in sessions if s.car_ids]
+    base = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+    async def step():
+        session = random.choice(sessions)
+        start = base + timedelta(days=1, hours=random.randrange(8))
+        await timed(
+            result,
+            client.post(
+                f"{API_PREFIX}/reservations/",
+                headers=session.headers,
+                json={
+                    "car_id": random.choice(session.car_ids),
+                    "charging_point_id": f"cp-{random.randrange(args.hot_points)}",
+                    "start_time": start.isoformat(),
+                    "end_time": (start + timedelta(hours=1)).isoformat(),
+                },
+            ),
+        )
+
+    return step
+
+
+SCENARIOS: dict[str, Callable] = {
+    "login_storm": login_storm,
+    "list_heavy": list_heavy,
+    "booking_contention": booking_contention,
+}
+
+
+async def run_scenario(name: str, args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=args.base_url, limits=limits, timeout=args.timeout
+    ) as client:
+        result = ScenarioResult()
+        step = await SCENARIOS[name](client, args, result)
+
+        deadline = time.perf_counter() + args.duration
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                await step()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        result.elapsed = time.perf_counter() - start
+
+    return result.summary()
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8080")
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=sorted(SCENARIOS),
+        help="Scenario to run (repeatable, defaults to all)",
+    )
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds each")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--users", type=int, default=1_000, help="Seeded users")
+    parser.add_argument("--sessions", type=int, default=100, help="Logged-in users")
+    parser.add_argument("--hot-points", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="bench_results.json")
+    return parser.parse_args(argv)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    random.seed(args.seed)
+    results = {}
+    for name in args.scenario or sorted(SCENARIOS):
+        results[name] = await run_scenario(name, args)
+    return {
+        "config": {
+            "duration_s": args.duration,
+            "concurrency": args.concurrency,
+            "users": args.users,
+            "sessions": args.sessions,
+        },
+        "scenarios": results,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+    for name, summary in report["scenarios"].items():
+        latency = summary["latency_ms"]
+        print(
+            f"{name:20s} {summary['throughput_rps']:9.1f} req/s  "
+            f"p50 {latency['p50']} ms  p95 {latency['p95']} ms  p99 {latency['p99']} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
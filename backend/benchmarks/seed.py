@@ -0,0 +1,153 @@
+"""Seed Postgres with benchmark users, cars and reservations.
+
+    DATABASE_URL=postgresql+psycopg://... python -m benchmarks.seed --reset
+
+Users are `user1` .. `userN` with external ids 1 .. N, matching the fake auth
+server in `benchmarks.fake_upstreams`.
+"""
+
+import argparse
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, insert
+
+from src.database import SessionLocal
+from src.models.car import (
+    Car,
+    ConnectorType,
+    canonical_connector_types,
+    connector_mask,
+)
+from src.models.reservation import Reservation, ReservationStatus
+from src.models.user import User
+
+BATCH_SIZE = 5_000
+
+
+def _batched(rows: list[dict], size: int = BATCH_SIZE):
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
+
+
+def _car_row(user_id: uuid.UUID, index: int, rng: random.Random) -> dict:
+    connector_types = canonical_connector_types(
+        rng.sample(list(ConnectorType), k=rng.randint(1, 3))
+    )
+    return {
+        "id": uuid.uuid4(),
+        "name": f"Car {index}",
+        "connector_types": connector_types,
+        "connector_mask": connector_mask(connector_types),
+        "battery_charge_limit": rng.choice((80, 90, 100)),
+        "battery_size": rng.choice((40, 58, 77, 100)),
+        "max_kw_ac": rng.choice((7, 11, 22)),
+        "max_kw_dc": rng.choice((50, 100, 150, 250)),
+        "user_id": user_id,
+    }
+
+
+def _reservation_row(
+    user_id: uuid.UUID,
+    car_id: uuid.UUID,
+    charging_points: int,
+    now: datetime,
+    rng: random.Random,
+) -> dict:
+    start = now + timedelta(hours=rng.randint(-24 * 180, 24 * 30))
+    start = start.replace(minute=rng.choice((0, 15, 30, 45)), second=0, microsecond=0)
+    end = start + timedelta(minutes=rng.choice((30, 60, 90, 120, 240)))
+    status = ReservationStatus.ACTIVE
+    if end < now:
+        status = rng.choice((ReservationStatus.COMPLETED, ReservationStatus.CANCELLED))
+    return {
+        "id": uuid.uuid4(),
+        "start_time": start,
+        "end_time": end,
+        "created_at": start - timedelta(days=rng.randint(1, 14)),
+        "updated_at": start - timedelta(days=1),
+        "status": status,
+        "charging_point_id": f"cp-{rng.randrange(charging_points)}",
+        "user_id": user_id,
+        "car_id": car_id,
+    }
+
+
+def seed(
+    users: int,
+    cars_per_user: int,
+    reservations_per_user: int,
+    charging_points: int,
+    reset: bool,
+    seed_value: int = 42,
+) -> dict[str, int]:
+    rng = random.Random(seed_value)
+    now = datetime.now(timezone.utc)
+
+    user_rows = [
+        {"id": uuid.uuid4(), "external_user_id": n, "username": f"user{n}"}
+        for n in range(1, users + 1)
+    ]
+    car_rows = [
+        _car_row(user["id"], index, rng)
+        for user in user_rows
+        for index in range(cars_per_user)
+    ]
+    cars_by_user: dict[uuid.UUID, list[uuid.UUID]] = {}
+    for car in car_rows:
+        cars_by_user.setdefault(car["user_id"], []).append(car["id"])
+    reservation_rows = [
+        _reservation_row(
+            user["id"],
+            rng.choice(cars_by_user[user["id"]]),
+            charging_points,
+            now,
+            rng,
+        )
+        for user in user_rows
+        for _ in range(reservations_per_user if cars_per_user else 0)
+    ]
+
+    with SessionLocal() as db:
+        if reset:
+            db.execute(delete(Reservation))
+            db.execute(delete(Car))
+            db.execute(delete(User))
+        for table, rows in (
+            (User, user_rows),
+            (Car, car_rows),
+            (Reservation, reservation_rows),
+        ):
+            for batch in _batched(rows):
+                db.execute(insert(table.__table__), batch)
+        db.commit()
+
+    return {
+        "users": len(user_rows),
+        "cars": len(car_rows),
+        "reservations": len(reservation_rows),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--cars-per-user", type=int, default=2)
+    parser.add_argument("--reservations-per-user", type=int, default=25)
+    parser.add_argument("--charging-points", type=int, default=200)
+    parser.add_argument("--reset", action="store_true", help="Delete existing rows")
+    args = parser.parse_args()
+
+    counts = seed(
+        users=args.users,
+        cars_per_user=args.cars_per_user,
+        reservations_per_user=args.reservations_per_user,
+        charging_points=args.charging_points,
+        reset=args.reset,
+    )
+    print(", ".join(f"{n} {name}" for name, n in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
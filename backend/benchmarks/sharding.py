@@ -0,0 +1,236 @@
+"""Check reservation sharding against several local databases.
+
+Each `--shard NAME=URL` database gets the shard schema. The script starts a
+single-process `python -m src.server` with `RESERVATION_SHARD_URLS` set to
+them, logs in as an unseeded user and books one window on each of
+`--points` charging points. It then checks that:
+
+1. every reservation is stored on the shard the hash ring assigns its point,
+   and on no other,
+2. `GET /reservations/` returns all of them, in start order across shards,
+3. an overlapping booking of a point is refused,
+4. after moving one point to another shard, its reservation is still found,
+   overlaps are still refused and new bookings land on the new shard.
+
+The exit code is 1 if any check fails.
+
+    createdb reservations_a && createdb reservations_b
+    python -m benchmarks.sharding \\
+        --shard a=postgresql+psycopg://.../reservations_a \\
+        --shard b=postgresql+psycopg://.../reservations_b
+
+Needs the database and fake upstreams from benchmarks/README.md.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from sqlalchemy import delete, select
+
+from benchmarks.worker_scaling import wait_until_healthy
+from src.database import SessionLocal
+from src.models.car import Car
+from src.models.charging_point_move import ChargingPointMove
+from src.models.charging_point_shard import ChargingPointShard
+from src.models.charging_point_usage import ChargingPointUsage
+from src.models.reservation import Reservation
+from src.models.user import User
+from src.services.sharding import ShardRouter, parse_shard_urls, shard_schema
+
+API_PREFIX = "/api/v1"
+
+POINT_PREFIX = "SHARD-CHECK-"
+
+CAR = {
+    "name": "Shard check",
+    "connector_types": ["CCS"],
+    "battery_size": 60,
+    "max_kw_ac": 11,
+    "max_kw_dc": 100,
+}
+
+
+def book(client: httpx.Client, headers: dict, body: dict) -> httpx.Response:
+    """Book, retrying while the point is being moved"""
+    for _ in range(10):
+        response = client.post(
+            f"{API_PREFIX}/reservations/", json=body, headers=headers
+        )
+        if response.status_code != 503:
+            return response
+        time.sleep(float(response.headers.get("Retry-After", "1")))
+    return response
+
+
+def holders(router: ShardRouter, reservation_id: str) -> list[str]:
+    """Shards storing the reservation"""
+    return [
+        name
+        for name, found in zip(
+            router.sessions,
+            router.gather(
+                None, lambda s: s.get(Reservation, uuid.UUID(reservation_id))
+            ),
+        )
+        if found is not None
+    ]
+
+
+def check_sharding(
+    client: httpx.Client, headers: dict, router: ShardRouter, points: int
+) -> list[str]:
+    """Run the checks; returns the failures"""
+    failures = []
+
+    created = client.post(f"{API_PREFIX}/cars/", json=CAR, headers=headers)
+    created.raise_for_status()
+    car_id = created.json()["id"]
+
+    # Later points start earlier, so start order differs from booking order
+    first_start = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(days=1)
+    booked = {}
+    for i in range(points):
+        charging_point_id = f"{POINT_PREFIX}{i}"
+        start = first_start + timedelta(hours=points - i)
+        body = {
+            "car_id": car_id,
+            "charging_point_id": charging_point_id,
+            "start_time": start.isoformat(),
+            "end_time": (start + timedelta(hours=1)).isoformat(),
+        }
+        response = book(client, headers, body)
+        response.raise_for_status()
+        booked[charging_point_id] = (response.json()["id"], body)
+
+    placement = Counter()
+    for charging_point_id, (reservation_id, _) in booked.items():
+        owner = router.ring.node_for(charging_point_id)
+        found = holders(router, reservation_id)
+        placement.update(found)
+        if found != [owner]:
+            failures.append(f"{charging_point_id} is on {found}, expected {owner}")
+    print(f"Reservations per shard: {dict(sorted(placement.items()))}")
+
+    listed = client.get(f"{API_PREFIX}/reservations/", headers=headers)
+    listed.raise_for_status()
+    listed = listed.json()
+    if sorted(r["id"] for r in listed) != sorted(r for r, _ in booked.values()):
+        failures.append("the listing does not hold exactly the booked reservations")
+    if [r["start_time"] for r in listed] != sorted(r["start_time"] for r in listed):
+        failures.append("the listing is not in start order")
+
+    charging_point_id = f"{POINT_PREFIX}0"
+    reservation_id, body = booked[charging_point_id]
+    if book(client, headers, body).status_code != 409:
+        failures.append("an overlapping booking was not refused")
+
+    source = router.ring.node_for(charging_point_id)
+    target = next(name for name in router.sessions if name != source)
+    with SessionLocal() as db:
+        router.move(db, charging_point_id, target)
+    if holders(router, reservation_id) != [target]:
+        failures.append(f"the moved reservation is not only on {target}")
+    fetched = client.get(f"{API_PREFIX}/reservations/{reservation_id}", headers=headers)
+    if fetched.status_code != 200:
+        failures.append("the moved reservation is not found through the API")
+    if book(client, headers, body).status_code != 409:
+        failures.append("an overlap with the moved reservation was not refused")
+
+    start = datetime.fromisoformat(body["end_time"])
+    later = {
+        **body,
+        "start_time": start.isoformat(),
+        "end_time": (start + timedelta(hours=1)).isoformat(),
+    }
+    response = book(client, headers, later)
+    response.raise_for_status()
+    if holders(router, response.json()["id"]) != [target]:
+        failures.append(f"a booking after the move did not land on {target}")
+    return failures
+
+
+def clean_up(router: ShardRouter, user_number: int) -> None:
+    for factory in router.sessions.values():
+        with factory() as shard:
+            for model in (Reservation, ChargingPointMove):
+                shard.execute(
+                    delete(model).where(
+                        model.charging_point_id.like(f"{POINT_PREFIX}%")
+                    )
+                )
+            shard.commit()
+    with SessionLocal() as db:
+        for model in (ChargingPointShard, ChargingPointUsage):
+            db.execute(
+                delete(model).where(model.charging_point_id.like(f"{POINT_PREFIX}%"))
+            )
+        db.execute(
+            delete(Car).where(
+                Car.user_id
+                == select(User.id)
+                .where(User.external_user_id == user_number)
+                .scalar_subquery()
+            )
+        )
+        db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--shard", action="append", required=True, help="NAME=URL, at least two"
+    )
+    parser.add_argument("--points", type=int, default=40)
+    parser.add_argument("--port", type=int, default=8091)
+    parser.add_argument(
+        "--user", type=int, default=900_002, help="User number, kept out of seeds"
+    )
+    args = parser.parse_args()
+
+    shard_urls = ",".join(args.shard)
+    if len(parse_shard_urls(shard_urls)) < 2:
+        parser.error("give at least two shards")
+    router = ShardRouter(parse_shard_urls(shard_urls))
+    metadata = shard_schema()
+    for engine in router.engines.values():
+        metadata.create_all(engine)
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    env = {
+        **os.environ,
+        "WEB_CONCURRENCY": "1",
+        "PORT": str(args.port),
+        "RESERVATION_SHARD_URLS": shard_urls,
+    }
+    server = subprocess.Popen([sys.executable, "-m", "src.server"], env=env)
+    try:
+        wait_until_healthy(base_url)
+        with httpx.Client(base_url=base_url, timeout=30.0) as client:
+            login = client.post(
+                f"{API_PREFIX}/auth/login",
+                json={"username": f"user{args.user}", "password": f"pass{args.user}"},
+            )
+            login.raise_for_status()
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+            failures = check_sharding(client, headers, router, args.points)
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+        clean_up(router, args.user)
+
+    for failure in failures:
+        print(f"  {failure}")
+    if failures:
+        sys.exit(1)
+    print("Reservations followed their charging point's shard, also after a move")
+
+
+if __name__ == "__main__":
+    main()
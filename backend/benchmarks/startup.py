@@ -0,0 +1,179 @@
+"""Measure how quickly a new server takes traffic, with and without warm-up.
+
+Starts a single-process `python -m src.server` `--runs` times per mode and
+records, from the moment it is spawned:
+
+- `healthy_s`: the first 200 from `/health`, i.e. the app is imported and
+  serving,
+- `ready_s`: the first 200 from `/ready`,
+- `first_request_s`: the end of the first successful request after that, a
+  login followed by `GET /reservations/` for an unseeded user,
+
+plus the latency of that first login and listing and the median of the next
+`--requests` listings. Mode `warm` is the default startup; `cold` sets
+`WARM_UP_ENABLED=false`, so `/ready` only waits for the database check and
+the first requests open the connections themselves. Medians over the runs
+are written as JSON.
+
+`--import-audit` instead lists the modules that take longest to import
+(`python -X importtime`), grouped by top-level package.
+
+    python -m benchmarks.startup --runs 5 --output startup.json
+    python -m benchmarks.startup --import-audit
+
+Needs the database and fake upstreams from benchmarks/README.md.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+API_PREFIX = "/api/v1"
+
+MODES = {"warm": {}, "cold": {"WARM_UP_ENABLED": "false"}}
+
+
+def wait_for(client: httpx.Client, path: str, started: float, timeout: float) -> float:
+    """Seconds from `started` until `path` answers 200"""
+    while time.monotonic() - started < timeout:
+        try:
+            if client.get(path, timeout=1.0).status_code == 200:
+                return time.monotonic() - started
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.01)
+    raise RuntimeError(f"{path} did not answer 200 within {timeout}s")
+
+
+def timed(send) -> tuple[httpx.Response, float]:
+    start = time.perf_counter()
+    response = send()
+    response.raise_for_status()
+    return response, time.perf_counter() - start
+
+
+def measure(mode: str, args: argparse.Namespace) -> dict:
+    base_url = f"http://127.0.0.1:{args.port}"
+    env = {
+        **os.environ,
+        **MODES[mode],
+        "WEB_CONCURRENCY": "1",
+        "PORT": str(args.port),
+    }
+    started = time.monotonic()
+    server = subprocess.Popen([sys.executable, "-m", "src.server"], env=env)
+    try:
+        with httpx.Client(base_url=base_url, timeout=30.0) as client:
+            healthy = wait_for(client, "/health", started, args.timeout)
+            ready = wait_for(client, "/ready", started, args.timeout)
+
+            login, login_s = timed(
+                lambda: client.post(
+                    f"{API_PREFIX}/auth/login",
+                    json={
+                        "username": f"user{args.user}",
+                        "password": f"pass{args.user}",
+                    },
+                )
+            )
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+            def listing() -> httpx.Response:
+                return client.get(f"{API_PREFIX}/reservations/", headers=headers)
+
+            _, first_list_s = timed(listing)
+            first_request = time.monotonic() - started
+            later = [timed(listing)[1] for _ in range(args.requests)]
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+    return {
+        "healthy_s": healthy,
+        "ready_s": ready,
+        "first_request_s": first_request,
+        "first_login_ms": login_s * 1000,
+        "first_list_ms": first_list_s * 1000,
+        "later_list_p50_ms": statistics.median(later) * 1000 if later else None,
+    }
+
+
+def import_audit(top: int) -> None:
+    """Print the slowest imports of `src.main`, by module and by package"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.main"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        own, cumulative, name = line.removeprefix("import time:").split("|")
+        modules.append((int(own), int(cumulative), name.strip()))
+
+    total = sum(own for own, _, _ in modules)
+    by_package = defaultdict(int)
+    for own, _, name in modules:
+        by_package[name.split(".")[0]] += own
+
+    print(f"Importing src.main: {total / 1000:.0f} ms in {len(modules)} modules")
+    print("\nBy top-level package (ms):")
+    for package, own in sorted(by_package.items(), key=lambda p: -p[1])[:top]:
+        print(f"  {own / 1000:8.1f}  {package}")
+    print("\nSlowest modules, own time (ms):")
+    for own, _, name in sorted(modules, reverse=True)[:top]:
+        print(f"  {own / 1000:8.1f}  {name}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--modes", nargs="+", choices=sorted(MODES), default=["warm", "cold"]
+    )
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8092)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument(
+        "--user", type=int, default=900_003, help="User number, kept out of seeds"
+    )
+    parser.add_argument("--import-audit", action="store_true")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output", default="startup.json")
+    args = parser.parse_args()
+
+    if args.import_audit:
+        import_audit(args.top)
+        return
+
+    results = {}
+    for mode in args.modes:
+        runs = [measure(mode, args) for _ in range(args.runs)]
+        results[mode] = {
+            key: statistics.median(run[key] for run in runs)
+            for key in runs[0]
+            if runs[0][key] is not None
+        }
+        print(
+            f"{mode}: ready after {results[mode]['ready_s']:.2f}s, first request "
+            f"done after {results[mode]['first_request_s']:.2f}s "
+            f"(login {results[mode]['first_login_ms']:.0f} ms, "
+            f"listing {results[mode]['first_list_ms']:.0f} ms)"
+        )
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
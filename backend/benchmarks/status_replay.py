@@ -0,0 +1,149 @@
+"""Replay generated charging-point status events against the push webhook.
+
+Generates a status history per charging point, then delivers it in signed
+batches out of order and with duplicate deliveries, the way a provider
+retrying over several connections would. Afterwards the stored status of
+every point must be the newest event generated for it; any mismatch is
+printed and the exit code is 1.
+
+    CHARGING_POINT_WEBHOOK_SECRET=... DATABASE_URL=postgresql+psycopg://... \\
+        python -m benchmarks.status_replay --points 500 --events 50000
+
+The API must run with the same webhook secret and database.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from sqlalchemy import select
+
+from src.api.routes.internal import sign
+from src.database import SessionLocal
+from src.models.charging_point_status import ChargingPointStatus
+
+STATUSES = ("available", "occupied", "out_of_service")
+
+
+def generate_events(points: int, events: int, rng: random.Random) -> list[dict]:
+    """Status changes in the order they happened, with rising times per point"""
+    start = datetime.now(timezone.utc).replace(microsecond=0)
+    clocks = [start] * points
+    history = []
+    for _ in range(events):
+        point = rng.randrange(points)
+        clocks[point] += timedelta(seconds=rng.randint(1, 60))
+        history.append(
+            {
+                "charging_point_id": f"replay-cp-{point}",
+                "status": rng.choice(STATUSES),
+                "observed_at": clocks[point].isoformat(),
+            }
+        )
+    return history
+
+
+def expected_state(history: list[dict]) -> dict[str, str]:
+    return {event["charging_point_id"]: event["status"] for event in history}
+
+
+def deliveries(
+    history: list[dict], batch_size: int, duplicate_rate: float, rng: random.Random
+) -> list[bytes]:
+    """Shuffled batches, some of them delivered twice"""
+    batches = [history[i : i + batch_size] for i in range(0, len(history), batch_size)]
+    batches += [b for b in batches if rng.random() < duplicate_rate]
+    rng.shuffle(batches)
+    return [json.dumps({"events": batch}).encode() for batch in batches]
+
+
+async def deliver(args, bodies: list[bytes]) -> tuple[int, int]:
+    queue: asyncio.Queue[bytes] = asyncio.Queue()
+    for body in bodies:
+        queue.put_nowait(body)
+    applied = failed = 0
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal applied, failed
+        while not queue.empty():
+            body = queue.get_nowait()
+            response = await client.post(
+                "/internal/charging-points/status",
+                content=body,
+                headers={
+                    "Content-Type": "application/json",
+                    "X-Signature": sign(body, args.secret),
+                },
+            )
+            if response.status_code == 200:
+                applied += response.json()["applied"]
+            else:
+                failed += 1
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=30.0) as client:
+        await asyncio.gather(*(worker(client) for _ in range(args.concurrency)))
+    return applied, failed
+
+
+def stored_state(ids: list[str]) -> dict[str, str]:
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(
+                ChargingPointStatus.charging_point_id, ChargingPointStatus.status
+            ).where(ChargingPointStatus.charging_point_id.in_(ids))
+        ).all()
+    return dict(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8080")
+    parser.add_argument(
+        "--secret", default=os.getenv("CHARGING_POINT_WEBHOOK_SECRET", "")
+    )
+    parser.add_argument("--points", type=int, default=500)
+    parser.add_argument("--events", type=int, default=50_000)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--duplicate-rate", type=float, default=0.1)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    if not args.secret:
+        parser.error("--secret or CHARGING_POINT_WEBHOOK_SECRET is required")
+
+    rng = random.Random(args.seed)
+    history = generate_events(args.points, args.events, rng)
+    bodies = deliveries(history, args.batch_size, args.duplicate_rate, rng)
+
+    start = time.perf_counter()
+    applied, failed = asyncio.run(deliver(args, bodies))
+    elapsed = time.perf_counter() - start
+
+    expected = expected_state(history)
+    stored = stored_state(list(expected))
+    mismatches = {
+        point: (status, stored.get(point))
+        for point, status in expected.items()
+        if stored.get(point) != status
+    }
+
+    print(
+        f"{len(bodies)} batches, {sum(len(json.loads(b)['events']) for b in bodies)} "
+        f"events in {elapsed:.2f}s ({len(history) / elapsed:.0f} events/s), "
+        f"{applied} applied, {failed} failed batches"
+    )
+    for point, (want, got) in sorted(mismatches.items()):
+        print(f"  {point}: expected {want}, stored {got}")
+    if mismatches or failed:
+        sys.exit(1)
+    print(f"All {len(expected)} charging points hold their newest status")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Compare utilisation reads from the hourly rollup with raw reservation scans.
+
+Rebuilds the rollup over the seeded reservations (timing the rebuild, and a
+second run to show it is idempotent), then answers the same random
+utilisation queries both ways. Every answer must match; mismatches are printed
+and the exit code is 1. Seed a few million rows first, for example:
+
+    python -m benchmarks.seed --reset --users 100000 --reservations-per-user 30
+    python -m benchmarks.utilisation --queries 200 --output utilisation.json
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import timedelta
+
+from sqlalchemy import func, select
+
+from src.database import SessionLocal
+from src.models.reservation import Reservation
+from src.services.usage import Granularity, hour_window, usage_rollup
+
+
+def raw_scan(db, charging_point_id, start, end, granularity) -> dict:
+    """Utilisation straight from reservations, the way an ad-hoc query would"""
+    hours = usage_rollup.reservation_hours(start, end, charging_point_id).subquery()
+    bucket = func.date_trunc(granularity.value, hours.c.hour, "UTC")
+    rows = db.execute(
+        select(
+            bucket.label("bucket"),
+            func.sum(hours.c.reservations_started),
+            func.sum(hours.c.reserved_seconds),
+        ).group_by(bucket)
+    ).all()
+    return {row[0]: (row[1], row[2]) for row in rows}
+
+
+def from_rollup(db, charging_point_id, start, end, granularity) -> dict:
+    return {
+        bucket.start: (bucket.reservations_started, bucket.reserved_seconds)
+        for bucket in usage_rollup.utilisation(
+            db, charging_point_id, start, end, granularity
+        )
+        if bucket.reservations_started or bucket.reserved_seconds
+    }
+
+
+def timed(fn, *args) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def summarise(durations: list[float]) -> dict:
+    ordered = sorted(durations)
+    return {
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 2),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 2),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1] * 1000, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--range-days", type=int, default=30)
+    parser.add_argument(
+        "--granularity", choices=[g.value for g in Granularity], default="day"
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="utilisation.json")
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    granularity = Granularity(args.granularity)
+
+    with SessionLocal() as db:
+        reservations, first, last = db.execute(
+            select(
+                func.count(),
+                func.min(Reservation.start_time),
+                func.max(Reservation.end_time),
+            )
+        ).one()
+        if not reservations:
+            sys.exit("No reservations, run benchmarks.seed first")
+        charging_points = db.scalars(
+            select(Reservation.charging_point_id).distinct()
+        ).all()
+        window = hour_window(first, last)
+
+        rebuild_seconds, hours = timed(usage_rollup.rebuild, db, *window)
+        rerun_seconds, _ = timed(usage_rollup.rebuild, db, *window)
+        print(
+            f"Rebuilt {hours} hours from {reservations} reservations in "
+            f"{rebuild_seconds:.1f}s (rerun {rerun_seconds:.1f}s)"
+        )
+
+        span = (window[1] - window[0]).total_seconds()
+        rollup_times, raw_times, mismatches = [], [], 0
+        for _ in range(args.queries):
+            charging_point_id = rng.choice(charging_points)
+            start = window[0] + timedelta(seconds=rng.uniform(0, span))
+            start, end = hour_window(start, start + timedelta(days=args.range_days))
+            query = (db, charging_point_id, start, end, granularity)
+
+            raw_time, raw = timed(raw_scan, *query)
+            rollup_time, rolled_up = timed(from_rollup, *query)
+            raw_times.append(raw_time)
+            rollup_times.append(rollup_time)
+            if raw != rolled_up:
+                mismatches += 1
+                print(f"  mismatch for {charging_point_id} from {start.isoformat()}")
+
+    report = {
+        "reservations": reservations,
+        "rollup_hours": hours,
+        "rebuild_s": round(rebuild_seconds, 2),
+        "rebuild_rerun_s": round(rerun_seconds, 2),
+        "queries": args.queries,
+        "range_days": args.range_days,
+        "granularity": granularity.value,
+        "raw_scan": summarise(raw_times),
+        "rollup": summarise(rollup_times),
+        "mismatches": mismatches,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(
+        f"raw scan p50 {report['raw_scan']['p50_ms']} ms, "
+        f"rollup p50 {report['rollup']['p50_ms']} ms"
+    )
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Measure how throughput scales with the number of server workers.
+
+Starts `python -m src.server` once per worker count and runs a scenario from
+`benchmarks.run` against it. Needs the database, seed data and fake upstreams
+from benchmarks/README.md; the server inherits the current environment.
+
+    python -m benchmarks.worker_scaling --workers 1 2 4 --output scaling.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.run import SCENARIOS, parse_args, run_scenario
+
+
+def wait_until_healthy(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not become healthy")
+
+
+def measure(workers: int, scenario: str, run_args: argparse.Namespace) -> dict:
+    port = run_args.base_url.rsplit(":", 1)[-1]
+    env = {**os.environ, "WEB_CONCURRENCY": str(workers), "PORT": port}
+    server = subprocess.Popen([sys.executable, "-m", "src.server"], env=env)
+    try:
+        wait_until_healthy(run_args.base_url)
+        return asyncio.run(run_scenario(scenario, run_args))
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="list_heavy")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--output", default="worker_scaling.json")
+    args = parser.parse_args()
+
+    run_args = parse_args(
+        [
+            f"--base-url=http://127.0.0.1:{args.port}",
+            f"--duration={args.duration}",
+            f"--concurrency={args.concurrency}",
+        ]
+    )
+
+    results = {}
+    for workers in args.workers:
+        summary = measure(workers, args.scenario, run_args)
+        results[str(workers)] = summary
+        print(
+            f"{workers:3d} workers  {summary['throughput_rps']:9.1f} req/s  "
+            f"p99 {summary['latency_ms']['p99']} ms"
+        )
+
+    with open(args.output, "w") as f:
+        json.dump({"scenario": args.scenario, "workers": results}, f, indent=2)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
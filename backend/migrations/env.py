@@ -5,7 +5,19 @@ from alembic import context
 from sqlalchemy import engine_from_config, pool
 
 from src.database import Base
-from src.models import car, reservation, user  # noqa
+from src.models import (  # noqa
+    car,
+    charging_point_move,
+    charging_point_shard,
+    charging_point_status,
+    charging_point_usage,
+    idempotency_key,
+    outbox_event,
+    reservation,
+    reservation_series,
+    user,
+    waitlist_entry,
+)
 
 SQLALCHEMY_URL = os.environ.get("DATABASE_URL")
 
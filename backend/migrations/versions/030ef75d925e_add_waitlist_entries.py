@@ -0,0 +1,69 @@
+"""Add waitlist entries
+
+Revision ID: 030ef75d925e
+Revises: ee333b49cfde
+Create Date: 2026-10-19 18:27:13.581204
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "030ef75d925e"
+down_revision: Union[str, Sequence[str], None] = "ee333b49cfde"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "waitlist_entries",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("charging_point_id", sa.String(), nullable=False),
+        sa.Column("start_time", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("end_time", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "status",
+            sa.Enum("waiting", "booked", "expired", "withdrawn", name="waitliststatus"),
+            nullable=False,
+        ),
+        sa.Column("requested_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("user_id", sa.UUID(), nullable=False),
+        sa.Column("car_id", sa.UUID(), nullable=False),
+        sa.Column("reservation_id", sa.UUID(), nullable=True),
+        sa.CheckConstraint("start_time < end_time", name="check_valid_waitlist_range"),
+        sa.ForeignKeyConstraint(["car_id"], ["cars.id"]),
+        sa.ForeignKeyConstraint(["reservation_id"], ["reservations.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_waitlist_entries_user_id"),
+        "waitlist_entries",
+        ["user_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_waitlist_entries_waiting",
+        "waitlist_entries",
+        ["charging_point_id", "requested_at"],
+        unique=False,
+        postgresql_where=sa.text("status = 'waiting'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_waitlist_entries_waiting",
+        table_name="waitlist_entries",
+        postgresql_where=sa.text("status = 'waiting'"),
+    )
+    op.drop_index(op.f("ix_waitlist_entries_user_id"), table_name="waitlist_entries")
+    op.drop_table("waitlist_entries")
+    sa.Enum(name="waitliststatus").drop(op.get_bind(), checkfirst=True)
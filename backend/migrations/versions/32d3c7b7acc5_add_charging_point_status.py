@@ -0,0 +1,35 @@
+"""Add charging point status
+
+Revision ID: 32d3c7b7acc5
+Revises: e1188a445338
+Create Date: 2026-10-19 14:37:52.604118
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "32d3c7b7acc5"
+down_revision: Union[str, Sequence[str], None] = "e1188a445338"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "charging_point_status",
+        sa.Column("charging_point_id", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("observed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("charging_point_id"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("charging_point_status")
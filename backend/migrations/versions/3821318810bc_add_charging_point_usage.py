@@ -0,0 +1,39 @@
+"""Add charging point usage
+
+Revision ID: 3821318810bc
+Revises: 32d3c7b7acc5
+Create Date: 2026-10-19 15:24:09.518337
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3821318810bc"
+down_revision: Union[str, Sequence[str], None] = "32d3c7b7acc5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "charging_point_usage",
+        sa.Column("charging_point_id", sa.String(), nullable=False),
+        sa.Column("hour", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "reservations_started", sa.Integer(), server_default="0", nullable=False
+        ),
+        sa.Column("reserved_seconds", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("occupied_seconds", sa.Integer(), server_default="0", nullable=False),
+        sa.PrimaryKeyConstraint("charging_point_id", "hour"),
+    )
+    # Existing reservations are rolled up with `python -m src.services.usage`
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("charging_point_usage")
@@ -0,0 +1,31 @@
+"""Add user cache version
+
+Revision ID: 6c5cfdd6e681
+Revises: b7e2e6d49673
+Create Date: 2026-10-19 11:12:40.381574
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "6c5cfdd6e681"
+down_revision: Union[str, Sequence[str], None] = "b7e2e6d49673"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "users",
+        sa.Column("cache_version", sa.Integer(), server_default="0", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "cache_version")
@@ -0,0 +1,60 @@
+"""Add car connector mask
+
+Revision ID: 7e327169614c
+Revises: 2d4a1442887a
+Create Date: 2026-10-19 09:12:41.502113
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7e327169614c"
+down_revision: Union[str, Sequence[str], None] = "2d4a1442887a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# connectortype labels are the enum member names, as SQLAlchemy persists them
+CONNECTOR_MASK_EXPRESSION = (
+    "(CASE WHEN 'TYPE_2' = ANY(connector_types) THEN 1 ELSE 0 END)"
+    " | (CASE WHEN 'SCHUKO' = ANY(connector_types) THEN 2 ELSE 0 END)"
+    " | (CASE WHEN 'CCS' = ANY(connector_types) THEN 4 ELSE 0 END)"
+    " | (CASE WHEN 'CHADEMO' = ANY(connector_types) THEN 8 ELSE 0 END)"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("cars", sa.Column("connector_mask", sa.SmallInteger(), nullable=True))
+
+    # Normalise existing rows to the canonical (deduplicated, sorted) form;
+    # member names sort in the same order as the values the API sorts by
+    op.execute(
+        """
+        UPDATE cars SET connector_types = ARRAY(
+            SELECT ct FROM (SELECT DISTINCT unnest(connector_types) AS ct) AS u
+            ORDER BY ct::text COLLATE "C"
+        )
+        """
+    )
+    op.execute(f"UPDATE cars SET connector_mask = {CONNECTOR_MASK_EXPRESSION}")
+
+    op.alter_column("cars", "connector_mask", nullable=False)
+    op.create_check_constraint(
+        "check_connector_mask_matches_types",
+        "cars",
+        f"connector_mask = ({CONNECTOR_MASK_EXPRESSION})",
+    )
+    op.create_index(
+        "ix_cars_user_id_connector_mask", "cars", ["user_id", "connector_mask"]
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_cars_user_id_connector_mask", table_name="cars")
+    op.drop_constraint("check_connector_mask_matches_types", "cars", type_="check")
+    op.drop_column("cars", "connector_mask")
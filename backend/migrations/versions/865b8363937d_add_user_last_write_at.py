@@ -0,0 +1,31 @@
+"""Add user last write time
+
+Revision ID: 865b8363937d
+Revises: 3821318810bc
+Create Date: 2026-10-19 16:02:11.518204
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "865b8363937d"
+down_revision: Union[str, Sequence[str], None] = "3821318810bc"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "users",
+        sa.Column("last_write_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "last_write_at")
@@ -0,0 +1,60 @@
+"""Add charging point shard overrides and moves
+
+Revision ID: ad855282e50e
+Revises: 030ef75d925e
+Create Date: 2026-10-19 19:12:44.270931
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "ad855282e50e"
+down_revision: Union[str, Sequence[str], None] = "030ef75d925e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "charging_point_shards",
+        sa.Column("charging_point_id", sa.String(), nullable=False),
+        sa.Column("shard", sa.String(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("charging_point_id"),
+    )
+    op.create_table(
+        "charging_point_moves",
+        sa.Column("charging_point_id", sa.String(), nullable=False),
+        sa.Column("shard", sa.String(), nullable=False),
+        sa.Column("moved_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("charging_point_id"),
+    )
+    # Reservations may live on a shard database
+    op.drop_constraint(
+        "waitlist_entries_reservation_id_fkey", "waitlist_entries", type_="foreignkey"
+    )
+    op.create_index(
+        "ix_reservations_user_id_start_time",
+        "reservations",
+        ["user_id", "start_time"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_reservations_user_id_start_time", table_name="reservations")
+    op.create_foreign_key(
+        "waitlist_entries_reservation_id_fkey",
+        "waitlist_entries",
+        "reservations",
+        ["reservation_id"],
+        ["id"],
+    )
+    op.drop_table("charging_point_moves")
+    op.drop_table("charging_point_shards")
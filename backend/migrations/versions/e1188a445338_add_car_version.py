@@ -0,0 +1,31 @@
+"""Add car version
+
+Revision ID: e1188a445338
+Revises: 6c5cfdd6e681
+Create Date: 2026-10-19 11:48:05.726190
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e1188a445338"
+down_revision: Union[str, Sequence[str], None] = "6c5cfdd6e681"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "cars",
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("cars", "version")
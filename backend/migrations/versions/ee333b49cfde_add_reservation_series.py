@@ -0,0 +1,79 @@
+"""Add reservation series
+
+Revision ID: ee333b49cfde
+Revises: 865b8363937d
+Create Date: 2026-10-19 17:41:52.904716
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "ee333b49cfde"
+down_revision: Union[str, Sequence[str], None] = "865b8363937d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "reservation_series",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("rrule", sa.String(), nullable=False),
+        sa.Column("timezone", sa.String(), nullable=False),
+        sa.Column("first_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("duration_minutes", sa.Integer(), nullable=False),
+        sa.Column("expanded_until", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "status",
+            sa.Enum("active", "finished", "cancelled", name="seriesstatus"),
+            nullable=False,
+        ),
+        sa.Column("charging_point_id", sa.String(), nullable=False),
+        sa.Column("user_id", sa.UUID(), nullable=False),
+        sa.Column("car_id", sa.UUID(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["car_id"], ["cars.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_reservation_series_user_id"),
+        "reservation_series",
+        ["user_id"],
+        unique=False,
+    )
+    op.add_column("reservations", sa.Column("series_id", sa.UUID(), nullable=True))
+    op.create_foreign_key(
+        "reservations_series_id_fkey",
+        "reservations",
+        "reservation_series",
+        ["series_id"],
+        ["id"],
+    )
+    op.create_index(
+        "ix_reservations_charging_point_id_start_time",
+        "reservations",
+        ["charging_point_id", "start_time"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_reservations_charging_point_id_start_time", table_name="reservations"
+    )
+    op.drop_constraint(
+        "reservations_series_id_fkey", "reservations", type_="foreignkey"
+    )
+    op.drop_column("reservations", "series_id")
+    op.drop_index(
+        op.f("ix_reservation_series_user_id"), table_name="reservation_series"
+    )
+    op.drop_table("reservation_series")
+    sa.Enum(name="seriesstatus").drop(op.get_bind(), checkfirst=True)
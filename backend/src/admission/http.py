@@ -0,0 +1,81 @@
+from time import perf_counter
+from typing import AsyncIterator, Callable
+
+import httpx
+
+from src.admission.limits import ConcurrencyLimiter, Limits, Overloaded
+from src.admission.middleware import ADMISSION_CONTROL_ENABLED
+from src.instrumentation.http import InstrumentedTransport
+from src.instrumentation.metrics import UPSTREAM_CALLS_SHED
+
+# One limiter per upstream and worker, shared by every client that calls it.
+# Configured through UPSTREAM_<NAME>_CONCURRENCY and _QUEUE_BUDGET_MS.
+_upstream_limiters: dict[str, ConcurrencyLimiter] = {}
+
+
+def upstream_limiter(upstream: str) -> ConcurrencyLimiter:
+    limiter = _upstream_limiters.get(upstream)
+    if limiter is None:
+        limits = Limits.from_env(f"UPSTREAM_{upstream.upper()}")
+        limiter = _upstream_limiters[upstream] = ConcurrencyLimiter(
+            limits.concurrency, limits.queue_budget
+        )
+    return limiter
+
+
+class SlotReleasingStream(httpx.AsyncByteStream):
+    """Response body that calls `release` once, when it is closed"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self.stream = stream
+        self.release = release
+        self.released = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self.stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self.stream.aclose()
+        finally:
+            if not self.released:
+                self.released = True
+                self.release()
+
+
+class BoundedTransport(InstrumentedTransport):
+    """Instrumented transport that bounds concurrent calls per upstream.
+
+    A call holds its slot until its response is closed. Calls that cannot
+    get a slot within the queue budget raise `Overloaded`, which reaches the
+    client as 503 with `Retry-After`.
+    """
+
+    def __init__(
+        self, upstream: str, enabled: bool = ADMISSION_CONTROL_ENABLED, **kwargs
+    ):
+        super().__init__(upstream, **kwargs)
+        self.limiter = upstream_limiter(upstream) if enabled else None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self.limiter is None:
+            return await super().handle_async_request(request)
+        try:
+            await self.limiter.acquire()
+        except Overloaded:
+            UPSTREAM_CALLS_SHED.inc(self.upstream)
+            raise
+
+        start = perf_counter()
+        try:
+            response = await super().handle_async_request(request)
+        except BaseException:
+            self.limiter.release(perf_counter() - start)
+            raise
+        # The connection stays busy until the body is read, so the slot is
+        # only given back when the response is closed
+        response.stream = SlotReleasingStream(
+            response.stream, lambda: self.limiter.release(perf_counter() - start)
+        )
+        return response
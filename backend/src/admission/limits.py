@@ -0,0 +1,174 @@
+import asyncio
+import math
+import os
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from time import monotonic, perf_counter
+
+from fastapi import HTTPException, status
+
+# Clients tracked per rate limiter; the least recently seen are forgotten first
+MAX_TRACKED_CLIENTS = int(os.getenv("ADMISSION_MAX_TRACKED_CLIENTS", "100000"))
+
+
+@dataclass(frozen=True, slots=True)
+class Limits:
+    rate: float  # tokens per second per client, 0 for no rate limit
+    burst: int
+    concurrency: int  # requests handled at once, further ones queue
+    queue_budget: float  # seconds a request may queue before it is shed
+
+    @classmethod
+    def from_env(
+        cls,
+        prefix: str,
+        rate: float = 0.0,
+        burst: int = 1,
+        concurrency: int = 64,
+        queue_budget_ms: int = 1000,
+    ) -> "Limits":
+        """Read `<prefix>_RATE`, `_BURST`, `_CONCURRENCY` and `_QUEUE_BUDGET_MS`"""
+        return cls(
+            rate=float(os.getenv(f"{prefix}_RATE", rate)),
+            burst=int(os.getenv(f"{prefix}_BURST", burst)),
+            concurrency=int(os.getenv(f"{prefix}_CONCURRENCY", concurrency)),
+            queue_budget=int(os.getenv(f"{prefix}_QUEUE_BUDGET_MS", queue_budget_ms))
+            / 1000,
+        )
+
+
+def retry_after(seconds: float) -> dict[str, str]:
+    return {"Retry-After": str(max(1, math.ceil(seconds)))}
+
+
+class Overloaded(HTTPException):
+    """Raised when a request or upstream call is shed"""
+
+    def __init__(self, detail: str, retry_in: float):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers=retry_after(retry_in),
+        )
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated_at")
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated_at = now
+
+
+class RateLimiter:
+    """Token bucket per client key"""
+
+    def __init__(self, rate: float, burst: int, max_clients: int = MAX_TRACKED_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+
+    def acquire(self, client: str, now: float | None = None) -> float:
+        """Take a token; returns 0 if admitted, else seconds until one is free"""
+        if self.rate <= 0:
+            return 0.0
+        now = monotonic() if now is None else now
+
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.burst, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+            elapsed = now - bucket.updated_at
+            bucket.tokens = min(self.burst, bucket.tokens + elapsed * self.rate)
+            bucket.updated_at = now
+
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return 0.0
+        return (1 - bucket.tokens) / self.rate
+
+
+class ConcurrencyLimiter:
+    """Bounded concurrency with a FIFO queue and queue-time-aware shedding.
+
+    A request that finds every slot busy is shed straight away when the queue
+    ahead of it, at the recent average service time, would take longer than
+    the queue budget. Otherwise it waits, and is shed if no slot frees up
+    within the budget. Shedding early keeps the requests that are admitted
+    within their latency budget instead of slowing everyone down.
+    """
+
+    # Weight of the latest sample in the service time average
+    SMOOTHING = 0.2
+
+    def __init__(self, limit: int, queue_budget: float):
+        self.limit = limit
+        self.queue_budget = queue_budget
+        self.in_flight = 0
+        self.service_time = 0.0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    def expected_wait(self) -> float:
+        """Estimated queueing time for a request arriving now"""
+        if self.in_flight < self.limit and not self._waiters:
+            return 0.0
+        return (len(self._waiters) + 1) / self.limit * self.service_time
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold a slot for the duration of the block; yields the time queued"""
+        waited = await self.acquire()
+        start = perf_counter()
+        try:
+            yield waited
+        finally:
+            self.release(perf_counter() - start)
+
+    async def acquire(self) -> float:
+        """Wait for a slot; returns the time queued or raises `Overloaded`"""
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return 0.0
+
+        expected = self.expected_wait()
+        if expected > self.queue_budget:
+            raise Overloaded("Server is overloaded, queue is full", expected)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        start = perf_counter()
+        try:
+            async with asyncio.timeout(self.queue_budget):
+                await waiter
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up, pass it on
+                self.release()
+            else:
+                waiter.cancel()
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            if isinstance(e, TimeoutError):
+                raise Overloaded(
+                    "Server is overloaded, timed out waiting in queue",
+                    self.expected_wait() or self.queue_budget,
+                ) from None
+            raise
+        return perf_counter() - start
+
+    def release(self, service_time: float | None = None) -> None:
+        """Free a slot, folding how long it was held into the average"""
+        if service_time is not None:
+            self.service_time += self.SMOOTHING * (service_time - self.service_time)
+        # Hand the slot directly to the next waiter so nobody can jump the queue
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
@@ -0,0 +1,167 @@
+"""Admission control for API requests.
+
+Every route template has its own limits: a token bucket per client (the
+bearer token, or the client address for logins and anonymous calls) and a
+bounded number of requests in progress; see `ConcurrencyLimiter` for how the
+queue in front of it sheds load. So a hot endpoint exhausts its own limits
+without starving its siblings. Clients over their rate get 429, shed requests
+get 503, both with `Retry-After`.
+
+Enable it with `ADMISSION_CONTROL_ENABLED=true`. The size of the limits
+depends on the route's class, read from `ADMISSION_<CLASS>_RATE`, `_BURST`,
+`_CONCURRENCY` and `_QUEUE_BUDGET_MS`. They apply per worker process.
+"""
+
+import hashlib
+import os
+from time import perf_counter
+
+from starlette.responses import JSONResponse
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.admission.limits import (
+    ConcurrencyLimiter,
+    Limits,
+    Overloaded,
+    RateLimiter,
+    retry_after,
+)
+from src.instrumentation.metrics import ADMISSION_DECISIONS, ADMISSION_QUEUE_WAIT
+
+ADMISSION_CONTROL_ENABLED = (
+    os.getenv("ADMISSION_CONTROL_ENABLED", "false").lower() == "true"
+)
+
+API_PREFIX = "/api/v1"
+
+# Limits of each route in the class; every route gets its own
+ROUTE_LIMITS = {
+    # Logins and token refreshes call DummyJSON, limited per client address
+    "login": Limits.from_env(
+        "ADMISSION_LOGIN", rate=5, burst=20, concurrency=32, queue_budget_ms=2000
+    ),
+    # Reservation writes, which also call the charging-points service
+    "reservations": Limits.from_env(
+        "ADMISSION_RESERVATIONS",
+        rate=2,
+        burst=10,
+        concurrency=32,
+        queue_budget_ms=1000,
+    ),
+    # Every GET and HEAD under the API
+    "reads": Limits.from_env(
+        "ADMISSION_READS", rate=20, burst=60, concurrency=128, queue_budget_ms=500
+    ),
+    # Any other API write
+    "writes": Limits.from_env(
+        "ADMISSION_WRITES", rate=5, burst=20, concurrency=32, queue_budget_ms=1000
+    ),
+}
+
+
+def route_class(method: str, path: str) -> str | None:
+    """Route class of a request, or None for requests that are never limited"""
+    if not path.startswith(API_PREFIX):
+        return None
+    if path.startswith((f"{API_PREFIX}/auth/login", f"{API_PREFIX}/auth/refresh")):
+        return "login"
+    if method in ("GET", "HEAD"):
+        return "reads"
+    if path.startswith(f"{API_PREFIX}/reservations"):
+        return "reservations"
+    return "writes"
+
+
+def match_route(scope: Scope) -> str:
+    """Path template of the route the request will be routed to.
+
+    Admission runs before routing, so this repeats the router's matching.
+    """
+    router = getattr(scope.get("app"), "router", None)
+    partial = None
+    for route in getattr(router, "routes", ()):
+        match, _ = route.matches(scope)
+        if match is Match.FULL:
+            return route.path
+        if match is Match.PARTIAL and partial is None:
+            # Wrong method, answered with 405 by that route
+            partial = route.path
+    return partial or "unmatched"
+
+
+def client_key(scope: Scope, by_address: bool = False) -> str:
+    """Rate limit key: a digest of the bearer token, else the client address"""
+    if not by_address:
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                return hashlib.blake2b(value, digest_size=16).hexdigest()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class AdmissionMiddleware:
+    """Rate limit and shed API requests per route while enabled"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        enabled: bool = ADMISSION_CONTROL_ENABLED,
+        limits: dict[str, Limits] = ROUTE_LIMITS,
+    ):
+        self.app = app
+        self.enabled = enabled
+        self.limits = limits
+        # Route template -> limiter, created on the route's first request
+        self.rate_limiters: dict[str, RateLimiter] = {}
+        self.concurrency: dict[str, ConcurrencyLimiter] = {}
+
+    def limiters(self, name: str, route: str) -> tuple[RateLimiter, ConcurrencyLimiter]:
+        if route not in self.concurrency:
+            limit = self.limits[name]
+            self.rate_limiters[route] = RateLimiter(limit.rate, limit.burst)
+            self.concurrency[route] = ConcurrencyLimiter(
+                limit.concurrency, limit.queue_budget
+            )
+        return self.rate_limiters[route], self.concurrency[route]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        name = route_class(scope["method"], scope["path"])
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        route = match_route(scope)
+        rate_limiter, limiter = self.limiters(name, route)
+        wait = rate_limiter.acquire(client_key(scope, by_address=name == "login"))
+        if wait:
+            ADMISSION_DECISIONS.inc(name, route, "rate_limited")
+            response = JSONResponse(
+                {"detail": "Too many requests"},
+                status_code=429,
+                headers=retry_after(wait),
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            waited = await limiter.acquire()
+        except Overloaded as e:
+            ADMISSION_DECISIONS.inc(name, route, "shed")
+            response = JSONResponse(
+                {"detail": e.detail}, status_code=e.status_code, headers=e.headers
+            )
+            await response(scope, receive, send)
+            return
+
+        ADMISSION_DECISIONS.inc(name, route, "admitted")
+        ADMISSION_QUEUE_WAIT.observe(waited, name, route)
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(perf_counter() - start)
@@ -1,15 +1,55 @@
+import os
+from time import perf_counter
+
 import httpx
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from src.database import get_db
+from src import queries
+from src.database import get_db, replicas
+from src.instrumentation.context import request_stats
 from src.models.user import User
+from src.services.tokens import TokenUser, token_cache
+from src.services.upstreams import upstream_clients
+
+DUMMYJSON_URL = os.getenv("DUMMYJSON_URL", "https://dummyjson.com")
+upstream_clients.register("dummyjson", DUMMYJSON_URL, verify=False)
 
 security = HTTPBearer(auto_error=False)
 
 
+async def validate_token(token: str) -> TokenUser:
+    """Validate an access token with DummyJSON, caching the result"""
+    token_user = token_cache.get(token)
+    if token_user is not None:
+        return token_user
+
+    response = await upstream_clients.client("dummyjson").get(
+        f"{DUMMYJSON_URL}/auth/me",
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=10.0,
+    )
+
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token",
+        )
+
+    user_data = response.json()
+    external_user_id = user_data.get("id")
+
+    if not external_user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload"
+        )
+
+    token_user = TokenUser(external_user_id, user_data.get("username"))
+    token_cache.set(token, token_user)
+    return token_user
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db),
@@ -22,32 +62,16 @@ async def get_current_user(
                 detail="Authorization header required",
             )
 
-        token = credentials.credentials
-
-        # Verify token with DummyJSON API
-        async with httpx.AsyncClient(verify=False, timeout=10.0) as client:
-            response = await client.get(
-                "https://dummyjson.com/auth/me",
-                headers={"Authorization": f"Bearer {token}"},
-            )
-
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid or expired token",
-            )
-
-        user_data = response.json()
-        external_user_id = user_data.get("id")
-
-        if not external_user_id:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload"
-            )
+        start = perf_counter()
+        token_user = await validate_token(credentials.credentials)
+        stats = request_stats.get()
+        if stats is not None:
+            stats.auth_seconds += perf_counter() - start
 
         # Get user from your database
-        stmt = select(User).where(User.external_user_id == external_user_id)
-        user = db.scalars(stmt).first()
+        user = db.scalars(
+            queries.user_by_external_id(token_user.external_user_id)
+        ).first()
 
         if not user:
             raise HTTPException(
@@ -67,3 +91,17 @@ async def get_current_user(
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Token validation failed"
         )
+
+
+async def get_read_db(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> Session:
+    """Request session for read-only routes.
+
+    Its reads go to a replica that has applied the user's last write, or to
+    the primary if there is none. The user itself is always loaded from the
+    primary, so its last write time is current.
+    """
+    replicas.route_reads(db, current_user.last_write_at)
+    return db
@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi import Response, status
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def version_etag(version: int) -> str:
+    """Strong ETag from an integer row version"""
+    return f'"{version}"'
+
+
+def timestamp_etag(updated_at: datetime) -> str:
+    """Strong ETag from a modification time, exact to the microsecond"""
+    return f'"{(updated_at - EPOCH) // timedelta(microseconds=1)}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an If-None-Match header matches the current ETag.
+
+    Uses weak comparison, as RFC 9110 requires for If-None-Match.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def precondition_failed(if_match: str | None, etag: str) -> bool:
+    """Whether an If-Match header rules out changing the current version.
+
+    Uses strong comparison, as RFC 9110 requires for If-Match. Without the
+    header the change is unconditional.
+    """
+    if not if_match or if_match.strip() == "*":
+        return False
+    return etag not in (candidate.strip() for candidate in if_match.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+from src.services.usage import Granularity
+
+
+class UtilisationBucket(BaseModel):
+    start: datetime = Field(description="Start of the bucket, in UTC")
+    reservations_started: int
+    reserved_seconds: int
+    occupied_seconds: int
+    reserved_ratio: float = Field(
+        description="Share of the bucket covered by reservations"
+    )
+    occupied_ratio: float = Field(
+        description="Share of the bucket the charging point reported as occupied"
+    )
+
+
+class UtilisationResponse(BaseModel):
+    charging_point_id: str
+    granularity: Granularity
+    start: datetime
+    end: datetime
+    buckets: list[UtilisationBucket]
@@ -14,6 +14,10 @@ class LoginRequest(BaseModel):
     password: str
 
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
 class LoginResponse(BaseModel):
     access_token: str
     refresh_token: str
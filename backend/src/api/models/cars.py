@@ -1,4 +1,4 @@
-from pydantic import UUID4, BaseModel, ConfigDict, Field, model_validator
+from pydantic import UUID4, BaseModel, ConfigDict, Field
 
 from src.models.car import ConnectorType
 
@@ -18,13 +18,6 @@ class CarResponse(BaseModel):
     max_kw_ac: int = Field(gt=0, description="Maximum AC charging power in kW")
     max_kw_dc: int = Field(gt=0, description="Maximum DC charging power in kW")
 
-    @model_validator(mode="after")
-    def sort_connector_types(self) -> "CarResponse":
-        if self.connector_types:
-            unique_types = list(set(self.connector_types))
-            self.connector_types = sorted(unique_types, key=lambda x: x.value)
-        return self
-
 
 class CarCreateRequest(BaseModel):
     name: str = Field(min_length=1, max_length=120, description="Car name")
@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+
+from src.services.charging_point import ChargingPointStatusEvent
+
+
+class ChargingPointStatusBatch(BaseModel):
+    events: list[ChargingPointStatusEvent] = Field(min_length=1, max_length=1000)
+
+
+class ChargingPointStatusBatchResponse(BaseModel):
+    received: int
+    applied: int
@@ -1,8 +1,20 @@
 from datetime import datetime
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from pydantic import UUID4, BaseModel, ConfigDict, Field, model_validator
+from pydantic import (
+    UUID4,
+    AwareDatetime,
+    BaseModel,
+    ConfigDict,
+    Field,
+    field_validator,
+    model_validator,
+)
 
 from src.models.reservation import ReservationStatus
+from src.models.reservation_series import SeriesStatus
+from src.models.waitlist_entry import WaitlistStatus
+from src.services.recurrence import Recurrence
 
 
 class ReservationBase(BaseModel):
@@ -33,3 +45,96 @@ class ReservationResponse(ReservationBase):
     car_id: UUID4
     created_at: datetime
     updated_at: datetime
+
+
+class ReservationSeriesCreateRequest(BaseModel):
+    car_id: UUID4 = Field(description="ID of the car to charge")
+    charging_point_id: str = Field(description="External charging point ID")
+    first_start: AwareDatetime = Field(description="Start of the first occurrence")
+    duration_minutes: int = Field(
+        ge=15, le=720, description="Length of each occurrence"
+    )
+    rrule: str = Field(
+        description="Recurrence rule, e.g. FREQ=WEEKLY;BYDAY=MO,WE,FR;COUNT=12",
+        max_length=255,
+    )
+    timezone: str = Field(
+        default="UTC",
+        description="IANA time zone in which occurrences keep their wall-clock time",
+    )
+
+    @field_validator("rrule")
+    @classmethod
+    def validate_rrule(cls, value: str) -> str:
+        return str(Recurrence.parse(value))
+
+    @field_validator("timezone")
+    @classmethod
+    def validate_timezone(cls, value: str) -> str:
+        try:
+            ZoneInfo(value)
+        except (ValueError, ZoneInfoNotFoundError):
+            raise ValueError(f"Unknown time zone {value!r}")
+        return value
+
+
+class TimeWindowResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    start: datetime
+    end: datetime
+
+
+class OccurrenceResponse(BaseModel):
+    start_time: datetime
+    end_time: datetime
+    reservation_id: UUID4 | None = Field(
+        description="The booked reservation, or null when the occurrence was skipped"
+    )
+    conflicts: list[TimeWindowResponse] = Field(
+        description="Existing reservations the skipped occurrence overlaps"
+    )
+
+
+class ReservationSeriesResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID4
+    rrule: str
+    timezone: str
+    first_start: datetime
+    duration_minutes: int
+    expanded_until: datetime
+    status: SeriesStatus
+    charging_point_id: str
+    user_id: UUID4
+    car_id: UUID4
+    created_at: datetime
+
+
+class ReservationSeriesCreateResponse(ReservationSeriesResponse):
+    occurrences: list[OccurrenceResponse] = Field(
+        description="Occurrences within the booking horizon"
+    )
+
+
+class WaitlistEntryCreateRequest(ReservationBase):
+    car_id: UUID4 = Field(description="ID of the car to charge")
+    charging_point_id: str = Field(description="External charging point ID")
+
+
+class WaitlistEntryResponse(ReservationBase):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID4
+    start_time: datetime
+    end_time: datetime
+    status: WaitlistStatus
+    charging_point_id: str
+    user_id: UUID4
+    car_id: UUID4
+    reservation_id: UUID4 | None = Field(
+        description="The reservation made once the window freed up"
+    )
+    requested_at: datetime
+    updated_at: datetime
@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 
+from src.api.routes.analytics import router as analytics_router
 from src.api.routes.auth import router as auth_router
 from src.api.routes.cars import router as cars_router
 from src.api.routes.reservations import router as reservations_router
@@ -23,3 +24,4 @@ router = APIRouter(
 router.include_router(auth_router)
 router.include_router(cars_router)
 router.include_router(reservations_router)
+router.include_router(analytics_router)
@@ -0,0 +1,56 @@
+"""Operator endpoints, mounted outside the versioned API.
+
+Authenticated with the profiling token: `X-Profile: <PROFILE_TOKEN>`.
+"""
+
+import io
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import FileResponse, PlainTextResponse
+
+from src.instrumentation.profiling import profiler
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+def require_profile_token(x_profile: str | None = Header(default=None)) -> None:
+    if profiler.token is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Profiling is not configured",
+        )
+    if not profiler.authorised(x_profile):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid profile token"
+        )
+
+
+@router.get("/profiles", dependencies=[Depends(require_profile_token)])
+async def list_profiles():
+    """Summaries of the stored request profiles, newest first"""
+    return profiler.summaries()
+
+
+@router.get("/profiles/{profile_id}", dependencies=[Depends(require_profile_token)])
+async def get_profile(
+    profile_id: str,
+    format: str = Query(default="prof", pattern="^(prof|text)$"),
+    limit: int = Query(default=50, gt=0, le=1000),
+):
+    """Download a profile as a pstats file, or its top functions as text"""
+    path = profiler.path(profile_id)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found"
+        )
+
+    if format == "prof":
+        return FileResponse(
+            path, media_type="application/octet-stream", filename=path.name
+        )
+
+    import pstats
+
+    output = io.StringIO()
+    pstats.Stats(str(path), stream=output).sort_stats("cumulative").print_stats(limit)
+    return PlainTextResponse(output.getvalue())
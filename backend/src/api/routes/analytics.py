@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import AwareDatetime
+from sqlalchemy.orm import Session
+
+from src.api.dependencies import get_current_user, get_read_db
+from src.api.models.analytics import UtilisationBucket, UtilisationResponse
+from src.instrumentation.query_watch import query_budget
+from src.models.user import User
+from src.services.usage import Granularity, hour_window, usage_rollup
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+MAX_RANGE = timedelta(days=366)
+
+
+@router.get(
+    "/charging-points/{charging_point_id}/utilisation",
+    response_model=UtilisationResponse,
+)
+@query_budget(statements=2)
+async def get_charging_point_utilisation(
+    charging_point_id: str,
+    start: AwareDatetime = Query(description="Start of the range"),
+    end: AwareDatetime = Query(description="End of the range, exclusive"),
+    granularity: Granularity = Granularity.HOUR,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    """Get reserved and occupied time of a charging point per hour, day or week"""
+    if end <= start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end must be after start",
+        )
+    if end - start > MAX_RANGE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range must not exceed {MAX_RANGE.days} days",
+        )
+
+    start, end = hour_window(start, end)
+    buckets = usage_rollup.utilisation(db, charging_point_id, start, end, granularity)
+
+    return UtilisationResponse(
+        charging_point_id=charging_point_id,
+        granularity=granularity,
+        start=start,
+        end=end,
+        buckets=[
+            UtilisationBucket(
+                start=bucket.start,
+                reservations_started=bucket.reservations_started,
+                reserved_seconds=bucket.reserved_seconds,
+                occupied_seconds=bucket.occupied_seconds,
+                reserved_ratio=round(bucket.reserved_seconds / bucket.seconds, 4),
+                occupied_ratio=round(bucket.occupied_seconds / bucket.seconds, 4),
+            )
+            for bucket in buckets
+        ],
+    )
@@ -2,41 +2,67 @@ import logging
 
 import httpx
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
-from src.api.dependencies import get_current_user
+from src import queries
+from src.api.dependencies import (
+    DUMMYJSON_URL,
+    get_current_user,
+    security,
+    validate_token,
+)
 from src.api.models.auth import (
     LoginRequest,
     LoginResponse,
+    RefreshRequest,
     UserResponse,
 )
 from src.database import get_db
 from src.models.user import User
+from src.services.tokens import TokenUser, token_cache
+from src.services.upstreams import upstream_clients
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
 logger = logging.getLogger(__name__)
 
+# Lifetime of issued access tokens
+TOKEN_EXPIRES_IN_MINUTES = 60
+
+
+def find_or_create_user(db: Session, external_user_id: int, username: str) -> User:
+    """Get the local user for a DummyJSON user, writing only if it is new or renamed"""
+    user = db.scalars(queries.user_by_external_id(external_user_id)).first()
+
+    if not user:
+        user = User(external_user_id=external_user_id, username=username)
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+    elif user.username != username:
+        user.username = username
+        db.commit()
+    return user
+
 
 @router.post("/login", response_model=LoginResponse)
 async def api_login(login_data: LoginRequest, db: Session = Depends(get_db)):
     """API endpoint for login"""
 
-    LOGIN_URL = "https://dummyjson.com/auth/login"
+    LOGIN_URL = f"{DUMMYJSON_URL}/auth/login"
 
     try:
         # Authenticate with DummyJSON
-        async with httpx.AsyncClient(verify=False) as client:
-            response = await client.post(
-                LOGIN_URL,
-                headers={"Content-Type": "application/json"},
-                json={
-                    "username": login_data.username,
-                    "password": login_data.password,
-                    "expiresInMins": 60,
-                },
-            )
+        response = await upstream_clients.client("dummyjson").post(
+            LOGIN_URL,
+            headers={"Content-Type": "application/json"},
+            json={
+                "username": login_data.username,
+                "password": login_data.password,
+                "expiresInMins": TOKEN_EXPIRES_IN_MINUTES,
+            },
+        )
 
         if response.status_code == 200:
             data = response.json()
@@ -51,23 +77,9 @@ async def api_login(login_data: LoginRequest, db: Session = Depends(get_db)):
                     detail="Invalid response from login service",
                 )
 
-            # Find or create user
-            stmt = select(User).where(User.external_user_id == external_user_id)
-            existing_user = db.scalars(stmt).first()
-
-            if not existing_user:
-                new_user = User(
-                    external_user_id=external_user_id, username=current_username
-                )
-                db.add(new_user)
-                db.commit()
-                db.refresh(new_user)
-                user = new_user
-            else:
-                if existing_user.username != current_username:
-                    existing_user.username = current_username
-                    db.commit()
-                user = existing_user
+            user = find_or_create_user(db, external_user_id, current_username)
+            # The client's next request uses this token, spare it the /auth/me call
+            token_cache.set(access_token, TokenUser(external_user_id, current_username))
 
             # Try to validate and catch the specific error
             try:
@@ -106,6 +118,73 @@ async def api_login(login_data: LoginRequest, db: Session = Depends(get_db)):
         )
 
 
+@router.post("/refresh", response_model=LoginResponse)
+async def api_refresh(
+    refresh_data: RefreshRequest,
+    credentials: HTTPAuthorizationCredentials | None = Depends(security),
+    db: Session = Depends(get_db),
+):
+    """Exchange a refresh token for new tokens without logging in again.
+
+    The access token being replaced, if sent as the bearer token, is no
+    longer accepted from the cache.
+    """
+
+    REFRESH_URL = f"{DUMMYJSON_URL}/auth/refresh"
+
+    try:
+        response = await upstream_clients.client("dummyjson").post(
+            REFRESH_URL,
+            headers={"Content-Type": "application/json"},
+            json={
+                "refreshToken": refresh_data.refresh_token,
+                "expiresInMins": TOKEN_EXPIRES_IN_MINUTES,
+            },
+        )
+
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired refresh token",
+            )
+
+        data = response.json()
+        access_token = data.get("accessToken")
+        refresh_token = data.get("refreshToken")
+
+        if not access_token or not refresh_token:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid response from login service",
+            )
+
+        if credentials is not None:
+            token_cache.discard(credentials.credentials)
+        # Validating the new token here also caches it for the next request
+        token_user = await validate_token(access_token)
+        user = find_or_create_user(db, token_user.external_user_id, token_user.username)
+
+        return LoginResponse(
+            access_token=access_token,
+            refresh_token=refresh_token,
+            user=UserResponse.model_validate(user),
+        )
+
+    except httpx.RequestError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Unable to connect to login service",
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Token refresh error: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Token refresh failed: {str(e)}",
+        )
+
+
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current user information"""
@@ -1,35 +1,90 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import TypeAdapter, ValidationError
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 
-from src.api.dependencies import get_current_user
+from src import queries
+from src.api.dependencies import get_current_user, get_read_db
+from src.api.etags import (
+    etag_matches,
+    not_modified,
+    precondition_failed,
+    version_etag,
+)
 from src.api.models.cars import CarCreateRequest, CarResponse
 from src.database import get_db
-from src.models.car import Car, ConnectorType
+from src.instrumentation.query_watch import query_budget
+from src.models.car import (
+    Car,
+    ConnectorType,
+    canonical_connector_types,
+    parse_connector_types,
+)
 from src.models.user import User
+from src.services.cache import read_cache
+from src.services.car_import import (
+    CAR_IMPORT_MAX_ROWS,
+    ImportFormat,
+    insert_cars,
+    read_rows,
+)
+from src.services.idempotency import idempotency_service
 
 router = APIRouter(prefix="/cars", tags=["cars"])
 
+# Single cars are cached together with their ETag
+car_entry_adapter = TypeAdapter(tuple[str, CarResponse])
+car_list_adapter = TypeAdapter(list[CarResponse])
+
 
 @router.get("/", response_model=list[CarResponse])
+@query_budget(statements=2)
 async def get_cars(
-    current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
+    connector_type: ConnectorType | None = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
 ):
-    """Get current user's cars"""
-    stmt = select(Car).where(Car.user_id == current_user.id)
-    result = db.execute(stmt)
-    cars = result.scalars().all()
-    return [CarResponse.model_validate(car) for car in cars]
+    """Get current user's cars, optionally only those supporting a connector type"""
+    cache_key = ("cars", connector_type or "all")
+    cached = read_cache.get(current_user, *cache_key, adapter=car_list_adapter)
+    if cached is not None:
+        return cached
+
+    result = db.execute(queries.cars_of_user(current_user.id, connector_type))
+    cars = [CarResponse.model_validate(car) for car in result.scalars().all()]
+
+    read_cache.set(current_user, *cache_key, value=cars, adapter=car_list_adapter)
+    return cars
 
 
 @router.get("/{car_id}", response_model=CarResponse)
+@query_budget(statements=3)
 async def get_car(
     car_id: UUID,
+    response: Response,
+    if_none_match: str | None = Header(default=None),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
+    cached = read_cache.get(current_user, "car", car_id, adapter=car_entry_adapter)
+    if cached is not None:
+        etag, car_response = cached
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+        return car_response
+
+    if if_none_match:
+        # Only the version is needed to answer a revalidation
+        version = db.scalar(queries.car_version(car_id, current_user.id))
+        if version is not None:
+            etag = version_etag(version)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+
     car = db.get(Car, car_id)
 
     if not car or car.user_id != current_user.id:
@@ -37,18 +92,43 @@ async def get_car(
             status_code=status.HTTP_404_NOT_FOUND, detail="Car not found"
         )
 
-    return CarResponse.model_validate(car)
+    etag = version_etag(car.version)
+    car_response = CarResponse.model_validate(car)
+    read_cache.set(
+        current_user,
+        "car",
+        car_id,
+        value=(etag, car_response),
+        adapter=car_entry_adapter,
+    )
+    response.headers["ETag"] = etag
+    return car_response
 
 
 @router.post("/", response_model=CarResponse, status_code=status.HTTP_201_CREATED)
 async def create_car(
     car_data: CarCreateRequest,
+    idempotency_key: str | None = Header(default=None, max_length=255),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """Create a new car for the current user"""
+    return await idempotency_service.run(
+        db,
+        current_user.id,
+        idempotency_key,
+        route="POST /cars/",
+        payload=car_data,
+        handler=lambda: _create_car(car_data, current_user, db),
+        status_code=status.HTTP_201_CREATED,
+    )
+
+
+async def _create_car(
+    car_data: CarCreateRequest, current_user: User, db: Session
+) -> CarResponse:
     try:
-        connector_types = [ConnectorType(ct) for ct in car_data.connector_types]
+        connector_types = parse_connector_types(car_data.connector_types)
 
         car = Car(
             name=car_data.name,
@@ -61,7 +141,9 @@ async def create_car(
         )
 
         db.add(car)
-        db.commit()
+        read_cache.invalidate_user(current_user)
+        # Committed by the idempotency service, with the stored response
+        db.flush()
         db.refresh(car)
         return CarResponse.model_validate(car)
 
@@ -78,33 +160,136 @@ async def create_car(
         )
 
 
+@router.post(
+    "/import", response_model=list[CarResponse], status_code=status.HTTP_201_CREATED
+)
+async def import_cars(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Create many cars at once from a JSON array or a CSV file.
+
+    Nothing is created unless every row is valid; the errors of all invalid
+    rows are returned together, located by row index.
+    """
+    import_format = ImportFormat.from_content_type(request.headers.get("content-type"))
+    if import_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send cars as application/json or text/csv",
+        )
+
+    try:
+        rows = read_rows(await request.body(), import_format)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid import file: {e}",
+        )
+    if not rows:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="No cars to import"
+        )
+    if len(rows) > CAR_IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {CAR_IMPORT_MAX_ROWS} cars can be imported at once",
+        )
+
+    values, errors = _validate_import_rows(rows)
+    if errors:
+        raise RequestValidationError(errors)
+
+    try:
+        cars = insert_cars(db, current_user.id, values)
+        read_cache.invalidate_user(current_user)
+        db.commit()
+        return [CarResponse.model_validate(car) for car in cars]
+
+    except Exception:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to import cars",
+        )
+
+
+def _validate_import_rows(rows: list) -> tuple[list[dict], list[dict]]:
+    """Column values of the valid rows, and the errors of all invalid ones"""
+    values, errors = [], []
+    for index, row in enumerate(rows):
+        try:
+            car_data = CarCreateRequest.model_validate(row)
+            connector_types = parse_connector_types(car_data.connector_types)
+        except ValidationError as e:
+            errors.extend(
+                {**error, "loc": ("body", index, *error["loc"])}
+                for error in e.errors(include_url=False)
+            )
+            continue
+        except ValueError as e:
+            errors.append(
+                {
+                    "type": "value_error",
+                    "loc": ("body", index, "connector_types"),
+                    "msg": f"Invalid connector type: {e}",
+                    "input": sorted(car_data.connector_types),
+                }
+            )
+            continue
+
+        values.append(
+            {
+                **car_data.model_dump(exclude={"connector_types"}),
+                "connector_types": canonical_connector_types(connector_types),
+            }
+        )
+    return values, errors
+
+
 @router.put("/{car_id}", response_model=CarResponse)
 async def update_car(
     car_id: UUID,
     car_data: CarCreateRequest,
+    response: Response,
+    if_match: str | None = Header(default=None),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    """Update an existing car"""
-    try:
-        car = db.get(Car, car_id)
+    """Update an existing car.
 
-        if not car or car.user_id != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Car not found",
-            )
+    With If-Match, only the version carrying that ETag is updated: a stale
+    ETag, or losing the race against a concurrent update of the same
+    version, answers 412.
+    """
+    car = db.get(Car, car_id)
+
+    if not car or car.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Car not found",
+        )
+
+    if precondition_failed(if_match, version_etag(car.version)):
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Car was changed since it was read",
+        )
 
+    try:
         car.name = car_data.name
-        car.connector_types = [ConnectorType(ct) for ct in car_data.connector_types]
+        car.connector_types = parse_connector_types(car_data.connector_types)
         car.battery_charge_limit = car_data.battery_charge_limit
         car.battery_size = car_data.battery_size
         car.max_kw_ac = car_data.max_kw_ac
         car.max_kw_dc = car_data.max_kw_dc
 
+        read_cache.invalidate_user(current_user)
         db.commit()
         db.refresh(car)
 
+        response.headers["ETag"] = version_etag(car.version)
         return CarResponse.model_validate(car)
 
     except ValueError as e:
@@ -114,6 +299,14 @@ async def update_car(
             detail=f"Invalid connector type: {e}",
         )
 
+    except StaleDataError:
+        # A concurrent update of the same version committed first
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Car was changed since it was read",
+        )
+
     except Exception:
         db.rollback()
         raise HTTPException(
@@ -136,4 +329,5 @@ async def delete_car(
         )
 
     db.delete(car)
+    read_cache.invalidate_user(current_user)
     db.commit()
@@ -0,0 +1,67 @@
+"""Endpoints called by partner systems rather than by app clients.
+
+Mounted outside the versioned API. Requests are authenticated with an
+HMAC-SHA256 signature of the raw body, sent as `X-Signature: sha256=<hex>`.
+"""
+
+import hashlib
+import hmac
+import os
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from src.api.models.charging_points import (
+    ChargingPointStatusBatch,
+    ChargingPointStatusBatchResponse,
+)
+from src.database import get_db
+from src.services.charging_point import charging_point_service
+
+CHARGING_POINT_WEBHOOK_SECRET = os.getenv("CHARGING_POINT_WEBHOOK_SECRET")
+
+router = APIRouter(prefix="/internal", tags=["internal"])
+
+
+def sign(body: bytes, secret: str) -> str:
+    """`X-Signature` header value for a request body"""
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+@router.post("/charging-points/status", response_model=ChargingPointStatusBatchResponse)
+async def ingest_charging_point_status(
+    request: Request,
+    x_signature: str | None = Header(default=None),
+    db: Session = Depends(get_db),
+):
+    """Receive batched status changes pushed by the charging-point provider"""
+    if not CHARGING_POINT_WEBHOOK_SECRET:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Status webhook is not configured",
+        )
+
+    body = await request.body()
+    expected = sign(body, CHARGING_POINT_WEBHOOK_SECRET)
+    if not x_signature or not hmac.compare_digest(x_signature, expected):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid signature"
+        )
+
+    # Parsed only after the signature check, which needs the raw body
+    try:
+        batch = ChargingPointStatusBatch.model_validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [
+                {**error, "loc": ("body", *error["loc"])}
+                for error in e.errors(include_url=False)
+            ]
+        )
+
+    applied = charging_point_service.apply_status_events(db, batch.events)
+    return ChargingPointStatusBatchResponse(
+        received=len(batch.events), applied=len(applied)
+    )
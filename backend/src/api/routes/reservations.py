@@ -1,45 +1,117 @@
 from datetime import datetime, timezone
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from pydantic import AwareDatetime, TypeAdapter
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from src.api.dependencies import get_current_user
-from src.api.models.reservations import ReservationCreateRequest, ReservationResponse
+from src import queries
+from src.api.dependencies import get_current_user, get_read_db
+from src.api.etags import etag_matches, not_modified, timestamp_etag
+from src.api.models.reservations import (
+    OccurrenceResponse,
+    ReservationCreateRequest,
+    ReservationResponse,
+    ReservationSeriesCreateRequest,
+    ReservationSeriesCreateResponse,
+    ReservationSeriesResponse,
+    WaitlistEntryCreateRequest,
+    WaitlistEntryResponse,
+)
 from src.database import get_db
+from src.instrumentation.query_watch import query_budget
 from src.models.car import Car
-from src.models.reservation import Reservation
+from src.models.reservation import Reservation, ReservationStatus
+from src.models.reservation_series import ReservationSeries, SeriesStatus
 from src.models.user import User
+from src.models.waitlist_entry import WaitlistEntry, WaitlistStatus
+from src.services.availability import TimeWindow, find_conflicts, lock_charging_point
+from src.services.cache import read_cache
 from src.services.charging_point import charging_point_service
+from src.services.idempotency import idempotency_service
+from src.services.outbox import record_reservation_events
+from src.services.reservation_export import ExportFormat, export_reservations
+from src.services.reservation_series import reservation_series_service
+from src.services.sharding import reservation_shards
+from src.services.usage import usage_rollup
+from src.services.waitlist import waitlist_matcher, waitlist_notifier
 
 router = APIRouter(prefix="/reservations", tags=["reservations"])
 
+# Single reservations are cached together with their ETag
+reservation_entry_adapter = TypeAdapter(tuple[str, ReservationResponse])
+
+# Reads of a user's reservations query every shard, or the primary without any
+SHARD_QUERIES = max(1, len(reservation_shards.engines))
 
-async def check_charging_point_availability(charging_point_id: str) -> dict:
-    """Check if charging point is available (external API + existing reservations)"""
 
-    # 1. Check external API for charging point status
-    charging_point = await charging_point_service.get_charging_point(charging_point_id)
+async def check_charging_point_availability(
+    charging_point_id: str,
+    db: Session,
+    window: TimeWindow | None = None,
+    bookings: Session | None = None,
+) -> dict:
+    """Check if charging point is available (known status + existing reservations)
 
-    if not charging_point:
+    With a window, the charging point stays locked for other bookings until the
+    transaction ends, so the answer holds until the reservation is committed.
+    Reservations are read from `bookings`, the point's shard session, if given.
+    """
+
+    # 1. Get the pushed status, falling back to the external API
+    charging_point_status = await charging_point_service.get_status(
+        db, charging_point_id
+    )
+
+    if not charging_point_status:
         return {"available": False, "reason": "Charging point not found"}
 
     # 2. Check if charging point is operationally available
-    if charging_point.status != "available":
+    if charging_point_status != "available":
         return {
             "available": False,
-            "reason": f"Charging point is {charging_point.status}",
+            "reason": f"Charging point is {charging_point_status}",
         }
 
     # 3. Check for overlapping reservations in our database
-    ## later
+    if window is not None:
+        bookings = bookings or db
+        lock_charging_point(bookings, charging_point_id)
+        conflicts = find_conflicts(bookings, charging_point_id, [window])[0]
+        if conflicts:
+            return {
+                "available": False,
+                "reason": f"It is already reserved from "
+                f"{conflicts[0].start.isoformat()} to {conflicts[0].end.isoformat()}",
+            }
+
+    return {"available": True, "reason": None}
+
+
+def check_booking_window(start_time: datetime, end_time: datetime) -> None:
+    """Reject windows in the past, shorter than 15 minutes or over 12 hours"""
+    now = datetime.now(timezone.utc)
+    if start_time <= now:
+        raise HTTPException(status_code=400, detail="Start time must be in the future")
 
-    return {
-        "available": True,
-        "reason": None,
-        "charging_point": charging_point,
-    }
+    duration = end_time - start_time
+    duration_hours = duration.total_seconds() / 3600
+
+    if duration_hours < 0.25:
+        raise HTTPException(status_code=400, detail="Minimum 15 minutes")
+    if duration_hours > 12:
+        raise HTTPException(status_code=400, detail="Maximum 12 hours")
 
 
 @router.post(
@@ -47,11 +119,25 @@ async def check_charging_point_availability(charging_point_id: str) -> dict:
 )
 async def create_reservation(
     reservation_data: ReservationCreateRequest,
+    idempotency_key: str | None = Header(default=None, max_length=255),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """Create a new charging reservation"""
+    return await idempotency_service.run(
+        db,
+        current_user.id,
+        idempotency_key,
+        route="POST /reservations/",
+        payload=reservation_data,
+        handler=lambda: _create_reservation(reservation_data, current_user, db),
+        status_code=status.HTTP_201_CREATED,
+    )
 
+
+async def _create_reservation(
+    reservation_data: ReservationCreateRequest, current_user: User, db: Session
+) -> ReservationResponse:
     # Get car and validate ownership in one step
     stmt = select(Car).where(Car.id == reservation_data.car_id)
     result = db.execute(stmt)
@@ -60,82 +146,427 @@ async def create_reservation(
     if not car or car.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Car not found")
 
-    # Simple validation (no external API for now)
-    now = datetime.now(timezone.utc)
-    if reservation_data.start_time <= now:
-        raise HTTPException(status_code=400, detail="Start time must be in the future")
+    check_booking_window(reservation_data.start_time, reservation_data.end_time)
 
-    duration = reservation_data.end_time - reservation_data.start_time
-    duration_hours = duration.total_seconds() / 3600
+    try:
+        # The point's shard session, committed when the block ends
+        with reservation_shards.session_for(
+            db, reservation_data.charging_point_id
+        ) as bookings:
+            # Check charging point availability
+            availability_check = await check_charging_point_availability(
+                reservation_data.charging_point_id,
+                db,
+                TimeWindow(reservation_data.start_time, reservation_data.end_time),
+                bookings,
+            )
 
-    if duration_hours < 0.25:
-        raise HTTPException(status_code=400, detail="Minimum 15 minutes")
-    if duration_hours > 12:
-        raise HTTPException(status_code=400, detail="Maximum 12 hours")
+            if not availability_check["available"]:
+                raise HTTPException(
+                    status_code=409,  # Conflict
+                    detail=f"Charging point is not available during the requested time. {availability_check['reason']}",
+                )
 
-    # Check charging point availability
-    availability_check = await check_charging_point_availability(
-        reservation_data.charging_point_id,
+            # Create reservation with both user_id and car_id
+            reservation = Reservation(
+                start_time=reservation_data.start_time,
+                end_time=reservation_data.end_time,
+                charging_point_id=reservation_data.charging_point_id,
+                user_id=current_user.id,
+                car_id=car.id,
+            )
+            bookings.add(reservation)
+            record_reservation_events(bookings, [reservation])
+            usage_rollup.record_reservation(db, reservation)
+            read_cache.invalidate_user(current_user)
+        # Committed by the idempotency service, with the stored response
+        db.flush()
+
+        return ReservationResponse.model_validate(reservation)
+
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=500, detail=f"Failed to create reservation: {str(e)}"
+        )
+
+
+@router.get("/", response_model=list[ReservationResponse])
+@query_budget(statements=1 + SHARD_QUERIES)
+async def get_reservations(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    """Get current user's reservations"""
+
+    # Direct query instead of user.reservations, on every shard
+    reservations = reservation_shards.merge(
+        reservation_shards.gather(
+            db, lambda s: s.scalars(queries.reservations_of_user(current_user.id)).all()
+        ),
+        key=lambda r: (r.start_time, r.id),
     )
 
+    return [ReservationResponse.model_validate(r) for r in reservations]
+
+
+# Declared before /{reservation_id} so that "export", "series" and "waitlist"
+# are not taken for an ID
+@router.get("/export", response_class=StreamingResponse)
+async def export_reservations_history(
+    format: ExportFormat = ExportFormat.NDJSON,
+    start: AwareDatetime | None = Query(
+        default=None, description="Only reservations starting at or after this"
+    ),
+    end: AwareDatetime | None = Query(
+        default=None, description="Only reservations starting before this"
+    ),
+    current_user: User = Depends(get_current_user),
+):
+    """Stream the current user's reservation history as NDJSON or CSV"""
+    return StreamingResponse(
+        export_reservations(current_user.id, format, start, end),
+        media_type=format.media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="reservations.{format}"'
+        },
+    )
+
+
+@router.post(
+    "/series",
+    response_model=ReservationSeriesCreateResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_reservation_series(
+    series_data: ReservationSeriesCreateRequest,
+    idempotency_key: str | None = Header(default=None, max_length=255),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Create a recurring reservation and book its occurrences in the horizon
+
+    Occurrences that overlap existing reservations are skipped and returned
+    with their conflicts; the others are booked.
+    """
+    return await idempotency_service.run(
+        db,
+        current_user.id,
+        idempotency_key,
+        route="POST /reservations/series",
+        payload=series_data,
+        handler=lambda: _create_reservation_series(series_data, current_user, db),
+        status_code=status.HTTP_201_CREATED,
+    )
+
+
+async def _create_reservation_series(
+    series_data: ReservationSeriesCreateRequest, current_user: User, db: Session
+) -> ReservationSeriesCreateResponse:
+    car = db.get(Car, series_data.car_id)
+    if not car or car.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Car not found")
+
+    if series_data.first_start <= datetime.now(timezone.utc):
+        raise HTTPException(status_code=400, detail="Start time must be in the future")
+
+    # Overlaps are checked per occurrence when the series is expanded
+    availability_check = await check_charging_point_availability(
+        series_data.charging_point_id, db
+    )
     if not availability_check["available"]:
         raise HTTPException(
-            status_code=409,  # Conflict
-            detail=f"Charging point is not available during the requested time. {availability_check['reason']}",
+            status_code=409,
+            detail=f"Charging point is not available. {availability_check['reason']}",
         )
 
-    # Create reservation with both user_id and car_id
     try:
-        reservation = Reservation(
-            start_time=reservation_data.start_time,
-            end_time=reservation_data.end_time,
-            charging_point_id=reservation_data.charging_point_id,
+        series = ReservationSeries(
+            rrule=series_data.rrule,
+            timezone=series_data.timezone,
+            first_start=series_data.first_start,
+            duration_minutes=series_data.duration_minutes,
+            expanded_until=series_data.first_start,
+            charging_point_id=series_data.charging_point_id,
             user_id=current_user.id,
             car_id=car.id,
         )
-        db.add(reservation)
+        db.add(series)
+        db.flush()
+        occurrences = reservation_series_service.expand(db, series)
+        db.flush()
+        response = ReservationSeriesCreateResponse.model_validate(
+            {
+                **ReservationSeriesResponse.model_validate(series).model_dump(),
+                "occurrences": [
+                    OccurrenceResponse(
+                        start_time=o.start,
+                        end_time=o.end,
+                        reservation_id=o.reservation.id if o.reservation else None,
+                        conflicts=o.conflicts,
+                    )
+                    for o in occurrences
+                ],
+            }
+        )
+        read_cache.invalidate_user(current_user)
+        db.flush()
+        return response
+
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=500, detail=f"Failed to create reservation series: {str(e)}"
+        )
+
+
+@router.get("/series", response_model=list[ReservationSeriesResponse])
+async def get_reservation_series(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    """Get current user's recurring reservations"""
+    series = db.scalars(
+        select(ReservationSeries)
+        .where(ReservationSeries.user_id == current_user.id)
+        .order_by(ReservationSeries.created_at)
+    ).all()
+    return [ReservationSeriesResponse.model_validate(s) for s in series]
+
+
+@router.delete("/series/{series_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def cancel_reservation_series(
+    series_id: UUID,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Cancel a recurring reservation and its future occurrences"""
+    series = db.get(ReservationSeries, series_id, with_for_update=True)
+    if not series or series.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Reservation series not found")
+
+    if series.status != SeriesStatus.CANCELLED:
+        if reservation_series_service.cancel(db, series):
+            bookings = waitlist_matcher.match(db, series.charging_point_id)
+            background_tasks.add_task(waitlist_notifier.notify, bookings)
+        read_cache.invalidate_user(current_user)
         db.commit()
-        db.refresh(reservation)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
-        return ReservationResponse.model_validate(reservation)
+
+@router.post(
+    "/waitlist",
+    response_model=WaitlistEntryResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def join_waitlist(
+    entry_data: WaitlistEntryCreateRequest,
+    background_tasks: BackgroundTasks,
+    idempotency_key: str | None = Header(default=None, max_length=255),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Wait for a window of a charging point to free up
+
+    The entry is booked as soon as the window is free, right away if it
+    already is, and the owner is notified. Poll the entry instead of
+    retrying the reservation.
+    """
+    return await idempotency_service.run(
+        db,
+        current_user.id,
+        idempotency_key,
+        route="POST /reservations/waitlist",
+        payload=entry_data,
+        handler=lambda: _join_waitlist(entry_data, current_user, db, background_tasks),
+        status_code=status.HTTP_201_CREATED,
+    )
+
+
+async def _join_waitlist(
+    entry_data: WaitlistEntryCreateRequest,
+    current_user: User,
+    db: Session,
+    background_tasks: BackgroundTasks,
+) -> WaitlistEntryResponse:
+    car = db.get(Car, entry_data.car_id)
+    if not car or car.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Car not found")
+
+    check_booking_window(entry_data.start_time, entry_data.end_time)
+
+    # Overlaps are what the entry waits for, so only the status is checked
+    availability_check = await check_charging_point_availability(
+        entry_data.charging_point_id, db
+    )
+    if not availability_check["available"]:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Charging point is not available. {availability_check['reason']}",
+        )
+
+    try:
+        entry = WaitlistEntry(
+            start_time=entry_data.start_time,
+            end_time=entry_data.end_time,
+            charging_point_id=entry_data.charging_point_id,
+            user_id=current_user.id,
+            car_id=car.id,
+        )
+        db.add(entry)
+        bookings = waitlist_matcher.match(db, entry.charging_point_id)
+        read_cache.invalidate_user(current_user)
+        db.flush()
+        db.refresh(entry)
+        # Background tasks run once the response, and so the commit, is done
+        background_tasks.add_task(waitlist_notifier.notify, bookings)
+
+        return WaitlistEntryResponse.model_validate(entry)
 
     except Exception as e:
         db.rollback()
         raise HTTPException(
-            status_code=500, detail=f"Failed to create reservation: {str(e)}"
+            status_code=500, detail=f"Failed to join the waitlist: {str(e)}"
         )
 
 
-@router.get("/", response_model=list[ReservationResponse])
-async def get_reservations(
+@router.get("/waitlist", response_model=list[WaitlistEntryResponse])
+async def get_waitlist(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
-    """Get current user's reservations"""
+    """Get current user's waitlist entries, oldest first"""
+    entries = db.scalars(
+        select(WaitlistEntry)
+        .where(WaitlistEntry.user_id == current_user.id)
+        .order_by(WaitlistEntry.requested_at)
+    ).all()
+    return [WaitlistEntryResponse.model_validate(e) for e in entries]
 
-    # Direct query instead of user.reservations
-    stmt = select(Reservation).where(Reservation.user_id == current_user.id)
-    reservations = db.scalars(stmt).all()
 
-    return [ReservationResponse.model_validate(r) for r in reservations]
+@router.delete("/waitlist/{entry_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def leave_waitlist(
+    entry_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Withdraw a waiting entry. Booked entries are cancelled as reservations"""
+    entry = db.get(WaitlistEntry, entry_id, with_for_update=True)
+    if not entry or entry.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Waitlist entry not found")
+    if entry.status == WaitlistStatus.BOOKED:
+        raise HTTPException(
+            status_code=409,
+            detail="The entry is already booked, cancel its reservation instead",
+        )
+
+    if entry.status == WaitlistStatus.WAITING:
+        entry.status = WaitlistStatus.WITHDRAWN
+        read_cache.invalidate_user(current_user)
+        db.commit()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
 @router.get("/{reservation_id}", response_model=ReservationResponse)
+@query_budget(statements=1 + 2 * SHARD_QUERIES)
 async def get_reservation_by_id(
     reservation_id: UUID,
+    response: Response,
+    if_none_match: str | None = Header(default=None),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """Get a specific reservation by ID"""
 
+    cached = read_cache.get(
+        current_user, "reservation", reservation_id, adapter=reservation_entry_adapter
+    )
+    if cached is not None:
+        etag, reservation_response = cached
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+        return reservation_response
+
+    if if_none_match:
+        # Only the modification time is needed to answer a revalidation
+        updated_at = reservation_shards.find(
+            db,
+            lambda s: s.scalar(
+                queries.reservation_updated_at(reservation_id, current_user.id)
+            ),
+        )
+        if updated_at is not None:
+            etag = timestamp_etag(updated_at)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+
     # Query for the reservation
-    stmt = select(Reservation).where(
-        Reservation.id == reservation_id,
-        Reservation.user_id == current_user.id,  # ← Ensure user owns the reservation
+    # Only matches reservations the user owns
+    reservation = reservation_shards.find(
+        db,
+        lambda s: s.scalar(
+            queries.reservation_of_user(reservation_id, current_user.id)
+        ),
     )
-    reservation = db.scalar(stmt)
 
     if not reservation:
         raise HTTPException(status_code=404, detail="Reservation not found")
 
+    etag = timestamp_etag(reservation.updated_at)
+    reservation_response = ReservationResponse.model_validate(reservation)
+    read_cache.set(
+        current_user,
+        "reservation",
+        reservation_id,
+        value=(etag, reservation_response),
+        adapter=reservation_entry_adapter,
+    )
+    response.headers["ETag"] = etag
+    return reservation_response
+
+
+@router.post("/{reservation_id}/cancel", response_model=ReservationResponse)
+async def cancel_reservation(
+    reservation_id: UUID,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Cancel a reservation and hand its window to the waitlist"""
+    charging_point_id = reservation_shards.find(
+        db,
+        lambda s: s.scalar(
+            select(Reservation.charging_point_id).where(
+                Reservation.id == reservation_id,
+                Reservation.user_id == current_user.id,
+            )
+        ),
+    )
+    if charging_point_id is None:
+        raise HTTPException(status_code=404, detail="Reservation not found")
+
+    with reservation_shards.session_for(db, charging_point_id) as shard:
+        reservation = shard.get(Reservation, reservation_id, with_for_update=True)
+        if not reservation:
+            raise HTTPException(status_code=404, detail="Reservation not found")
+        if reservation.status != ReservationStatus.ACTIVE:
+            raise HTTPException(
+                status_code=409, detail=f"Reservation is already {reservation.status}"
+            )
+        if reservation.end_time <= datetime.now(timezone.utc):
+            raise HTTPException(status_code=409, detail="Reservation has already ended")
+
+        reservation.status = ReservationStatus.CANCELLED
+        record_reservation_events(shard, [reservation])
+        usage_rollup.record_reservation(db, reservation, sign=-1)
+    bookings = waitlist_matcher.match(db, charging_point_id)
+    read_cache.invalidate_user(current_user)
+    db.commit()
+    background_tasks.add_task(waitlist_notifier.notify, bookings)
+
     return ReservationResponse.model_validate(reservation)
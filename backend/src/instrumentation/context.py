@@ -0,0 +1,22 @@
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class RequestStats:
+    """Per-request counters filled in by the database and HTTP hooks"""
+
+    db_statements: int = 0
+    db_seconds: float = 0.0
+    upstream_calls: int = 0
+    upstream_seconds: float = 0.0
+    # Validating the caller's token, including any upstream call for it
+    auth_seconds: float = 0.0
+    # Only collected while the query watch is enabled
+    statements: list[str] | None = None
+
+
+# Set by MetricsMiddleware for the duration of each HTTP request
+request_stats: ContextVar[RequestStats | None] = ContextVar(
+    "request_stats", default=None
+)
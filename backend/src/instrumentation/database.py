@@ -0,0 +1,31 @@
+from time import perf_counter
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.instrumentation.context import request_stats
+from src.instrumentation.metrics import DB_STATEMENT_DURATION
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the statement's own context, which is dropped whether it
+    # succeeds or fails
+    context._query_start_time = perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = perf_counter() - context._query_start_time
+    DB_STATEMENT_DURATION.observe(elapsed)
+
+    stats = request_stats.get()
+    if stats is not None:
+        stats.db_statements += 1
+        stats.db_seconds += elapsed
+        if stats.statements is not None:
+            stats.statements.append(statement)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement executed on the engine"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
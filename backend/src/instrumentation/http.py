@@ -0,0 +1,30 @@
+from time import perf_counter
+
+import httpx
+
+from src.instrumentation.context import request_stats
+from src.instrumentation.metrics import UPSTREAM_REQUEST_DURATION
+
+
+class InstrumentedTransport(httpx.AsyncHTTPTransport):
+    """HTTP transport that times outbound calls and counts response statuses"""
+
+    def __init__(self, upstream: str, **kwargs):
+        super().__init__(**kwargs)
+        self.upstream = upstream
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        status = "error"
+        start = perf_counter()
+        try:
+            response = await super().handle_async_request(request)
+            status = str(response.status_code)
+            return response
+        finally:
+            elapsed = perf_counter() - start
+            UPSTREAM_REQUEST_DURATION.observe(elapsed, self.upstream, status)
+
+            stats = request_stats.get()
+            if stats is not None:
+                stats.upstream_calls += 1
+                stats.upstream_seconds += elapsed
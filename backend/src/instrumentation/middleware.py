@@ -0,0 +1,52 @@
+from time import perf_counter
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.instrumentation.context import RequestStats, request_stats
+from src.instrumentation.metrics import (
+    DB_STATEMENTS_PER_REQUEST,
+    DB_TIME_PER_REQUEST,
+    HTTP_REQUEST_DURATION,
+)
+
+
+def route_template(scope: Scope) -> str:
+    """Path template of the matched route, to keep label cardinality bounded"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Record latency and database usage of every HTTP request per route"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = perf_counter() - start
+            request_stats.reset(token)
+
+            route = route_template(scope)
+            HTTP_REQUEST_DURATION.observe(
+                duration, scope["method"], route, str(status_code)
+            )
+            DB_STATEMENTS_PER_REQUEST.observe(stats.db_statements, route)
+            DB_TIME_PER_REQUEST.observe(stats.db_seconds, route)
@@ -0,0 +1,220 @@
+"""On-demand cProfile capture of single requests.
+
+A request is profiled when it carries `X-Profile: <PROFILE_TOKEN>`, or at
+random with probability `PROFILE_SAMPLE_RATE`. Profiles are written to
+`PROFILE_DIR` as `<id>.prof` (loadable with `pstats` or snakeviz) with a
+`<id>.json` summary next to it, and the newest `PROFILE_KEEP` are kept.
+Requests profiled through the header get the summary back as `Server-Timing`
+and the profile id as `X-Profile-Id`; fetch the profile from
+`/admin/profiles/<id>` with the same header.
+
+cProfile sees the whole event loop thread, so a profile can include work of
+concurrent requests. Only one request per process is profiled at a time.
+With no token and a zero sample rate the middleware only checks a flag.
+"""
+
+import asyncio
+import hmac
+import json
+import os
+import random
+import re
+import tempfile
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from time import perf_counter
+from typing import TYPE_CHECKING
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.instrumentation.context import RequestStats, request_stats
+from src.instrumentation.middleware import route_template
+
+if TYPE_CHECKING:
+    # Imported when the first request is profiled, off the startup path
+    import cProfile
+
+PROFILE_HEADER = "x-profile"
+
+PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+# Functions whose cumulative time counts as response serialisation
+SERIALISATION_FUNCTIONS = {
+    ("fastapi/routing.py", "serialize_response"),
+    ("starlette/responses.py", "render"),
+}
+
+
+@dataclass(slots=True)
+class ProfileSummary:
+    id: str
+    method: str
+    route: str
+    path: str
+    status: int
+    created_at: float
+    # Milliseconds per phase. Phases overlap: auth includes its upstream call
+    timings: dict[str, float]
+
+    def server_timing(self) -> str:
+        return ", ".join(f"{name};dur={ms}" for name, ms in self.timings.items())
+
+
+def serialisation_seconds(profile: "cProfile.Profile") -> float:
+    import pstats
+
+    stats = pstats.Stats(profile).stats
+    return sum(
+        cumulative
+        for (filename, _, function), (_, _, _, cumulative, _) in stats.items()
+        if any(
+            filename.endswith(suffix) and function == name
+            for suffix, name in SERIALISATION_FUNCTIONS
+        )
+    )
+
+
+def phase_timings(
+    stats: RequestStats, total: float, serialisation: float
+) -> dict[str, float]:
+    """Server-Timing durations in milliseconds"""
+    app = total - stats.db_seconds - stats.upstream_seconds - serialisation
+    seconds = {
+        "total": total,
+        "auth": stats.auth_seconds,
+        "db": stats.db_seconds,
+        "upstream": stats.upstream_seconds,
+        "serialise": serialisation,
+        "app": max(app, 0.0),
+    }
+    return {name: round(value * 1000, 2) for name, value in seconds.items()}
+
+
+class Profiler:
+    def __init__(self):
+        self.token = os.getenv("PROFILE_TOKEN") or None
+        self.sample_rate = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+        self.directory = Path(
+            os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "profiles"))
+        )
+        self.keep = int(os.getenv("PROFILE_KEEP", "100"))
+        self.enabled = self.token is not None or self.sample_rate > 0
+        self.active = False
+
+    def authorised(self, value: str | None) -> bool:
+        return (
+            self.token is not None
+            and value is not None
+            and hmac.compare_digest(value, self.token)
+        )
+
+    def save(self, profile: "cProfile.Profile", summary: ProfileSummary) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(self.directory / f"{summary.id}.prof")
+        (self.directory / f"{summary.id}.json").write_text(json.dumps(asdict(summary)))
+
+        summaries = sorted(
+            self.directory.glob("*.json"), key=lambda p: p.stat().st_mtime
+        )
+        for stale in summaries[: max(len(summaries) - self.keep, 0)]:
+            stale.unlink(missing_ok=True)
+            stale.with_suffix(".prof").unlink(missing_ok=True)
+
+    def summaries(self) -> list[dict]:
+        """Stored profile summaries, newest first"""
+        if not self.directory.is_dir():
+            return []
+        summaries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                summaries.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue  # pruned or still being written
+        return sorted(summaries, key=lambda s: s["created_at"], reverse=True)
+
+    def path(self, profile_id: str) -> Path | None:
+        if not PROFILE_ID.match(profile_id):
+            return None
+        path = self.directory / f"{profile_id}.prof"
+        return path if path.is_file() else None
+
+
+profiler = Profiler()
+
+
+class ProfilingMiddleware:
+    """Profile requests that ask for it with the token, or a sample of all"""
+
+    def __init__(self, app: ASGIApp, profiler: Profiler = profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self.profiler.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        requested = self.profiler.authorised(self._header(scope))
+        sampled = not requested and random.random() < self.profiler.sample_rate
+        if not (requested or sampled) or self.profiler.active:
+            await self.app(scope, receive, send)
+            return
+
+        stats = request_stats.get()
+        token = None
+        if stats is None:
+            stats = RequestStats()
+            token = request_stats.set(stats)
+
+        import cProfile
+
+        profile = cProfile.Profile()
+        summary = None
+        start = perf_counter()
+
+        def finish(status: int) -> ProfileSummary:
+            profile.disable()
+            self.profiler.active = False
+            return ProfileSummary(
+                id=uuid.uuid4().hex,
+                method=scope["method"],
+                route=route_template(scope),
+                path=scope["path"],
+                status=status,
+                created_at=time.time(),
+                timings=phase_timings(
+                    stats, perf_counter() - start, serialisation_seconds(profile)
+                ),
+            )
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal summary
+            if message["type"] == "http.response.start":
+                # The body is rendered by now; streamed bodies are not profiled
+                summary = finish(message["status"])
+                if requested:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", summary.server_timing())
+                    headers.append("X-Profile-Id", summary.id)
+            await send(message)
+
+        self.profiler.active = True
+        profile.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if summary is None:
+                summary = finish(500)
+            if token is not None:
+                request_stats.reset(token)
+            await asyncio.to_thread(self.profiler.save, profile, summary)
+
+    @staticmethod
+    def _header(scope: Scope) -> str | None:
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER.encode():
+                return value.decode("latin-1")
+        return None
@@ -0,0 +1,29 @@
+"""Pytest fixture that fails a test when a route breaks its query budget.
+
+Load it from a conftest with `pytest_plugins = ["src.instrumentation.pytest_plugin"]`
+and request `enforce_query_budgets` in tests that exercise the API.
+"""
+
+import pytest
+
+from src.instrumentation.query_watch import query_watch
+
+
+@pytest.fixture
+def enforce_query_budgets():
+    """Enable the query watch and fail the test on declared budget violations"""
+    was_enabled = query_watch.enabled
+    query_watch.enabled = True
+    query_watch.budget_violations.clear()
+    try:
+        yield query_watch
+    finally:
+        query_watch.enabled = was_enabled
+
+    violations = list(query_watch.budget_violations)
+    query_watch.budget_violations.clear()
+    if violations:
+        pytest.fail(
+            "Query budget exceeded:\n" + "\n".join(v.summary() for v in violations),
+            pytrace=False,
+        )
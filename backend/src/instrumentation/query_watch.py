@@ -0,0 +1,180 @@
+"""Development-mode detector for slow requests and N+1 query patterns.
+
+Enable it with `QUERY_WATCH_ENABLED=true` (or from tests, see
+`src.instrumentation.pytest_plugin`). While enabled, every request records its
+SQL statements and outbound HTTP calls, and a structured report is logged
+when a request exceeds its thresholds. Routes can declare a tighter budget:
+
+    @router.get("/")
+    @query_budget(statements=2)
+    async def get_cars(...): ...
+"""
+
+import json
+import logging
+import os
+import re
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from time import perf_counter
+from typing import Callable
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.instrumentation.context import RequestStats, request_stats
+from src.instrumentation.middleware import route_template
+
+logger = logging.getLogger(__name__)
+
+_BIND_PARAM = re.compile(r"%\(\w+\)s|\$\d+|\?")
+_NUMBER = re.compile(r"\b\d+\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PARAM_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """Normalise a statement so repeated executions with other values match"""
+    statement = _STRING.sub("?", statement)
+    statement = _BIND_PARAM.sub("?", statement)
+    statement = _NUMBER.sub("?", statement)
+    statement = _PARAM_LIST.sub("(...)", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+@dataclass(frozen=True, slots=True)
+class QueryBudget:
+    statements: int
+    upstream_calls: int | None = None
+
+
+def query_budget(
+    statements: int, upstream_calls: int | None = None
+) -> Callable[[Callable], Callable]:
+    """Declare the maximum number of SQL statements (and HTTP calls) of a route"""
+
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.__query_budget__ = QueryBudget(statements, upstream_calls)
+        return endpoint
+
+    return decorator
+
+
+@dataclass(slots=True)
+class QueryReport:
+    method: str
+    route: str
+    duration_ms: float
+    statements: int
+    upstream_calls: int
+    violations: list[str]
+    over_budget: bool
+    fingerprints: dict[str, int] = field(default_factory=dict)
+
+    def summary(self) -> str:
+        return f"{self.method} {self.route}: {'; '.join(self.violations)}"
+
+
+class QueryWatch:
+    def __init__(self):
+        self.enabled = os.getenv("QUERY_WATCH_ENABLED", "false").lower() == "true"
+        self.max_statements = int(os.getenv("QUERY_WATCH_MAX_STATEMENTS", "10"))
+        self.max_upstream_calls = int(os.getenv("QUERY_WATCH_MAX_UPSTREAM_CALLS", "3"))
+        self.max_repeats = int(os.getenv("QUERY_WATCH_MAX_REPEATS", "2"))
+        self.slow_request_ms = float(os.getenv("QUERY_WATCH_SLOW_REQUEST_MS", "500"))
+        # Reports of requests that broke a declared budget, kept for tests
+        self.budget_violations: list[QueryReport] = []
+
+    def inspect(
+        self,
+        scope: Scope,
+        stats: RequestStats,
+        duration: float,
+    ) -> QueryReport | None:
+        """Check a finished request against its thresholds"""
+        budget: QueryBudget | None = getattr(
+            scope.get("endpoint"), "__query_budget__", None
+        )
+        max_statements = budget.statements if budget else self.max_statements
+        max_upstream_calls = self.max_upstream_calls
+        if budget and budget.upstream_calls is not None:
+            max_upstream_calls = budget.upstream_calls
+
+        fingerprints = Counter(fingerprint(s) for s in stats.statements or ())
+        duration_ms = duration * 1000
+
+        violations = []
+        over_budget = False
+        if stats.db_statements > max_statements:
+            violations.append(
+                f"{stats.db_statements} SQL statements (limit {max_statements})"
+            )
+            over_budget = budget is not None
+        if stats.upstream_calls > max_upstream_calls:
+            violations.append(
+                f"{stats.upstream_calls} upstream calls (limit {max_upstream_calls})"
+            )
+            over_budget = over_budget or (
+                budget is not None and budget.upstream_calls is not None
+            )
+        repeated = [fp for fp, n in fingerprints.items() if n > self.max_repeats]
+        if repeated:
+            violations.append(f"{len(repeated)} statement(s) repeated, possible N+1")
+        if duration_ms > self.slow_request_ms:
+            violations.append(
+                f"slow request {duration_ms:.0f} ms (limit {self.slow_request_ms:.0f})"
+            )
+
+        if not violations:
+            return None
+
+        return QueryReport(
+            method=scope["method"],
+            route=route_template(scope),
+            duration_ms=round(duration_ms, 2),
+            statements=stats.db_statements,
+            upstream_calls=stats.upstream_calls,
+            violations=violations,
+            over_budget=over_budget,
+            fingerprints=dict(fingerprints.most_common()),
+        )
+
+    def record(self, report: QueryReport) -> None:
+        logger.warning("query watch: %s", json.dumps(asdict(report)))
+        if report.over_budget:
+            self.budget_violations.append(report)
+
+
+query_watch = QueryWatch()
+
+
+class QueryWatchMiddleware:
+    """Count SQL statements and outbound calls per request while enabled"""
+
+    def __init__(self, app: ASGIApp, watch: QueryWatch = query_watch):
+        self.app = app
+        self.watch = watch
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.watch.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        stats = request_stats.get()
+        token = None
+        if stats is None:
+            stats = RequestStats()
+            token = request_stats.set(stats)
+        stats.statements = []
+
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            duration = perf_counter() - start
+            if token is not None:
+                request_stats.reset(token)
+
+            report = self.watch.inspect(scope, stats, duration)
+            if report:
+                self.watch.record(report)
@@ -1,16 +1,98 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
 from starlette.middleware.sessions import SessionMiddleware
 
+from src.admission.middleware import AdmissionMiddleware
 from src.api.router import router as api_router
+from src.api.routes.admin import router as admin_router
+from src.api.routes.internal import router as internal_router
+from src.instrumentation.metrics import CONTENT_TYPE, REGISTRY
+from src.instrumentation.middleware import MetricsMiddleware
+from src.instrumentation.profiling import ProfilingMiddleware
+from src.instrumentation.query_watch import QueryWatchMiddleware
+from src.services.background import job_leader
+from src.services.idempotency import purge_expired_idempotency_keys
+from src.services.outbox import (
+    OUTBOX_DISPATCH_ENABLED,
+    outbox_dispatcher,
+    purge_delivered_outbox_events,
+)
+from src.services.readiness import readiness
+from src.services.reservation_series import expand_due_series
+from src.services.shard_reconciliation import reconcile_shard_writes
+from src.services.upstreams import upstream_clients
+from src.services.waitlist import match_waitlists
+
+IDEMPOTENCY_PURGE_INTERVAL = 15 * 60
+SERIES_EXPANSION_INTERVAL = 60 * 60
+WAITLIST_MATCH_INTERVAL = 60
+OUTBOX_PURGE_INTERVAL = 60 * 60
+SHARD_RECONCILE_INTERVAL = 5 * 60
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop the warm-up and the background jobs"""
+    tasks = [
+        # In the background, so /health answers while it runs; /ready waits
+        asyncio.create_task(readiness.warm_up()),
+        # In one worker at a time
+        asyncio.create_task(
+            job_leader.run(
+                [
+                    (
+                        "purge_expired_idempotency_keys",
+                        IDEMPOTENCY_PURGE_INTERVAL,
+                        purge_expired_idempotency_keys,
+                    ),
+                    (
+                        "expand_due_series",
+                        SERIES_EXPANSION_INTERVAL,
+                        expand_due_series,
+                    ),
+                    ("match_waitlists", WAITLIST_MATCH_INTERVAL, match_waitlists),
+                    (
+                        "purge_delivered_outbox_events",
+                        OUTBOX_PURGE_INTERVAL,
+                        purge_delivered_outbox_events,
+                    ),
+                    (
+                        "reconcile_shard_writes",
+                        SHARD_RECONCILE_INTERVAL,
+                        reconcile_shard_writes,
+                    ),
+                ]
+            )
+        ),
+    ]
+    # In every worker: events are claimed with SKIP LOCKED, so each dispatcher
+    # adds delivery throughput
+    if OUTBOX_DISPATCH_ENABLED:
+        tasks.append(asyncio.create_task(outbox_dispatcher.run()))
+    yield
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await upstream_clients.aclose()
+
 
 app = FastAPI(
     title="Car Charging Reservation System - API",
     description="API Backend for Car Charging System",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(SessionMiddleware, secret_key="your-secret-key")
+app.add_middleware(QueryWatchMiddleware)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(MetricsMiddleware)
 app.include_router(api_router)
+app.include_router(internal_router)
+app.include_router(admin_router)
 
 
 @app.get("/health")
@@ -19,7 +101,16 @@ async def health_check():
     return {"status": "healthy"}
 
 
-if __name__ == "__main__":
-    import uvicorn
+@app.get("/ready")
+async def readiness_check(response: Response):
+    """Readiness probe: 503 until warmed up, and while a database is down"""
+    ready, body = await readiness.status()
+    if not ready:
+        response.status_code = 503
+    return body
+
 
-    uvicorn.run("main:app", host="0.0.0.0", port=8080, reload=True)
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics endpoint"""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
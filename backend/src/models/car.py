@@ -1,9 +1,19 @@
 import uuid
 from enum import StrEnum
+from typing import Iterable
 
-from sqlalchemy import ARRAY, Enum, ForeignKey, Integer, String
+from sqlalchemy import (
+    ARRAY,
+    CheckConstraint,
+    Enum,
+    ForeignKey,
+    Index,
+    Integer,
+    SmallInteger,
+    String,
+)
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.orm import Mapped, mapped_column, validates
 
 from src.database import Base
 
@@ -14,10 +24,60 @@ class ConnectorType(StrEnum):
     CCS = "CCS"
     CHADEMO = "CHAdeMO"
 
+    @property
+    def bit(self) -> int:
+        """Bit of this connector type in `Car.connector_mask`"""
+        return 1 << list(ConnectorType).index(self)
+
+
+def parse_connector_types(values: Iterable[str]) -> list[ConnectorType]:
+    """Connector types from their names, raising ValueError for unknown ones"""
+    return [ConnectorType(value) for value in values]
+
+
+def canonical_connector_types(
+    connector_types: Iterable[ConnectorType],
+) -> list[ConnectorType]:
+    """Deduplicate and sort connector types the way they are stored"""
+    return sorted(set(connector_types), key=lambda x: x.value)
+
+
+def connector_mask(connector_types: Iterable[ConnectorType]) -> int:
+    """Bitmask of the given connector types"""
+    mask = 0
+    for connector_type in connector_types:
+        mask |= connector_type.bit
+    return mask
+
+
+def masks_supporting(connector_type: ConnectorType) -> list[int]:
+    """All non-empty masks that include the given connector type.
+
+    Matching `connector_mask IN (...)` instead of `connector_mask & bit <> 0`
+    keeps the filter usable by a plain btree index.
+    """
+    return [m for m in range(1, 1 << len(ConnectorType)) if m & connector_type.bit]
+
+
+# Keeps the mask in sync with the array for rows written outside the ORM.
+# The array stores enum member names, as SQLAlchemy persists them.
+CONNECTOR_MASK_EXPRESSION = " | ".join(
+    f"(CASE WHEN '{ct.name}' = ANY(connector_types) THEN {ct.bit} ELSE 0 END)"
+    for ct in ConnectorType
+)
+
 
 class Car(Base):
     __tablename__ = "cars"
 
+    __table_args__ = (
+        CheckConstraint(
+            f"connector_mask = ({CONNECTOR_MASK_EXPRESSION})",
+            name="check_connector_mask_matches_types",
+        ),
+        Index("ix_cars_user_id_connector_mask", "user_id", "connector_mask"),
+    )
+
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
     )
@@ -26,6 +86,7 @@ class Car(Base):
         ARRAY(Enum(ConnectorType, name="connectortype")),
         nullable=False,
     )
+    connector_mask: Mapped[int] = mapped_column(SmallInteger, nullable=False)
     battery_charge_limit: Mapped[int] = mapped_column(
         Integer, default=80, nullable=False
     )
@@ -35,3 +96,16 @@ class Car(Base):
     user_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("users.id"), nullable=False
     )
+    # Incremented by SQLAlchemy on every update, used as the ETag
+    version: Mapped[int] = mapped_column(Integer, server_default="1", nullable=False)
+
+    __mapper_args__ = {"version_id_col": version}
+
+    @validates("connector_types")
+    def _canonicalise_connector_types(
+        self, key: str, connector_types: Iterable[ConnectorType]
+    ) -> list[ConnectorType]:
+        """Store connector types deduplicated and sorted, with a matching mask"""
+        canonical = canonical_connector_types(connector_types)
+        self.connector_mask = connector_mask(canonical)
+        return canonical
@@ -0,0 +1,25 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.database import Base
+
+
+class ChargingPointMove(Base):
+    """Left on a shard when a charging point's reservations move elsewhere.
+
+    Bookings routed here with a stale override find it under the point's lock
+    and are turned away instead of writing to the old shard.
+    """
+
+    __tablename__ = "charging_point_moves"
+
+    charging_point_id: Mapped[str] = mapped_column(String, primary_key=True)
+    # Where the reservations went
+    shard: Mapped[str] = mapped_column(String, nullable=False)
+    moved_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
@@ -0,0 +1,21 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.database import Base
+
+
+class ChargingPointShard(Base):
+    """Shard holding a charging point's reservations, where not the hashed one"""
+
+    __tablename__ = "charging_point_shards"
+
+    charging_point_id: Mapped[str] = mapped_column(String, primary_key=True)
+    shard: Mapped[str] = mapped_column(String, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.database import Base
+
+
+class ChargingPointUsage(Base):
+    """Hourly usage rollup per charging point, see src/services/usage.py"""
+
+    __tablename__ = "charging_point_usage"
+
+    charging_point_id: Mapped[str] = mapped_column(String, primary_key=True)
+    # Start of the hour, in UTC
+    hour: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+
+    # Reservations starting in the hour, and seconds of the hour reserved
+    reservations_started: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
+    reserved_seconds: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
+    # Seconds of the hour the provider reported the point as occupied
+    occupied_seconds: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
@@ -0,0 +1,35 @@
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, ForeignKey, SmallInteger, String
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.database import Base
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True
+    )
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+
+    # SHA-256 of the route and request body, to reject reuse for another request
+    request_fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+
+    # Both empty while the first request is still in flight
+    response_status: Mapped[int | None] = mapped_column(SmallInteger)
+    response_body: Mapped[dict | list | None] = mapped_column(JSONB)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+    # In flight: when another request may take the key over.
+    # Completed: when the stored response is purged.
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True
+    )
@@ -0,0 +1,51 @@
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import UUID, DateTime, Index, Integer, String, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.database import Base
+
+
+class OutboxEvent(Base):
+    """An event to deliver, written in the transaction of the change it reports"""
+
+    __tablename__ = "outbox"
+
+    __table_args__ = (
+        # The dispatcher's queue: undelivered events by when they are due
+        Index(
+            "ix_outbox_pending",
+            "next_attempt_at",
+            postgresql_where=text("delivered_at IS NULL"),
+        ),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    event_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    # The reservation the event is about. Not a foreign key, so the table
+    # works the same on a shard
+    aggregate_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    # Delivery state
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Also pushed ahead while a dispatcher holds the event, so that a
+    # dispatcher that dies only delays it
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+    delivered_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    last_error: Mapped[str | None] = mapped_column(String, nullable=True)
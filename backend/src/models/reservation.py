@@ -2,7 +2,15 @@ import uuid
 from datetime import datetime, timezone
 from enum import StrEnum
 
-from sqlalchemy import UUID, CheckConstraint, DateTime, Enum, ForeignKey, String
+from sqlalchemy import (
+    UUID,
+    CheckConstraint,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    String,
+)
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.database import Base
@@ -20,6 +28,14 @@ class Reservation(Base):
     # Add the constraint at the table level
     __table_args__ = (
         CheckConstraint("start_time < end_time", name="check_valid_time_range"),
+        # Overlap checks look up the bookings of one charging point by time
+        Index(
+            "ix_reservations_charging_point_id_start_time",
+            "charging_point_id",
+            "start_time",
+        ),
+        # Listings and exports read one user's bookings in start order
+        Index("ix_reservations_user_id_start_time", "user_id", "start_time"),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(
@@ -64,3 +80,7 @@ class Reservation(Base):
     car_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("cars.id"), nullable=False
     )
+    # Set on occurrences of a recurring booking
+    series_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("reservation_series.id"), nullable=True
+    )
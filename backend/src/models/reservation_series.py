@@ -0,0 +1,58 @@
+import uuid
+from datetime import datetime, timezone
+from enum import StrEnum
+
+from sqlalchemy import UUID, DateTime, Enum, ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.database import Base
+
+
+class SeriesStatus(StrEnum):
+    ACTIVE = "active"
+    # The recurrence has no occurrences left to expand
+    FINISHED = "finished"
+    CANCELLED = "cancelled"
+
+
+class ReservationSeries(Base):
+    """A recurring booking, expanded into reservations over a rolling horizon"""
+
+    __tablename__ = "reservation_series"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    # RRULE subset, see src/services/recurrence.py
+    rrule: Mapped[str] = mapped_column(String, nullable=False)
+    # IANA time zone that keeps occurrences at the same wall-clock time
+    timezone: Mapped[str] = mapped_column(String, nullable=False)
+    first_start: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+    duration_minutes: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Occurrences starting before this have been turned into reservations
+    expanded_until: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+    status: Mapped[SeriesStatus] = mapped_column(
+        Enum(
+            SeriesStatus,
+            name="seriesstatus",
+            values_callable=lambda e: [x.value for x in e],
+        ),
+        default=SeriesStatus.ACTIVE,
+        nullable=False,
+    )
+    charging_point_id: Mapped[str] = mapped_column(String, nullable=False)
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True
+    )
+    car_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("cars.id"), nullable=False
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
@@ -1,6 +1,7 @@
 import uuid
+from datetime import datetime
 
-from sqlalchemy import Integer, String
+from sqlalchemy import DateTime, Integer, String
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -18,3 +19,13 @@ class User(Base):
     )
     external_user_id: Mapped[int] = mapped_column(Integer, unique=True)
     username: Mapped[str] = mapped_column(String, unique=True)
+    # Bumped on every write to the user's cars or reservations, see
+    # src/services/cache.py
+    cache_version: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
+    # Set together with cache_version; reads stay on the primary until a
+    # replica has applied this write, see src/database.py
+    last_write_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
@@ -0,0 +1,82 @@
+import uuid
+from datetime import datetime, timezone
+from enum import StrEnum
+
+from sqlalchemy import (
+    UUID,
+    CheckConstraint,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    String,
+    text,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.database import Base
+
+
+class WaitlistStatus(StrEnum):
+    WAITING = "waiting"
+    BOOKED = "booked"
+    # The window started before it could be booked
+    EXPIRED = "expired"
+    WITHDRAWN = "withdrawn"
+
+
+class WaitlistEntry(Base):
+    """A wish to book a charging point, booked when the window frees up"""
+
+    __tablename__ = "waitlist_entries"
+
+    __table_args__ = (
+        CheckConstraint("start_time < end_time", name="check_valid_waitlist_range"),
+        # The queue of a charging point, oldest request first
+        Index(
+            "ix_waitlist_entries_waiting",
+            "charging_point_id",
+            "requested_at",
+            postgresql_where=text("status = 'waiting'"),
+        ),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    charging_point_id: Mapped[str] = mapped_column(String, nullable=False)
+    start_time: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+    end_time: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    status: Mapped[WaitlistStatus] = mapped_column(
+        Enum(
+            WaitlistStatus,
+            name="waitliststatus",
+            values_callable=lambda e: [x.value for x in e],
+        ),
+        default=WaitlistStatus.WAITING,
+        nullable=False,
+    )
+    requested_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True
+    )
+    car_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("cars.id"), nullable=False
+    )
+    # Set once booked. Not a foreign key, the reservation may be on a shard
+    reservation_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), nullable=True
+    )
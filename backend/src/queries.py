@@ -0,0 +1,71 @@
+"""Statements run on nearly every request.
+
+Each is a lambda statement: SQLAlchemy builds and compiles it once per call
+site and afterwards only pulls the bound values out of the closure, instead
+of constructing the Core statement and computing its cache key per request.
+The SQL text is identical on every execution, so psycopg can serve it from a
+server-side prepared statement (see `DATABASE_PREPARE_THRESHOLD`).
+
+Closure variables must be plain values; anything else in the lambda is
+part of the cached statement.
+"""
+
+import uuid
+
+from sqlalchemy import StatementLambdaElement, lambda_stmt, select
+
+from src.models.car import Car, ConnectorType, masks_supporting
+from src.models.reservation import Reservation
+from src.models.user import User
+
+
+def user_by_external_id(external_user_id: int) -> StatementLambdaElement:
+    return lambda_stmt(
+        lambda: select(User).where(User.external_user_id == external_user_id)
+    )
+
+
+def cars_of_user(
+    user_id: uuid.UUID, connector_type: ConnectorType | None = None
+) -> StatementLambdaElement:
+    stmt = lambda_stmt(lambda: select(Car).where(Car.user_id == user_id))
+    if connector_type is not None:
+        masks = masks_supporting(connector_type)
+        stmt += lambda s: s.where(Car.connector_mask.in_(masks))
+    return stmt
+
+
+def car_version(car_id: uuid.UUID, user_id: uuid.UUID) -> StatementLambdaElement:
+    return lambda_stmt(
+        lambda: select(Car.version).where(Car.id == car_id, Car.user_id == user_id)
+    )
+
+
+def reservations_of_user(user_id: uuid.UUID) -> StatementLambdaElement:
+    return lambda_stmt(
+        lambda: (
+            select(Reservation)
+            .where(Reservation.user_id == user_id)
+            .order_by(Reservation.start_time, Reservation.id)
+        )
+    )
+
+
+def reservation_of_user(
+    reservation_id: uuid.UUID, user_id: uuid.UUID
+) -> StatementLambdaElement:
+    return lambda_stmt(
+        lambda: select(Reservation).where(
+            Reservation.id == reservation_id, Reservation.user_id == user_id
+        )
+    )
+
+
+def reservation_updated_at(
+    reservation_id: uuid.UUID, user_id: uuid.UUID
+) -> StatementLambdaElement:
+    return lambda_stmt(
+        lambda: select(Reservation.updated_at).where(
+            Reservation.id == reservation_id, Reservation.user_id == user_id
+        )
+    )
@@ -0,0 +1,72 @@
+"""Server entry point.
+
+    python -m src.server             # production
+    python -m src.server --reload    # development
+
+Runs uvicorn with one worker per available CPU (override with
+`WEB_CONCURRENCY`), uvloop and httptools. With `--reload` it runs a single
+worker that restarts on code changes.
+
+Workers are separate processes. The periodic background jobs run in only
+one of them (see src/services/background.py). Each worker keeps its own
+metrics, token cache, admission limits and, without `CACHE_URL`, read cache:
+- A scrape of /metrics only sees the worker that answers it.
+- A token dropped on refresh stays valid in the other workers' caches for up
+  to `TOKEN_CACHE_TTL_SECONDS`.
+- Rate and concurrency limits apply per worker, so a client may get up to
+  the worker count times its rate.
+"""
+
+import os
+import sys
+
+import uvicorn
+
+CGROUP_CPU_MAX = "/sys/fs/cgroup/cpu.max"
+
+
+def available_cpus() -> int:
+    """CPUs this process may use, honouring affinity and cgroup v2 quotas"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    try:
+        with open(CGROUP_CPU_MAX) as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+
+    return cpus
+
+
+def worker_count() -> int:
+    configured = os.getenv("WEB_CONCURRENCY")
+    if configured:
+        return max(1, int(configured))
+    return available_cpus()
+
+
+def main(reload: bool = False) -> None:
+    uvicorn.run(
+        "src.main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8080")),
+        workers=1 if reload else worker_count(),
+        reload=reload,
+        loop="uvloop",
+        http="httptools",
+        backlog=int(os.getenv("BACKLOG", "2048")),
+        timeout_keep_alive=int(os.getenv("KEEP_ALIVE_TIMEOUT", "5")),
+        timeout_graceful_shutdown=int(os.getenv("GRACEFUL_SHUTDOWN_TIMEOUT", "30")),
+        proxy_headers=True,
+        forwarded_allow_ips=os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+        access_log=os.getenv("ACCESS_LOG", "false").lower() == "true",
+    )
+
+
+if __name__ == "__main__":
+    main(reload="--reload" in sys.argv[1:])
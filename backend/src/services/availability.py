@@ -0,0 +1,65 @@
+"""Overlap checks between new bookings and a charging point's reservations.
+
+Writers lock the charging point with a transaction-scoped advisory lock
+before checking, so two concurrent bookings of one point cannot both pass
+the check. The lock is released when the booking commits or rolls back.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Sequence
+
+from sqlalchemy import DateTime, bindparam, func, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from src.models.reservation import Reservation, ReservationStatus
+
+TIMESTAMPS = ARRAY(DateTime(timezone=True))
+
+
+@dataclass(frozen=True, slots=True)
+class TimeWindow:
+    start: datetime
+    end: datetime
+
+
+def lock_charging_point(db: Session, charging_point_id: str) -> None:
+    """Serialise bookings of the charging point until the transaction ends"""
+    db.execute(select(func.pg_advisory_xact_lock(func.hashtext(charging_point_id))))
+
+
+def find_conflicts(
+    db: Session, charging_point_id: str, windows: Sequence[TimeWindow]
+) -> list[list[TimeWindow]]:
+    """Active reservations of the point overlapping each window.
+
+    All windows are checked in one query, joining them as an unnested array
+    against the reservations. Returns one list per window, in order.
+    """
+    conflicts: list[list[TimeWindow]] = [[] for _ in windows]
+    if not windows:
+        return conflicts
+
+    requested = (
+        func.unnest(
+            bindparam("starts", [w.start for w in windows], type_=TIMESTAMPS),
+            bindparam("ends", [w.end for w in windows], type_=TIMESTAMPS),
+        )
+        .table_valued("start_time", "end_time", with_ordinality="position")
+        .render_derived(name="requested")
+    )
+    rows = db.execute(
+        select(requested.c.position, Reservation.start_time, Reservation.end_time)
+        .join(
+            Reservation,
+            (Reservation.charging_point_id == charging_point_id)
+            & (Reservation.status == ReservationStatus.ACTIVE)
+            & (Reservation.start_time < requested.c.end_time)
+            & (Reservation.end_time > requested.c.start_time),
+        )
+        .order_by(requested.c.position, Reservation.start_time)
+    )
+    for position, start, end in rows:
+        conflicts[position - 1].append(TimeWindow(start, end))
+    return conflicts
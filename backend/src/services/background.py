@@ -0,0 +1,124 @@
+"""Periodic background jobs.
+
+Every worker starts them, but only one worker of all those sharing the
+primary database runs them: the one holding a session-level advisory lock on
+a connection of its own. The others try to take the lock every
+`BACKGROUND_JOBS_RETRY_SECONDS`, so the jobs move on when their worker stops
+or loses its connection. The jobs stay safe to run concurrently, since a
+worker that lost its connection may still be finishing a round.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Callable
+
+from sqlalchemy import Connection, Engine, text
+
+from src.database import engine
+
+logger = logging.getLogger(__name__)
+
+# First key of the advisory lock held by the worker running the jobs, next to
+# the namespaces in src/services/charging_point.py and src/services/usage.py
+BACKGROUND_JOBS_LOCK_NAMESPACE = 4
+BACKGROUND_JOBS_RETRY_SECONDS = float(os.getenv("BACKGROUND_JOBS_RETRY_SECONDS", "30"))
+
+# Name, interval in seconds and function of a periodic job
+Job = tuple[str, float, Callable[[], object]]
+
+
+async def run_periodically(name: str, interval: float, func: Callable[[], object]):
+    """Run a job every `interval` seconds.
+
+    Coroutine functions run on the event loop, anything else in a worker
+    thread.
+    """
+    while True:
+        try:
+            if asyncio.iscoroutinefunction(func):
+                await func()
+            else:
+                await asyncio.to_thread(func)
+        except Exception:
+            logger.exception(f"Background job {name} failed")
+        await asyncio.sleep(interval)
+
+
+class JobLeader:
+    def __init__(
+        self,
+        engine: Engine = engine,
+        retry_seconds: float = BACKGROUND_JOBS_RETRY_SECONDS,
+    ):
+        self.engine = engine
+        self.retry_seconds = retry_seconds
+        self.leading = False
+
+    def acquire(self) -> Connection | None:
+        """Connection holding the lock, or None if another worker has it"""
+        connection = self.engine.connect()
+        try:
+            acquired = connection.scalar(
+                text("SELECT pg_try_advisory_lock(:namespace, 0)"),
+                {"namespace": BACKGROUND_JOBS_LOCK_NAMESPACE},
+            )
+            # Not left idle in a transaction; the lock outlives it
+            connection.commit()
+        except Exception:
+            connection.close()
+            raise
+        if acquired:
+            return connection
+        connection.close()
+        return None
+
+    @staticmethod
+    def release(connection: Connection) -> None:
+        # Closes the database session, and so drops the lock, rather than
+        # returning the connection to the pool with the lock still held
+        connection.invalidate()
+        connection.close()
+
+    @staticmethod
+    def check(connection: Connection) -> None:
+        connection.execute(text("SELECT 1"))
+        connection.commit()
+
+    async def run(self, jobs: list[Job]) -> None:
+        """Run the jobs whenever this worker holds the lock, until cancelled"""
+        while True:
+            try:
+                connection = await asyncio.to_thread(self.acquire)
+            except Exception as e:
+                logger.warning(f"Could not take the background jobs lock: {e}")
+                connection = None
+            if connection is None:
+                await asyncio.sleep(self.retry_seconds)
+                continue
+
+            logger.info("Running the background jobs in this worker")
+            self.leading = True
+            tasks = [asyncio.create_task(run_periodically(*job)) for job in jobs]
+            try:
+                await self._hold(connection)
+            finally:
+                self.leading = False
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                await asyncio.to_thread(self.release, connection)
+
+    async def _hold(self, connection: Connection) -> None:
+        """Return once the connection holding the lock is lost"""
+        while True:
+            await asyncio.sleep(self.retry_seconds)
+            try:
+                await asyncio.to_thread(self.check, connection)
+            except Exception as e:
+                logger.warning(f"Lost the background jobs lock: {e}")
+                return
+
+
+# Singleton instance
+job_leader = JobLeader()
@@ -0,0 +1,211 @@
+"""Per-user read cache for car and reservation lookups.
+
+Keys embed the user's `cache_version`, which every write bumps in the same
+transaction as the change itself. Since each request loads the user row
+anyway, all workers see the new version right after a write, and entries
+under the old version are never read again. They age out of the LRU or expire
+in Redis, so no explicit delete is needed.
+
+The backend is an in-process LRU by default. Set `CACHE_URL=redis://host:port/db`
+to share entries between workers through any Redis-protocol server.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any
+from urllib.parse import urlparse
+
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import func
+
+from src.models.user import User
+
+logger = logging.getLogger(__name__)
+
+CACHE_URL = os.getenv("CACHE_URL")
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+
+
+class CacheBackend(ABC):
+    @abstractmethod
+    def get(self, key: str, adapter: TypeAdapter) -> Any | None: ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, adapter: TypeAdapter, ttl: int) -> None: ...
+
+
+class LRUCache(CacheBackend):
+    """Bounded in-process cache holding the objects themselves"""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, adapter: TypeAdapter) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, adapter: TypeAdapter, ttl: int) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisError(Exception):
+    pass
+
+
+class RedisCache(CacheBackend):
+    """Minimal Redis-protocol (RESP2) client storing JSON-serialised values.
+
+    Each thread keeps its own connection. Failures are logged and treated as
+    cache misses, so an unavailable server only costs the database lookups.
+    The same goes for entries that no longer validate, such as those written
+    before a schema change.
+
+    Calls block the calling thread, like the routes' own database queries, so
+    from async routes they hold up the event loop for up to `timeout` per
+    round trip. Keep the server close and the timeout short.
+    """
+
+    def __init__(self, url: str, timeout: float = 0.25):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def get(self, key: str, adapter: TypeAdapter) -> Any | None:
+        try:
+            raw = self._command("GET", key)
+            return adapter.validate_json(raw) if raw is not None else None
+        except (OSError, RedisError, ValidationError) as e:
+            logger.warning(f"Cache GET failed: {e}")
+            return None
+
+    def set(self, key: str, value: Any, adapter: TypeAdapter, ttl: int) -> None:
+        try:
+            self._command("SET", key, adapter.dump_json(value), "EX", str(ttl))
+        except (OSError, RedisError) as e:
+            logger.warning(f"Cache SET failed: {e}")
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn = (sock, sock.makefile("rb"))
+        try:
+            if self.password:
+                self._send(conn, "AUTH", self.password)
+            if self.db:
+                self._send(conn, "SELECT", str(self.db))
+        except (OSError, RedisError):
+            sock.close()
+            raise
+        # Only kept once it is usable; the next command tries again otherwise
+        self._local.conn = conn
+        return conn
+
+    def _command(self, *args: str | bytes):
+        conn = getattr(self._local, "conn", None) or self._connect()
+        try:
+            return self._send(conn, *args)
+        except OSError:
+            self._local.conn = None
+            conn[0].close()
+            raise
+
+    def _send(self, conn, *args: str | bytes):
+        sock, reader = conn
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg.encode() if isinstance(arg, str) else arg
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        sock.sendall(b"".join(parts))
+        return self._read_reply(reader)
+
+    def _read_reply(self, reader):
+        line = reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload
+        if kind == b"-":
+            raise RedisError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length == -1:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(payload)
+            if count == -1:
+                return None
+            return [self._read_reply(reader) for _ in range(count)]
+        raise RedisError(f"Unexpected reply {line!r}")
+
+
+class ReadCache:
+    def __init__(self, backend: CacheBackend, ttl: int = CACHE_TTL_SECONDS):
+        self.backend = backend
+        self.ttl = ttl
+
+    @staticmethod
+    def key(user: User, *parts: object) -> str:
+        return ":".join(map(str, (user.id, user.cache_version, *parts)))
+
+    def get(self, user: User, *parts: object, adapter: TypeAdapter) -> Any | None:
+        return self.backend.get(self.key(user, *parts), adapter)
+
+    def set(self, user: User, *parts: object, value: Any, adapter: TypeAdapter):
+        self.backend.set(self.key(user, *parts), value, adapter, self.ttl)
+
+    @staticmethod
+    def invalidate_user(user: User) -> None:
+        """Bump the user's cache version as part of the pending transaction.
+
+        Also records the write time, which keeps the user's reads off replicas
+        that have not applied it yet.
+        """
+        user.cache_version = User.cache_version + 1
+        user.last_write_at = func.now()
+
+
+def create_backend(url: str | None = CACHE_URL) -> CacheBackend:
+    if url and url.startswith("redis://"):
+        return RedisCache(url)
+    return LRUCache()
+
+
+# Singleton instance
+read_cache = ReadCache(create_backend())
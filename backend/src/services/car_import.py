@@ -0,0 +1,97 @@
+"""Bulk import of cars from a JSON array or a CSV file.
+
+The route validates every row before anything is written. A valid import is
+written with multi-row `INSERT ... RETURNING` statements in the caller's
+transaction, so either every car is created or none is.
+
+CSV files have a header row with the `CarCreateRequest` field names. Connector
+types are separated by `;` within their cell, and empty cells are treated as
+missing so that defaults apply.
+"""
+
+import csv
+import io
+import json
+import os
+import uuid
+from enum import StrEnum
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from src.models.car import Car, connector_mask
+
+# Nine parameters per row; psycopg allows at most 65535 per statement
+CAR_IMPORT_MAX_ROWS = int(os.getenv("CAR_IMPORT_MAX_ROWS", "5000"))
+
+CSV_CONNECTOR_SEPARATOR = ";"
+
+
+class ImportFormat(StrEnum):
+    JSON = "json"
+    CSV = "csv"
+
+    @classmethod
+    def from_content_type(cls, content_type: str | None) -> "ImportFormat | None":
+        media_type = (content_type or "").split(";")[0].strip().lower()
+        return {"application/json": cls.JSON, "text/csv": cls.CSV}.get(media_type)
+
+
+def read_rows(body: bytes, import_format: ImportFormat) -> list[dict]:
+    """Raw rows of an import file, raising ValueError if it cannot be read"""
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise ValueError("file is not UTF-8 encoded")
+
+    if import_format == ImportFormat.JSON:
+        try:
+            rows = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"invalid JSON: {e}")
+        if not isinstance(rows, list):
+            raise ValueError("expected a JSON array of cars")
+        return rows
+
+    reader = csv.DictReader(io.StringIO(text, newline=""))
+    try:
+        records = list(reader)
+    except csv.Error as e:
+        raise ValueError(f"invalid CSV: {e}")
+    rows = []
+    for record in records:
+        row = {
+            field: value.strip()
+            for field, value in record.items()
+            if field is not None and value and value.strip()
+        }
+        if "connector_types" in row:
+            row["connector_types"] = [
+                value.strip()
+                for value in row["connector_types"].split(CSV_CONNECTOR_SEPARATOR)
+                if value.strip()
+            ]
+        rows.append(row)
+    return rows
+
+
+def insert_cars(db: Session, user_id: uuid.UUID, values: list[dict]) -> list[Car]:
+    """Insert validated cars in input order without committing.
+
+    `values` hold the column values of each car, with canonical connector
+    types. Bulk inserts bypass the ORM's validators and version counter, so the
+    mask, version and ids are filled in here.
+    """
+    rows = [
+        {
+            **row,
+            "id": uuid.uuid4(),
+            "connector_mask": connector_mask(row["connector_types"]),
+            "version": 1,
+            "user_id": user_id,
+        }
+        for row in values
+    ]
+    return list(
+        db.scalars(insert(Car).returning(Car, sort_by_parameter_order=True), rows)
+    )
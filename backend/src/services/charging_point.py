@@ -1,9 +1,31 @@
 import os
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
 
 import httpx
-from pydantic import BaseModel
+from pydantic import AwareDatetime, BaseModel, Field
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
 
+from src.database import SessionLocal
 from src.models.car import ConnectorType
+from src.models.charging_point_status import ChargingPointStatus
+from src.services.cache import LRUCache
+from src.services.upstreams import upstream_clients
+from src.services.usage import StatusInterval, usage_rollup
+
+# How long a stored status is trusted without a newer event
+STATUS_TTL = timedelta(
+    seconds=int(os.getenv("CHARGING_POINT_STATUS_TTL_SECONDS", "900"))
+)
+# How long a worker serves a status from memory before re-reading the table.
+# Events reach only one worker, so this bounds how stale the others can be.
+SNAPSHOT_TTL_SECONDS = int(os.getenv("CHARGING_POINT_SNAPSHOT_TTL_SECONDS", "5"))
+# First key of the advisory locks taken while applying status events
+STATUS_LOCK_NAMESPACE = 1
 
 
 class ChargingPoint(BaseModel):
@@ -15,24 +37,189 @@ class ChargingPoint(BaseModel):
     status: str
 
 
+class ChargingPointStatusEvent(BaseModel):
+    charging_point_id: str = Field(min_length=1, max_length=255)
+    status: str = Field(min_length=1, max_length=50)
+    observed_at: AwareDatetime
+
+
+def lock_status_updates(db: Session, charging_point_ids: Iterable[str]) -> None:
+    """Serialise status updates of the points until the transaction ends.
+
+    Taken in key order, so batches sharing points cannot deadlock. Kept apart
+    from the booking locks by their two-key form.
+    """
+    db.execute(
+        text(
+            """
+            SELECT pg_advisory_xact_lock(:namespace, key)
+            FROM (
+                SELECT DISTINCT hashtext(id) AS key
+                FROM unnest(CAST(:ids AS text[])) AS id
+                ORDER BY key
+            ) AS keys
+            """
+        ),
+        {"namespace": STATUS_LOCK_NAMESPACE, "ids": list(charging_point_ids)},
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class KnownStatus:
+    status: str
+    observed_at: datetime
+
+
 class ChargingPointService:
     def __init__(self, base_url: str | None = None):
         self.base_url = base_url or os.getenv(
             "CHARGING_POINTS_URL", "http://localhost:8081"
         )
+        self.snapshot = LRUCache()
+        upstream_clients.register("charging_points", self.base_url)
 
     async def get_charging_point(self, charging_point_id: str) -> ChargingPoint | None:
         """Get charging point status from external API"""
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f"{self.base_url}/api/v1/charging-points/{charging_point_id}"
-                )
-                response.raise_for_status()
-                data = response.json()
-                return ChargingPoint(**data)
-            except httpx.HTTPError:
-                return None
+        try:
+            response = await upstream_clients.client("charging_points").get(
+                f"{self.base_url}/api/v1/charging-points/{charging_point_id}"
+            )
+            response.raise_for_status()
+            data = response.json()
+            return ChargingPoint(**data)
+        except httpx.HTTPError:
+            return None
+
+    async def get_status(self, db: Session, charging_point_id: str) -> str | None:
+        """Current status from pushed events, pulled from the API if unknown or old"""
+        known = self.snapshot.get(charging_point_id, adapter=None)
+        if known is None:
+            known = self._load_status(db, charging_point_id)
+
+        now = datetime.now(timezone.utc)
+        if known is not None and known.observed_at > now - STATUS_TTL:
+            return known.status
+
+        charging_point = await self.get_charging_point(charging_point_id)
+        if charging_point is None:
+            return None
+
+        # Own session, so the caller's transaction is left alone
+        with SessionLocal() as session:
+            self.apply_status_events(
+                session,
+                [
+                    ChargingPointStatusEvent(
+                        charging_point_id=charging_point_id,
+                        status=charging_point.status,
+                        observed_at=now,
+                    )
+                ],
+            )
+        return charging_point.status
+
+    def _load_status(self, db: Session, charging_point_id: str) -> KnownStatus | None:
+        row = db.execute(
+            select(ChargingPointStatus.status, ChargingPointStatus.observed_at).where(
+                ChargingPointStatus.charging_point_id == charging_point_id
+            )
+        ).first()
+        if row is None:
+            return None
+
+        known = KnownStatus(row.status, row.observed_at)
+        self.snapshot.set(
+            charging_point_id, known, adapter=None, ttl=SNAPSHOT_TTL_SECONDS
+        )
+        return known
+
+    def apply_status_events(
+        self, db: Session, events: Iterable[ChargingPointStatusEvent]
+    ) -> list[ChargingPointStatusEvent]:
+        """Store the newest event per charging point and return those that applied.
+
+        Events older than the stored status are ignored, so batches may arrive
+        out of order or more than once. Each transition closes an interval of
+        the previous status, which goes into the usage rollup.
+        """
+        by_point: dict[str, list[ChargingPointStatusEvent]] = defaultdict(list)
+        for event in events:
+            by_point[event.charging_point_id].append(event)
+        if not by_point:
+            return []
+
+        # Concurrent batches for the same points queue here, so each
+        # transition is seen exactly once. An advisory lock also covers points
+        # without a stored status yet, which have no row to lock.
+        lock_status_updates(db, by_point)
+        stored = db.execute(
+            select(
+                ChargingPointStatus.charging_point_id,
+                ChargingPointStatus.status,
+                ChargingPointStatus.observed_at,
+            ).where(ChargingPointStatus.charging_point_id.in_(sorted(by_point)))
+        ).all()
+        previous = {
+            row.charging_point_id: KnownStatus(row.status, row.observed_at)
+            for row in stored
+        }
+
+        latest: dict[str, ChargingPointStatusEvent] = {}
+        intervals = []
+        for charging_point_id, point_events in by_point.items():
+            known = previous.get(charging_point_id)
+            for event in sorted(point_events, key=lambda e: e.observed_at):
+                if known is not None:
+                    if event.observed_at <= known.observed_at:
+                        continue
+                    intervals.append(
+                        StatusInterval(
+                            charging_point_id,
+                            known.status,
+                            known.observed_at,
+                            event.observed_at,
+                        )
+                    )
+                known = KnownStatus(event.status, event.observed_at)
+                latest[charging_point_id] = event
+        if not latest:
+            db.commit()
+            return []
+
+        now = datetime.now(timezone.utc)
+        stmt = insert(ChargingPointStatus).values(
+            [
+                {
+                    "charging_point_id": event.charging_point_id,
+                    "status": event.status,
+                    "observed_at": event.observed_at,
+                    "updated_at": now,
+                }
+                for event in latest.values()
+            ]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ChargingPointStatus.charging_point_id],
+            set_={
+                "status": stmt.excluded.status,
+                "observed_at": stmt.excluded.observed_at,
+                "updated_at": stmt.excluded.updated_at,
+            },
+            where=ChargingPointStatus.observed_at < stmt.excluded.observed_at,
+        ).returning(ChargingPointStatus.charging_point_id)
+
+        applied = [latest[id] for id in db.scalars(stmt).all()]
+        usage_rollup.record_status_intervals(db, intervals)
+        db.commit()
+
+        for event in applied:
+            self.snapshot.set(
+                event.charging_point_id,
+                KnownStatus(event.status, event.observed_at),
+                adapter=None,
+                ttl=SNAPSHOT_TTL_SECONDS,
+            )
+        return applied
 
 
 # Singleton instance
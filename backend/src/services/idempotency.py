@@ -0,0 +1,212 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from src.database import SessionLocal
+from src.models.idempotency_key import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+# How long a completed response is replayed
+RESPONSE_TTL = timedelta(hours=int(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24")))
+# How long an in-flight request holds its key before another may take over
+IN_FLIGHT_TIMEOUT = timedelta(
+    seconds=int(os.getenv("IDEMPOTENCY_IN_FLIGHT_TIMEOUT_SECONDS", "60"))
+)
+# How long a duplicate waits for the first request to finish
+WAIT_TIMEOUT = float(os.getenv("IDEMPOTENCY_WAIT_TIMEOUT_SECONDS", "30"))
+
+REPLAY_HEADER = "Idempotent-Replayed"
+
+
+def _canonical(value):
+    """The value with sets sorted, as their order varies between processes"""
+    if isinstance(value, dict):
+        return {name: _canonical(item) for name, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((_canonical(item) for item in value), key=str)
+    return value
+
+
+def request_fingerprint(route: str, payload: BaseModel) -> str:
+    body = json.dumps(
+        jsonable_encoder(_canonical(payload.model_dump())),
+        sort_keys=True,
+        separators=(",", ":"),
+    ).encode()
+    return hashlib.sha256(route.encode() + b"\n" + body).hexdigest()
+
+
+class IdempotencyService:
+    """Replay stored responses for retried POSTs carrying an Idempotency-Key"""
+
+    def __init__(self):
+        # Lets duplicates in this worker wake up as soon as the first finishes;
+        # duplicates in other workers poll the table instead
+        self._finished: dict[tuple[uuid.UUID, str], asyncio.Event] = {}
+
+    async def run(
+        self,
+        db: Session,
+        user_id: uuid.UUID,
+        key: str | None,
+        route: str,
+        payload: BaseModel,
+        handler: Callable[[], Awaitable[BaseModel]],
+        status_code: int = status.HTTP_200_OK,
+    ):
+        """Run the handler once per user and key, replaying its response after.
+
+        The handler leaves its writes uncommitted. They are committed here,
+        together with the stored response, so a worker that dies midway
+        leaves either both or neither, and a retry never repeats a write
+        whose response was lost. Writes a handler commits elsewhere, such as
+        on a reservation shard, are outside that transaction.
+        """
+        if not key:
+            result = await handler()
+            db.commit()
+            return result
+
+        fingerprint = request_fingerprint(route, payload)
+        deadline = asyncio.get_running_loop().time() + WAIT_TIMEOUT
+
+        while not self._claim(db, user_id, key, fingerprint):
+            stored = db.get(IdempotencyKey, (user_id, key), populate_existing=True)
+            if stored is None:
+                continue  # released by a failed first attempt, try to claim it
+            if stored.request_fingerprint != fingerprint:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key was already used for a different request",
+                )
+            if stored.response_status is not None:
+                return JSONResponse(
+                    content=stored.response_body,
+                    status_code=stored.response_status,
+                    headers={REPLAY_HEADER: "true"},
+                )
+            if not await self._wait(user_id, key, deadline):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is still in progress",
+                )
+
+        event = self._finished.setdefault((user_id, key), asyncio.Event())
+        try:
+            result = await handler()
+            self._complete(db, user_id, key, status_code, jsonable_encoder(result))
+            db.commit()
+            return result
+        except BaseException:
+            self._release(db, user_id, key)
+            raise
+        finally:
+            event.set()
+            self._finished.pop((user_id, key), None)
+
+    def _claim(
+        self, db: Session, user_id: uuid.UUID, key: str, fingerprint: str
+    ) -> bool:
+        """Insert the key as in flight, or take over one whose holder expired"""
+        now = datetime.now(timezone.utc)
+        stmt = insert(IdempotencyKey).values(
+            user_id=user_id,
+            key=key,
+            request_fingerprint=fingerprint,
+            created_at=now,
+            expires_at=now + IN_FLIGHT_TIMEOUT,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[IdempotencyKey.user_id, IdempotencyKey.key],
+            set_={
+                "request_fingerprint": stmt.excluded.request_fingerprint,
+                "response_status": None,
+                "response_body": None,
+                "created_at": stmt.excluded.created_at,
+                "expires_at": stmt.excluded.expires_at,
+            },
+            where=IdempotencyKey.expires_at < now,
+        ).returning(IdempotencyKey.key)
+
+        claimed = db.execute(stmt).first() is not None
+        db.commit()
+        return claimed
+
+    async def _wait(self, user_id: uuid.UUID, key: str, deadline: float) -> bool:
+        """Wait for the in-flight request to finish; False once out of time"""
+        loop = asyncio.get_running_loop()
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return False
+
+        event = self._finished.get((user_id, key))
+        if event is not None:
+            try:
+                await asyncio.wait_for(event.wait(), timeout=remaining)
+            except TimeoutError:
+                return False
+        else:
+            await asyncio.sleep(min(0.1, remaining))
+        return True
+
+    def _complete(
+        self,
+        db: Session,
+        user_id: uuid.UUID,
+        key: str,
+        status_code: int,
+        body: dict | list,
+    ) -> None:
+        """Store the response in the pending transaction"""
+        stored = db.get(IdempotencyKey, (user_id, key), populate_existing=True)
+        if stored is None:
+            return
+        stored.response_status = status_code
+        stored.response_body = body
+        stored.expires_at = datetime.now(timezone.utc) + RESPONSE_TTL
+
+    def _release(self, db: Session, user_id: uuid.UUID, key: str) -> None:
+        """Forget a failed attempt so that a retry runs the request again"""
+        db.rollback()
+        db.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.key == key,
+                IdempotencyKey.response_status.is_(None),
+            )
+        )
+        db.commit()
+
+
+def purge_expired_idempotency_keys() -> int:
+    """Delete stored responses past their TTL and abandoned in-flight keys"""
+    with SessionLocal() as db:
+        result = db.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.expires_at < datetime.now(timezone.utc)
+            )
+        )
+        db.commit()
+    if result.rowcount:
+        logger.info(f"Purged {result.rowcount} expired idempotency keys")
+    return result.rowcount
+
+
+# Singleton instance
+idempotency_service = IdempotencyService()
@@ -0,0 +1,270 @@
+"""Transactional outbox for reservation events sent to the charging-point provider.
+
+Every change to a reservation writes an `outbox` row in the same transaction,
+on the same database (with shards, the point's shard), so an event exists
+exactly when its change is committed. The provider is never called while a
+booking waits.
+
+The dispatcher runs in every worker. It claims due events with SKIP LOCKED,
+leases them by pushing `next_attempt_at` ahead by `OUTBOX_LEASE_SECONDS`,
+and commits before calling the provider, so no locks are held during the
+call. A batch is posted in one request. If it succeeds, its events are
+marked delivered. If it fails, they are retried with exponential backoff
+until `OUTBOX_MAX_ATTEMPTS` is reached. A dispatcher that dies only delays
+its batch until the lease runs out.
+
+Delivery is at least once and not ordered across batches. Each event
+carries its id for deduplication and the reservation's state with its
+`updated_at`, so the provider keeps the newest state per reservation.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+
+import httpx
+from pydantic import BaseModel
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from src.admission.limits import Overloaded
+from src.database import SessionLocal
+from src.instrumentation.metrics import OUTBOX_BACKLOG, OUTBOX_DISPATCH_LATENCY
+from src.models.outbox_event import OutboxEvent
+from src.models.reservation import Reservation, ReservationStatus
+from src.services.charging_point import charging_point_service
+from src.services.sharding import reservation_shards
+from src.services.upstreams import upstream_clients
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_DISPATCH_ENABLED = os.getenv("OUTBOX_DISPATCH_ENABLED", "true").lower() == "true"
+OUTBOX_EVENTS_URL = os.getenv(
+    "OUTBOX_EVENTS_URL",
+    f"{charging_point_service.base_url}/api/v1/reservation-events",
+)
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+# Pause between passes that found less than a full batch
+OUTBOX_POLL_INTERVAL_SECONDS = float(os.getenv("OUTBOX_POLL_INTERVAL_SECONDS", "1"))
+# Must exceed the time a batch takes to post
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "30"))
+OUTBOX_BACKOFF_BASE_SECONDS = float(os.getenv("OUTBOX_BACKOFF_BASE_SECONDS", "1"))
+OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "300"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "20"))
+# Delivered events are kept this long
+OUTBOX_RETENTION = timedelta(hours=int(os.getenv("OUTBOX_RETENTION_HOURS", "24")))
+
+EVENT_TYPES = {
+    ReservationStatus.ACTIVE: "reservation.booked",
+    ReservationStatus.CANCELLED: "reservation.cancelled",
+    ReservationStatus.COMPLETED: "reservation.completed",
+}
+
+upstream_clients.register("reservation_events", OUTBOX_EVENTS_URL)
+
+
+class ReservationEvent(BaseModel):
+    """Body of an event, as the provider receives it"""
+
+    event_id: uuid.UUID
+    event_type: str
+    reservation_id: uuid.UUID
+    charging_point_id: str
+    status: ReservationStatus
+    start_time: datetime
+    end_time: datetime
+    # The reservation's updated_at; the newest state wins
+    occurred_at: datetime
+
+
+@dataclass(slots=True)
+class Claimed:
+    id: uuid.UUID
+    payload: dict
+    created_at: datetime
+
+
+def record_reservation_events(db: Session, reservations: Iterable[Reservation]) -> None:
+    """Add an event with the current state of each reservation to the session.
+
+    Pass the session the reservations are written through. It is flushed
+    first, so new reservations have their ids and timestamps.
+    """
+    reservations = list(reservations)
+    if not reservations:
+        return
+    db.flush()
+    for reservation in reservations:
+        event = ReservationEvent(
+            event_id=uuid.uuid4(),
+            event_type=EVENT_TYPES[reservation.status],
+            reservation_id=reservation.id,
+            charging_point_id=reservation.charging_point_id,
+            status=reservation.status,
+            start_time=reservation.start_time,
+            end_time=reservation.end_time,
+            occurred_at=reservation.updated_at,
+        )
+        db.add(
+            OutboxEvent(
+                id=event.event_id,
+                event_type=event.event_type,
+                aggregate_id=reservation.id,
+                payload=event.model_dump(mode="json"),
+            )
+        )
+
+
+class OutboxDispatcher:
+    def __init__(
+        self,
+        url: str = OUTBOX_EVENTS_URL,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+    ):
+        self.url = url
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+
+    @staticmethod
+    def databases() -> dict[str, sessionmaker]:
+        """Where outbox events are written: the shards if there are any"""
+        if reservation_shards.enabled:
+            return reservation_shards.sessions
+        return {"primary": SessionLocal}
+
+    @staticmethod
+    def backoff(attempts: int) -> timedelta:
+        """Delay before the next attempt, with jitter"""
+        delay = min(
+            OUTBOX_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1),
+            OUTBOX_BACKOFF_MAX_SECONDS,
+        )
+        return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+    def claim(self, name: str, factory: sessionmaker) -> list[Claimed]:
+        """Lease a batch of due events and update the backlog gauge"""
+        now = datetime.now(timezone.utc)
+        with factory() as db:
+            events = db.scalars(
+                select(OutboxEvent)
+                .where(
+                    OutboxEvent.delivered_at.is_(None),
+                    OutboxEvent.next_attempt_at <= now,
+                    OutboxEvent.attempts < self.max_attempts,
+                )
+                .order_by(OutboxEvent.next_attempt_at)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            ).all()
+            for event in events:
+                event.attempts += 1
+                event.next_attempt_at = now + timedelta(seconds=OUTBOX_LEASE_SECONDS)
+
+            exhausted = OutboxEvent.attempts >= self.max_attempts
+            pending, failed = db.execute(
+                select(
+                    func.count().filter(~exhausted), func.count().filter(exhausted)
+                ).where(OutboxEvent.delivered_at.is_(None))
+            ).one()
+            claimed = [Claimed(e.id, e.payload, e.created_at) for e in events]
+            db.commit()
+
+        OUTBOX_BACKLOG.set(pending, name, "pending")
+        OUTBOX_BACKLOG.set(failed, name, "failed")
+        return claimed
+
+    def complete(
+        self, factory: sessionmaker, claimed: list[Claimed], error: str | None
+    ) -> None:
+        """Mark the batch delivered, or schedule its retry"""
+        now = datetime.now(timezone.utc)
+        ids = [c.id for c in claimed]
+        with factory() as db:
+            if error is None:
+                db.execute(
+                    update(OutboxEvent)
+                    .where(OutboxEvent.id.in_(ids))
+                    .values(delivered_at=now, last_error=None)
+                )
+            else:
+                for event in db.scalars(
+                    select(OutboxEvent).where(OutboxEvent.id.in_(ids))
+                ):
+                    event.next_attempt_at = now + self.backoff(event.attempts)
+                    event.last_error = error
+                    if event.attempts >= self.max_attempts:
+                        logger.error(
+                            f"Giving up on outbox event {event.id} after "
+                            f"{event.attempts} attempts: {error}"
+                        )
+            db.commit()
+
+        if error is None:
+            for c in claimed:
+                OUTBOX_DISPATCH_LATENCY.observe((now - c.created_at).total_seconds())
+
+    async def post(self, claimed: list[Claimed]) -> str | None:
+        """Send a batch to the provider; returns the error, if any"""
+        try:
+            response = await upstream_clients.client("reservation_events").post(
+                self.url, json={"events": [c.payload for c in claimed]}
+            )
+            response.raise_for_status()
+            return None
+        except (httpx.HTTPError, Overloaded) as e:
+            # httpx appends a documentation link on a second line
+            return f"{type(e).__name__}: {str(e).splitlines()[0]}"[:500]
+
+    async def dispatch(self) -> int:
+        """One pass over every database; returns the largest batch sent"""
+        largest = 0
+        for name, factory in self.databases().items():
+            claimed = await asyncio.to_thread(self.claim, name, factory)
+            if not claimed:
+                continue
+            error = await self.post(claimed)
+            if error is not None:
+                logger.warning(
+                    f"Could not deliver {len(claimed)} outbox events: {error}"
+                )
+            await asyncio.to_thread(self.complete, factory, claimed, error)
+            largest = max(largest, len(claimed))
+        return largest
+
+    async def run(self) -> None:
+        """Dispatch until cancelled, without pausing while batches are full"""
+        while True:
+            try:
+                largest = await self.dispatch()
+            except Exception:
+                logger.exception("Outbox dispatch failed")
+                largest = 0
+            if largest < self.batch_size:
+                await asyncio.sleep(OUTBOX_POLL_INTERVAL_SECONDS)
+
+    def purge_delivered(self) -> int:
+        """Delete events delivered longer than the retention time ago"""
+        cutoff = datetime.now(timezone.utc) - OUTBOX_RETENTION
+        purged = 0
+        for factory in self.databases().values():
+            with factory() as db:
+                purged += db.execute(
+                    delete(OutboxEvent).where(OutboxEvent.delivered_at < cutoff)
+                ).rowcount
+                db.commit()
+        return purged
+
+
+# Singleton instance
+outbox_dispatcher = OutboxDispatcher()
+
+
+def purge_delivered_outbox_events() -> None:
+    """Background job entry point"""
+    outbox_dispatcher.purge_delivered()
@@ -0,0 +1,140 @@
+"""Startup warm-up and the readiness probe.
+
+`/health` only says the process is serving. `/ready` says it should get
+traffic: it answers 503 until warm-up has finished, and after that as long
+as the primary database and every reservation shard answer. Those checks are
+cached for `READINESS_CACHE_SECONDS`, so frequent probes cost at most one
+round of queries per interval.
+
+Warm-up runs in the background once the worker starts. It configures the
+ORM mappers, opens `DATABASE_WARM_CONNECTIONS` pooled connections to the
+primary (one to each replica and shard) and compiles the hot statements on
+them, and opens keep-alive connections to the upstream APIs. Upstream
+failures are logged and reported, but do not hold readiness back.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from contextlib import ExitStack
+
+from sqlalchemy import Engine, text
+from sqlalchemy.orm import Session, configure_mappers
+
+from src import queries
+from src.database import engine, replica_engines
+from src.instrumentation.context import request_stats
+from src.services.sharding import reservation_shards
+from src.services.upstreams import upstream_clients
+
+logger = logging.getLogger(__name__)
+
+WARM_UP_ENABLED = os.getenv("WARM_UP_ENABLED", "true").lower() == "true"
+# Capped at the pool size
+DATABASE_WARM_CONNECTIONS = int(os.getenv("DATABASE_WARM_CONNECTIONS", "5"))
+READINESS_CACHE_SECONDS = float(os.getenv("READINESS_CACHE_SECONDS", "5"))
+
+
+def warm_statements(db: Session) -> None:
+    """Compile the per-request statements and run them once on the connection"""
+    nobody = uuid.UUID(int=0)
+    for stmt in (
+        queries.user_by_external_id(-1),
+        queries.cars_of_user(nobody),
+        queries.car_version(nobody, nobody),
+        queries.reservations_of_user(nobody),
+        queries.reservation_of_user(nobody, nobody),
+        queries.reservation_updated_at(nobody, nobody),
+    ):
+        db.execute(stmt).all()
+
+
+def warm_database(connections: int = DATABASE_WARM_CONNECTIONS) -> None:
+    """Fill the primary's pool, and open one connection to every other engine"""
+    configure_mappers()
+    connections = min(connections, engine.pool.size())
+    with ExitStack() as stack:
+        # Held together, so the pool opens a new connection for each
+        for _ in range(connections):
+            connection = stack.enter_context(engine.connect())
+            with Session(bind=connection) as db:
+                warm_statements(db)
+    for other in [*replica_engines, *reservation_shards.engines.values()]:
+        with other.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+
+def ping(target: Engine) -> str:
+    try:
+        with target.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        return "ok"
+    except Exception as e:
+        logger.warning(f"Readiness check of {target.url} failed: {e}")
+        return type(e).__name__
+
+
+class Readiness:
+    def __init__(self, cache_seconds: float = READINESS_CACHE_SECONDS):
+        self.cache_seconds = cache_seconds
+        self.warmed_up = False
+        self.upstreams: dict[str, str] = {}
+        self._checks: dict[str, str] = {}
+        self._checked_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    async def warm_up(self, enabled: bool = WARM_UP_ENABLED) -> None:
+        """Warm up the database and upstream connections, then report ready"""
+        if enabled:
+            start = time.perf_counter()
+            database, self.upstreams = await asyncio.gather(
+                asyncio.to_thread(warm_database),
+                upstream_clients.warm_up(),
+                return_exceptions=True,
+            )
+            if isinstance(database, Exception):
+                # /ready reports the database through its own check
+                logger.warning(f"Database warm-up failed: {database}")
+            if isinstance(self.upstreams, Exception):
+                self.upstreams = {}
+            logger.info(f"Warm-up took {time.perf_counter() - start:.3f}s")
+        self.warmed_up = True
+
+    def _run_checks(self) -> dict[str, str]:
+        # Not part of the probe request's own statements
+        token = request_stats.set(None)
+        try:
+            checks = {"database": ping(engine)}
+            for name, shard in reservation_shards.engines.items():
+                checks[f"shard:{name}"] = ping(shard)
+            return checks
+        finally:
+            request_stats.reset(token)
+
+    async def checks(self) -> dict[str, str]:
+        """Dependency checks, run again once they are older than the cache time"""
+        if time.monotonic() - self._checked_at >= self.cache_seconds:
+            async with self._lock:
+                # Concurrent probes wait for one round instead of running their own
+                if time.monotonic() - self._checked_at >= self.cache_seconds:
+                    self._checks = await asyncio.to_thread(self._run_checks)
+                    self._checked_at = time.monotonic()
+        return self._checks
+
+    async def status(self) -> tuple[bool, dict]:
+        """Whether the worker is ready, and the details for the probe response"""
+        if not self.warmed_up:
+            return False, {"status": "starting"}
+        checks = await self.checks()
+        ready = all(result == "ok" for result in checks.values())
+        return ready, {
+            "status": "ready" if ready else "unavailable",
+            "checks": checks,
+            "upstreams": self.upstreams,
+        }
+
+
+# Singleton instance
+readiness = Readiness()
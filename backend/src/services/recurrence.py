@@ -0,0 +1,136 @@
+"""The RRULE subset used by recurring reservations.
+
+Supported parts are `FREQ` (DAILY or WEEKLY), `INTERVAL`, `BYDAY` (weekly
+only, plain weekday codes), `COUNT` and `UNTIL` (a UTC date or date-time),
+for example `FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR`. Occurrences keep the local
+wall-clock time of the first one in the series' time zone, so they stay at
+08:00 across daylight saving changes.
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from enum import StrEnum
+from typing import Iterator
+from zoneinfo import ZoneInfo
+
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+
+class Frequency(StrEnum):
+    DAILY = "DAILY"
+    WEEKLY = "WEEKLY"
+
+
+def _parse_until(value: str) -> datetime:
+    for pattern in ("%Y%m%dT%H%M%SZ", "%Y%m%d"):
+        try:
+            parsed = datetime.strptime(value, pattern)
+        except ValueError:
+            continue
+        if pattern == "%Y%m%d":
+            # A date includes the whole day
+            parsed += timedelta(days=1) - timedelta(microseconds=1)
+        return parsed.replace(tzinfo=timezone.utc)
+    raise ValueError(f"UNTIL must be YYYYMMDD or YYYYMMDDTHHMMSSZ, not {value!r}")
+
+
+@dataclass(frozen=True, slots=True)
+class Recurrence:
+    frequency: Frequency
+    interval: int = 1
+    # Weekday numbers, Monday being 0
+    by_day: tuple[int, ...] = ()
+    count: int | None = None
+    until: datetime | None = None
+
+    @classmethod
+    def parse(cls, rule: str) -> "Recurrence":
+        """Parse a rule, raising ValueError for anything outside the subset"""
+        parts = {}
+        for part in rule.strip().upper().removeprefix("RRULE:").split(";"):
+            name, separator, value = part.partition("=")
+            if not separator or not value:
+                raise ValueError(f"Malformed rule part {part!r}")
+            if name in parts:
+                raise ValueError(f"{name} is given twice")
+            parts[name] = value
+
+        unsupported = set(parts) - {"FREQ", "INTERVAL", "BYDAY", "COUNT", "UNTIL"}
+        if unsupported:
+            raise ValueError(
+                f"Unsupported rule parts: {', '.join(sorted(unsupported))}"
+            )
+        if "FREQ" not in parts:
+            raise ValueError("FREQ is required")
+        try:
+            frequency = Frequency(parts["FREQ"])
+        except ValueError:
+            raise ValueError("FREQ must be DAILY or WEEKLY")
+        if "COUNT" in parts and "UNTIL" in parts:
+            raise ValueError("COUNT and UNTIL cannot be combined")
+
+        by_day = ()
+        if "BYDAY" in parts:
+            if frequency != Frequency.WEEKLY:
+                raise ValueError("BYDAY is only supported with FREQ=WEEKLY")
+            days = parts["BYDAY"].split(",")
+            if not set(days) <= set(WEEKDAYS):
+                raise ValueError("BYDAY takes weekday codes such as MO,WE,FR")
+            by_day = tuple(sorted({WEEKDAYS.index(day) for day in days}))
+
+        interval = int(parts.get("INTERVAL", "1"))
+        count = int(parts["COUNT"]) if "COUNT" in parts else None
+        if interval < 1 or (count is not None and count < 1):
+            raise ValueError("INTERVAL and COUNT must be positive")
+
+        return cls(
+            frequency=frequency,
+            interval=interval,
+            by_day=by_day,
+            count=count,
+            until=_parse_until(parts["UNTIL"]) if "UNTIL" in parts else None,
+        )
+
+    def __str__(self) -> str:
+        parts = [f"FREQ={self.frequency}"]
+        if self.interval != 1:
+            parts.append(f"INTERVAL={self.interval}")
+        if self.by_day:
+            parts.append("BYDAY=" + ",".join(WEEKDAYS[day] for day in self.by_day))
+        if self.count is not None:
+            parts.append(f"COUNT={self.count}")
+        if self.until is not None:
+            parts.append(f"UNTIL={self.until:%Y%m%dT%H%M%SZ}")
+        return ";".join(parts)
+
+    def _days(self, first_day: date) -> Iterator[date]:
+        if self.frequency == Frequency.DAILY:
+            day = first_day
+            while True:
+                yield day
+                day += timedelta(days=self.interval)
+
+        by_day = self.by_day or (first_day.weekday(),)
+        week = first_day - timedelta(days=first_day.weekday())
+        while True:
+            for weekday in by_day:
+                day = week + timedelta(days=weekday)
+                if day >= first_day:
+                    yield day
+            week += timedelta(weeks=self.interval)
+
+    def starts(self, first_start: datetime, tz: ZoneInfo) -> Iterator[datetime]:
+        """Start times in UTC from the first occurrence on.
+
+        Endless unless the rule has COUNT or UNTIL; callers stop at their
+        horizon.
+        """
+        local = first_start.astimezone(tz)
+        wall_time = local.time().replace(tzinfo=None)
+        for number, day in enumerate(self._days(local.date()), start=1):
+            if self.count is not None and number > self.count:
+                return
+            start = datetime.combine(day, wall_time, tzinfo=tz).astimezone(timezone.utc)
+            if self.until is not None and start > self.until:
+                return
+            yield start
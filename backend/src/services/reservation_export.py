@@ -0,0 +1,104 @@
+"""Streaming export of a user's reservation history.
+
+Rows are read through a server-side cursor in batches of `EXPORT_BATCH_SIZE`
+and written out batch by batch, so memory use does not grow with the number
+of reservations. Only plain columns are selected; no ORM objects or Pydantic
+models are built.
+"""
+
+import csv
+import io
+import json
+import os
+import uuid
+from datetime import datetime
+from enum import StrEnum
+from itertools import islice
+from typing import Iterator
+
+from sqlalchemy import select
+
+from src.models.reservation import Reservation
+from src.services.sharding import reservation_shards
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+EXPORT_COLUMNS = (
+    Reservation.id,
+    Reservation.start_time,
+    Reservation.end_time,
+    Reservation.status,
+    Reservation.charging_point_id,
+    Reservation.car_id,
+    Reservation.created_at,
+    Reservation.updated_at,
+)
+FIELD_NAMES = [column.key for column in EXPORT_COLUMNS]
+
+
+class ExportFormat(StrEnum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+    @property
+    def media_type(self) -> str:
+        return "application/x-ndjson" if self == ExportFormat.NDJSON else "text/csv"
+
+
+def _plain(value) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _ndjson_chunk(rows) -> str:
+    return "".join(
+        json.dumps(dict(zip(FIELD_NAMES, map(_plain, row)))) + "\n" for row in rows
+    )
+
+
+def _csv_chunk(rows, header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(FIELD_NAMES)
+    writer.writerows([_plain(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+
+def export_reservations(
+    user_id: uuid.UUID,
+    export_format: ExportFormat,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> Iterator[str]:
+    """Yield the user's reservations starting in [start, end), oldest first.
+
+    Opens its own sessions, one per shard, since the export outlives the
+    request's.
+    """
+    stmt = (
+        select(*EXPORT_COLUMNS)
+        .where(Reservation.user_id == user_id)
+        .order_by(Reservation.start_time, Reservation.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    if start is not None:
+        stmt = stmt.where(Reservation.start_time >= start)
+    if end is not None:
+        stmt = stmt.where(Reservation.start_time < end)
+
+    if export_format == ExportFormat.CSV:
+        yield _csv_chunk([], header=True)
+
+    with reservation_shards.open_all() as sessions:
+        # Each shard streams its rows in order; merging keeps the export sorted
+        merged = reservation_shards.merge(
+            [db.execute(stmt) for db in sessions],
+            key=lambda row: (row.start_time, row.id),
+        )
+        while rows := list(islice(merged, EXPORT_BATCH_SIZE)):
+            if export_format == ExportFormat.CSV:
+                yield _csv_chunk(rows)
+            else:
+                yield _ndjson_chunk(rows)
@@ -0,0 +1,177 @@
+"""Recurring reservations.
+
+A series turns into ordinary reservations over a rolling horizon of
+`SERIES_HORIZON_DAYS`. Its first horizon is booked when it is created, and
+`expand_due_series` extends all active series from a background job. Each
+expansion checks every new occurrence against the charging point's
+reservations in one query; clashing occurrences are skipped and reported,
+the others are booked.
+"""
+
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from src.database import SessionLocal
+from src.models.reservation import Reservation, ReservationStatus
+from src.models.reservation_series import ReservationSeries, SeriesStatus
+from src.models.user import User
+from src.services.availability import TimeWindow, find_conflicts, lock_charging_point
+from src.services.cache import read_cache
+from src.services.outbox import record_reservation_events
+from src.services.recurrence import Recurrence
+from src.services.sharding import reservation_shards
+from src.services.usage import usage_rollup
+
+logger = logging.getLogger(__name__)
+
+SERIES_HORIZON_DAYS = int(os.getenv("SERIES_HORIZON_DAYS", "28"))
+# The job extends a series once its horizon is this much shorter than the full one
+SERIES_EXPANSION_SLACK = timedelta(days=1)
+
+
+@dataclass(slots=True)
+class Occurrence:
+    start: datetime
+    end: datetime
+    # Set when the occurrence was booked
+    reservation: Reservation | None = None
+    conflicts: list[TimeWindow] = field(default_factory=list)
+
+
+class ReservationSeriesService:
+    def __init__(self, horizon: timedelta = timedelta(days=SERIES_HORIZON_DAYS)):
+        self.horizon = horizon
+
+    @staticmethod
+    def occurrences(
+        series: ReservationSeries, start: datetime, end: datetime
+    ) -> tuple[list[Occurrence], bool]:
+        """Occurrences starting in [start, end), and whether any start later"""
+        duration = timedelta(minutes=series.duration_minutes)
+        found = []
+        for occurrence_start in Recurrence.parse(series.rrule).starts(
+            series.first_start, ZoneInfo(series.timezone)
+        ):
+            if occurrence_start >= end:
+                return found, True
+            if occurrence_start >= start:
+                found.append(Occurrence(occurrence_start, occurrence_start + duration))
+        return found, False
+
+    def expand(
+        self, db: Session, series: ReservationSeries, until: datetime | None = None
+    ) -> list[Occurrence]:
+        """Book the series' occurrences up to `until`, by default the horizon.
+
+        Past occurrences are left out. Runs in the caller's transaction; with
+        shards, the reservations commit on their shard before it.
+        """
+        now = datetime.now(timezone.utc)
+        until = until or now + self.horizon
+        occurrences, more = self.occurrences(series, series.expanded_until, until)
+        occurrences = [o for o in occurrences if o.start > now]
+
+        if occurrences:
+            with reservation_shards.session_for(
+                db, series.charging_point_id
+            ) as bookings:
+                lock_charging_point(bookings, series.charging_point_id)
+                conflicts = find_conflicts(
+                    bookings,
+                    series.charging_point_id,
+                    [TimeWindow(o.start, o.end) for o in occurrences],
+                )
+                for occurrence, clashes in zip(occurrences, conflicts):
+                    occurrence.conflicts = clashes
+                    if not clashes:
+                        occurrence.reservation = Reservation(
+                            start_time=occurrence.start,
+                            end_time=occurrence.end,
+                            charging_point_id=series.charging_point_id,
+                            user_id=series.user_id,
+                            car_id=series.car_id,
+                            series_id=series.id,
+                        )
+                booked = [o.reservation for o in occurrences if o.reservation]
+                bookings.add_all(booked)
+                record_reservation_events(bookings, booked)
+                usage_rollup.record_reservations(db, booked)
+
+        series.expanded_until = until
+        if not more:
+            series.status = SeriesStatus.FINISHED
+        return occurrences
+
+    def cancel(self, db: Session, series: ReservationSeries) -> int:
+        """Cancel the series and its future occurrences, without committing.
+
+        Returns the number of reservations cancelled.
+        """
+        series.status = SeriesStatus.CANCELLED
+        with reservation_shards.session_for(db, series.charging_point_id) as bookings:
+            cancelled = bookings.scalars(
+                update(Reservation)
+                .where(
+                    Reservation.series_id == series.id,
+                    Reservation.status == ReservationStatus.ACTIVE,
+                    Reservation.start_time > datetime.now(timezone.utc),
+                )
+                .values(
+                    status=ReservationStatus.CANCELLED,
+                    updated_at=datetime.now(timezone.utc),
+                )
+                .returning(Reservation)
+            ).all()
+            record_reservation_events(bookings, cancelled)
+            usage_rollup.record_reservations(db, cancelled, sign=-1)
+        return len(cancelled)
+
+    def expand_due(self) -> int:
+        """Extend every active series whose horizon has run short.
+
+        Each series is claimed with SKIP LOCKED in its own transaction, so
+        several workers can run this at once without expanding one twice: the
+        row lock lasts until that series is committed. Returns the number
+        expanded.
+        """
+        until = datetime.now(timezone.utc) + self.horizon
+        expanded = 0
+        with SessionLocal() as db:
+            while True:
+                series = db.scalar(
+                    select(ReservationSeries)
+                    .where(
+                        ReservationSeries.status == SeriesStatus.ACTIVE,
+                        ReservationSeries.expanded_until
+                        < until - SERIES_EXPANSION_SLACK,
+                    )
+                    .order_by(ReservationSeries.expanded_until)
+                    .limit(1)
+                    .with_for_update(skip_locked=True)
+                )
+                if series is None:
+                    return expanded
+
+                occurrences = self.expand(db, series, until)
+                if any(o.reservation for o in occurrences):
+                    read_cache.invalidate_user(db.get(User, series.user_id))
+                db.commit()
+                expanded += 1
+                skipped = sum(1 for o in occurrences if o.conflicts)
+                if skipped:
+                    logger.info(f"Series {series.id}: {skipped} occurrences clash")
+
+
+# Singleton instance
+reservation_series_service = ReservationSeriesService()
+
+
+def expand_due_series() -> None:
+    """Background job entry point"""
+    reservation_series_service.expand_due()
@@ -0,0 +1,136 @@
+"""Repair of the primary after cross-shard writes.
+
+With shards, a booking or cancellation commits on its shard first and the
+primary commits its side afterwards: the usage rollup, the user's cache
+version and, for waitlist bookings, the entry. If the primary's commit fails
+or the worker dies in between, the reservation stands without them.
+
+A periodic job reapplies those effects for every reservation changed on a
+shard within `SHARD_RECONCILE_LOOKBACK_SECONDS`. All of them are idempotent:
+- It rebuilds the rollup over the hours of those reservations, per point.
+- It bumps the owners' cache versions, which at worst costs a cache miss.
+- It books waiting entries that match an active reservation exactly.
+
+The lookback has to cover the interval between runs, plus the time a
+worker may be stopped before another one takes the jobs over.
+
+Series are not repaired. A failed expansion is retried, and its clashing
+occurrences are skipped. A failed cancellation leaves the series active,
+although its reservations are cancelled.
+"""
+
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from src.database import SessionLocal
+from src.models.reservation import Reservation, ReservationStatus
+from src.models.user import User
+from src.models.waitlist_entry import WaitlistEntry, WaitlistStatus
+from src.services.cache import read_cache
+from src.services.sharding import reservation_shards
+from src.services.usage import usage_rollup
+
+logger = logging.getLogger(__name__)
+
+SHARD_RECONCILE_LOOKBACK_SECONDS = int(
+    os.getenv("SHARD_RECONCILE_LOOKBACK_SECONDS", "900")
+)
+
+CHANGED_COLUMNS = (
+    Reservation.id,
+    Reservation.charging_point_id,
+    Reservation.start_time,
+    Reservation.end_time,
+    Reservation.status,
+    Reservation.user_id,
+    Reservation.car_id,
+)
+
+
+class ShardReconciler:
+    def __init__(
+        self, lookback: timedelta = timedelta(seconds=SHARD_RECONCILE_LOOKBACK_SECONDS)
+    ):
+        self.lookback = lookback
+
+    def reconcile(self, db: Session, since: datetime) -> int:
+        """Reapply the primary's side of reservations changed since `since`.
+
+        Commits; returns the number of reservations looked at.
+        """
+        if not reservation_shards.enabled:
+            return 0
+        changed = [
+            row
+            for rows in reservation_shards.gather(
+                db,
+                lambda s: s.execute(
+                    select(*CHANGED_COLUMNS).where(Reservation.updated_at >= since)
+                ).all(),
+            )
+            for row in rows
+        ]
+        if not changed:
+            return 0
+
+        windows: dict[str, tuple[datetime, datetime]] = {}
+        for row in changed:
+            start, end = windows.get(
+                row.charging_point_id, (row.start_time, row.end_time)
+            )
+            windows[row.charging_point_id] = (
+                min(start, row.start_time),
+                max(end, row.end_time),
+            )
+        for charging_point_id, (start, end) in windows.items():
+            usage_rollup.rebuild(db, start, end, charging_point_id)
+
+        booked = self._book_waiting_entries(
+            db, [row for row in changed if row.status == ReservationStatus.ACTIVE]
+        )
+        for user_id in {row.user_id for row in changed}:
+            user = db.get(User, user_id)
+            if user is not None:
+                read_cache.invalidate_user(user)
+        db.commit()
+
+        if booked:
+            logger.warning(f"Reconciliation booked {booked} waitlist entries")
+        return len(changed)
+
+    @staticmethod
+    def _book_waiting_entries(db: Session, active: list) -> int:
+        """Book the entries that an active reservation matches exactly"""
+        booked = 0
+        for row in active:
+            booked += db.execute(
+                update(WaitlistEntry)
+                .where(
+                    WaitlistEntry.charging_point_id == row.charging_point_id,
+                    WaitlistEntry.status == WaitlistStatus.WAITING,
+                    WaitlistEntry.user_id == row.user_id,
+                    WaitlistEntry.car_id == row.car_id,
+                    WaitlistEntry.start_time == row.start_time,
+                    WaitlistEntry.end_time == row.end_time,
+                )
+                .values(status=WaitlistStatus.BOOKED, reservation_id=row.id)
+            ).rowcount
+        return booked
+
+    def reconcile_recent(self) -> int:
+        since = datetime.now(timezone.utc) - self.lookback
+        with SessionLocal() as db:
+            return self.reconcile(db, since)
+
+
+# Singleton instance
+shard_reconciler = ShardReconciler()
+
+
+def reconcile_shard_writes() -> None:
+    """Background job entry point"""
+    shard_reconciler.reconcile_recent()
@@ -0,0 +1,405 @@
+"""Reservations spread over several databases by charging point.
+
+Overlaps only ever happen within one charging point, so each point's
+reservations live on a single shard, where its bookings are checked and
+written. `RESERVATION_SHARD_URLS` lists the shards as comma-separated
+`name=url` pairs. A point belongs to the shard that a consistent hash ring
+picks for its ID, unless `charging_point_shards` on the primary database
+says otherwise. That override is what the rebalancing tool writes when it
+moves a point. Adding a shard to the ring reassigns only about 1/N of the
+points.
+
+Everything else stays on the primary: users, cars, series, waitlist entries
+and the usage rollup. A booking commits on its shard first, then the primary
+commits its side (usage, cache version, idempotency key). Should the primary
+fail in between, a periodic job reapplies the usage and cache version (see
+src/services/shard_reconciliation.py). Reads of one user's reservations
+query every shard in parallel and merge the sorted results.
+
+Without shards configured, the reservations stay in the primary database and
+every helper works on the caller's session, as before.
+
+A shard needs the reservations table, `charging_point_moves` and the
+reservation events' `outbox`, created by `create-schema`, which only adds
+missing tables. To shard an existing database, list it as one of the shards
+so its reservations stay reachable, then run `rebalance`:
+
+    python -m src.services.sharding create-schema
+    python -m src.services.sharding rebalance [--dry-run]
+    python -m src.services.sharding move <charging-point-id> <shard>
+"""
+
+import argparse
+import bisect
+import contextvars
+import hashlib
+import heapq
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from typing import Callable, Iterable, Iterator, TypeVar
+
+from fastapi import HTTPException, status
+from sqlalchemy import (
+    CheckConstraint,
+    Column,
+    Engine,
+    Index,
+    MetaData,
+    Table,
+    delete,
+    func,
+    select,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from src.database import SessionLocal, create_database_engine
+from src.models.charging_point_move import ChargingPointMove
+from src.models.charging_point_shard import ChargingPointShard
+from src.models.outbox_event import OutboxEvent
+from src.models.reservation import Reservation
+from src.services.availability import lock_charging_point
+from src.services.cache import LRUCache
+
+T = TypeVar("T")
+
+# Comma-separated name=url pairs; empty keeps reservations on DATABASE_URL
+RESERVATION_SHARD_URLS = os.getenv("RESERVATION_SHARD_URLS", "")
+# Ring positions per shard; more spread the points more evenly
+SHARD_VIRTUAL_NODES = int(os.getenv("SHARD_VIRTUAL_NODES", "256"))
+# How long a worker trusts its copy of a point's override
+SHARD_OVERRIDE_TTL_SECONDS = int(os.getenv("SHARD_OVERRIDE_TTL_SECONDS", "5"))
+
+
+def parse_shard_urls(value: str) -> dict[str, str]:
+    shards = {}
+    for entry in value.split(","):
+        if not entry.strip():
+            continue
+        name, separator, url = entry.partition("=")
+        if not separator or not name.strip() or not url.strip():
+            raise ValueError(f"Shards are given as name=url, not {entry!r}")
+        shards[name.strip()] = url.strip()
+    return shards
+
+
+class HashRing:
+    """Consistent hashing of keys onto named nodes"""
+
+    def __init__(self, nodes: Iterable[str], virtual_nodes: int = SHARD_VIRTUAL_NODES):
+        self.nodes = sorted(nodes)
+        points = sorted(
+            (self._hash(f"{node}#{i}"), node)
+            for node in self.nodes
+            for i in range(virtual_nodes)
+        )
+        self._hashes = [h for h, _ in points]
+        self._owners = [node for _, node in points]
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest())
+
+    def node_for(self, key: str) -> str:
+        index = bisect.bisect(self._hashes, self._hash(key)) % len(self._hashes)
+        return self._owners[index]
+
+
+def shard_schema() -> MetaData:
+    """Tables of a shard database.
+
+    The reservations table loses its foreign keys: users, cars and series
+    stay on the primary database.
+    """
+    metadata = MetaData()
+    source = Reservation.__table__
+    reservations = Table(
+        source.name,
+        metadata,
+        *(
+            Column(
+                c.name, c.type.copy(), primary_key=c.primary_key, nullable=c.nullable
+            )
+            for c in source.columns
+        ),
+        *(
+            CheckConstraint(c.sqltext, name=c.name)
+            for c in source.constraints
+            if isinstance(c, CheckConstraint)
+        ),
+    )
+    for index in source.indexes:
+        Index(index.name, *(reservations.c[c.name] for c in index.columns))
+    ChargingPointMove.__table__.to_metadata(metadata)
+    # Events are written in the transaction of the reservation they report
+    OutboxEvent.__table__.to_metadata(metadata)
+    return metadata
+
+
+class ChargingPointMoved(HTTPException):
+    """The point moved to another shard while the request was routed"""
+
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Charging point is being moved between shards, retry",
+            headers={"Retry-After": "1"},
+        )
+
+
+class ShardRouter:
+    def __init__(self, urls: dict[str, str]):
+        self.engines: dict[str, Engine] = {
+            name: create_database_engine(url) for name, url in urls.items()
+        }
+        self.sessions = {
+            name: sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+            for name, engine in self.engines.items()
+        }
+        self.ring = HashRing(self.engines) if self.engines else None
+        self.overrides = LRUCache()
+        self.executor = (
+            ThreadPoolExecutor(len(self.engines), thread_name_prefix="shard")
+            if self.engines
+            else None
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.engines)
+
+    def shard_for(self, db: Session, charging_point_id: str) -> str:
+        """Name of the shard that owns the charging point"""
+        shard = self.overrides.get(charging_point_id, adapter=None)
+        if shard is None:
+            shard = (
+                db.scalar(
+                    select(ChargingPointShard.shard).where(
+                        ChargingPointShard.charging_point_id == charging_point_id
+                    )
+                )
+                or ""
+            )
+            self.overrides.set(
+                charging_point_id, shard, adapter=None, ttl=SHARD_OVERRIDE_TTL_SECONDS
+            )
+        return shard or self.ring.node_for(charging_point_id)
+
+    @contextmanager
+    def session_for(self, db: Session, charging_point_id: str) -> Iterator[Session]:
+        """Session on the shard owning the point, locked for booking it.
+
+        Commits when the block ends, before the caller commits `db`. Without
+        shards this is `db` itself, neither locked nor committed.
+        """
+        if not self.enabled:
+            yield db
+            return
+
+        with self.sessions[self.shard_for(db, charging_point_id)]() as bookings:
+            lock_charging_point(bookings, charging_point_id)
+            moved_to = bookings.scalar(
+                select(ChargingPointMove.shard).where(
+                    ChargingPointMove.charging_point_id == charging_point_id
+                )
+            )
+            if moved_to is not None:
+                self.overrides.set(
+                    charging_point_id,
+                    moved_to,
+                    adapter=None,
+                    ttl=SHARD_OVERRIDE_TTL_SECONDS,
+                )
+                raise ChargingPointMoved()
+            yield bookings
+            bookings.commit()
+
+    def gather(self, db: Session, query: Callable[[Session], T]) -> list[T]:
+        """Run a read on every shard in parallel; on `db` without shards"""
+        if not self.enabled:
+            return [query(db)]
+
+        def run(name: str) -> T:
+            with self.sessions[name]() as session:
+                return query(session)
+
+        # Each task gets a copy of the context, so request stats count its time
+        futures = [
+            self.executor.submit(contextvars.copy_context().run, run, name)
+            for name in self.sessions
+        ]
+        return [future.result() for future in futures]
+
+    def find(self, db: Session, query: Callable[[Session], T | None]) -> T | None:
+        """First result of a read that at most one shard answers"""
+        return next(
+            (found for found in self.gather(db, query) if found is not None), None
+        )
+
+    @contextmanager
+    def open_all(self) -> Iterator[list[Session]]:
+        """A session per shard for long reads; a primary session without shards"""
+        if not self.enabled:
+            with SessionLocal() as db:
+                yield [db]
+            return
+        with ExitStack() as stack:
+            yield [stack.enter_context(factory()) for factory in self.sessions.values()]
+
+    @staticmethod
+    def merge(
+        results: Iterable[Iterable[T]], key: Callable[[T], object]
+    ) -> Iterator[T]:
+        """Merge per-shard results sorted by `key`, which must identify a row.
+
+        A point being moved is briefly on two shards; the copy is dropped.
+        """
+        previous = None
+        for item in heapq.merge(*results, key=key):
+            if previous is None or key(item) != previous:
+                previous = key(item)
+                yield item
+
+    def move(self, db: Session, charging_point_id: str, target: str) -> int:
+        """Move a point's reservations to `target`; returns the number moved.
+
+        Holds the point's lock on both shards, so bookings wait for the move.
+        The target commits first, then the source (dropping the rows and
+        leaving a tombstone), then the override on the primary. Rerunning an
+        interrupted move is safe.
+        """
+        if target not in self.sessions:
+            raise ValueError(f"Unknown shard {target!r}")
+        self.overrides.clear()
+        source = self.shard_for(db, charging_point_id)
+        if source == target:
+            return 0
+
+        table = Reservation.__table__
+        with self.sessions[source]() as old, self.sessions[target]() as new:
+            lock_charging_point(old, charging_point_id)
+            lock_charging_point(new, charging_point_id)
+            rows = (
+                old.execute(
+                    select(table).where(table.c.charging_point_id == charging_point_id)
+                )
+                .mappings()
+                .all()
+            )
+            new.execute(
+                delete(ChargingPointMove).where(
+                    ChargingPointMove.charging_point_id == charging_point_id
+                )
+            )
+            if rows:
+                new.execute(
+                    pg_insert(table).on_conflict_do_nothing(), [dict(r) for r in rows]
+                )
+            new.commit()
+
+            old.execute(
+                delete(table).where(table.c.charging_point_id == charging_point_id)
+            )
+            tombstone = pg_insert(ChargingPointMove).values(
+                charging_point_id=charging_point_id, shard=target
+            )
+            old.execute(
+                tombstone.on_conflict_do_update(
+                    index_elements=[ChargingPointMove.charging_point_id],
+                    set_={"shard": target, "moved_at": func.now()},
+                )
+            )
+            old.commit()
+
+        override = pg_insert(ChargingPointShard).values(
+            charging_point_id=charging_point_id, shard=target
+        )
+        db.execute(
+            override.on_conflict_do_update(
+                index_elements=[ChargingPointShard.charging_point_id],
+                set_={"shard": target, "updated_at": func.now()},
+            )
+        )
+        db.commit()
+        self.overrides.clear()
+        return len(rows)
+
+    def misplaced(self, db: Session) -> list[tuple[str, str, str]]:
+        """(charging point, shard holding it, ring owner) of points to move"""
+        found = []
+        for name, factory in self.sessions.items():
+            with factory() as session:
+                for charging_point_id in session.scalars(
+                    select(Reservation.charging_point_id).distinct()
+                ):
+                    owner = self.ring.node_for(charging_point_id)
+                    if owner != name:
+                        found.append((charging_point_id, name, owner))
+        return found
+
+    def dispose_after_fork(self) -> None:
+        """Drop inherited shard pools in a forked child; see `src.database`"""
+        for engine in self.engines.values():
+            engine.dispose(close=False)
+
+
+# Singleton instance
+reservation_shards = ShardRouter(parse_shard_urls(RESERVATION_SHARD_URLS))
+
+os.register_at_fork(after_in_child=reservation_shards.dispose_after_fork)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Manage the shards holding reservations"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("create-schema", help="Create missing shard tables")
+    rebalance = commands.add_parser(
+        "rebalance", help="Move every point to the shard the ring assigns it"
+    )
+    rebalance.add_argument("--dry-run", action="store_true")
+    move = commands.add_parser("move", help="Move one point to a shard")
+    move.add_argument("charging_point_id")
+    move.add_argument("shard")
+    args = parser.parse_args()
+
+    router = reservation_shards
+    if not router.enabled:
+        parser.error("RESERVATION_SHARD_URLS is not set")
+
+    if args.command == "create-schema":
+        metadata = shard_schema()
+        for name, engine in router.engines.items():
+            metadata.create_all(engine)
+            print(f"{name}: schema ready")
+        return
+
+    with SessionLocal() as db:
+        if args.command == "move":
+            moved = router.move(db, args.charging_point_id, args.shard)
+            print(f"Moved {moved} reservations of {args.charging_point_id}")
+            return
+
+        # Pin each misplaced point where it is first, so that workers already
+        # using the new ring keep finding it until it has moved
+        plan = router.misplaced(db)
+        for charging_point_id, current, owner in plan:
+            print(f"{charging_point_id}: {current} -> {owner}")
+        if args.dry_run or not plan:
+            return
+        db.execute(
+            pg_insert(ChargingPointShard)
+            .values(
+                [{"charging_point_id": cp, "shard": current} for cp, current, _ in plan]
+            )
+            .on_conflict_do_nothing()
+        )
+        db.commit()
+        moved = sum(router.move(db, cp, owner) for cp, _, owner in plan)
+        print(f"Moved {moved} reservations of {len(plan)} charging points")
+
+
+if __name__ == "__main__":
+    main()
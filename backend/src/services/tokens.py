@@ -0,0 +1,71 @@
+"""Cache of access tokens already validated with DummyJSON.
+
+A cached token skips the `/auth/me` round trip until it expires, or for at
+most `TOKEN_CACHE_TTL_SECONDS`, which bounds how long a token revoked
+upstream keeps working here. A refresh drops the access token it replaces
+straight away. Only a digest of each token is kept.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+
+from src.services.cache import LRUCache
+
+TOKEN_CACHE_TTL_SECONDS = int(os.getenv("TOKEN_CACHE_TTL_SECONDS", "60"))
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+
+
+def token_expiry(token: str) -> float | None:
+    """`exp` claim of a JWT, without verifying it; None if there is none"""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(
+            base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+        )
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True, slots=True)
+class TokenUser:
+    external_user_id: int
+    username: str
+
+
+class TokenCache:
+    def __init__(
+        self,
+        ttl: int = TOKEN_CACHE_TTL_SECONDS,
+        max_entries: int = TOKEN_CACHE_MAX_ENTRIES,
+    ):
+        self.ttl = ttl
+        self._entries = LRUCache(max_entries)
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> TokenUser | None:
+        """User of a validated token"""
+        return self._entries.get(self._key(token), adapter=None)
+
+    def set(self, token: str, user: TokenUser) -> None:
+        ttl = self.ttl
+        expiry = token_expiry(token)
+        if expiry is not None:
+            ttl = min(ttl, int(expiry - time.time()))
+        if ttl > 0:
+            self._entries.set(self._key(token), user, adapter=None, ttl=ttl)
+
+    def discard(self, token: str) -> None:
+        """Validate the token upstream again on its next use"""
+        self._entries.delete(self._key(token))
+
+
+# Singleton instance
+token_cache = TokenCache()
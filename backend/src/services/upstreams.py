@@ -0,0 +1,95 @@
+"""Long-lived HTTP clients for the upstream APIs, one per upstream and worker.
+
+A client per call paid for a fresh SSL context (the CA bundle is parsed each
+time) and a new connection, with its TLS handshake, on every request. Shared
+clients keep their connections alive between requests. Upstreams are
+registered at import, so `warm_up` can open `UPSTREAM_WARM_CONNECTIONS`
+connections to each before the worker reports ready.
+"""
+
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+
+import httpx
+
+from src.admission.http import BoundedTransport
+
+logger = logging.getLogger(__name__)
+
+UPSTREAM_WARM_CONNECTIONS = int(os.getenv("UPSTREAM_WARM_CONNECTIONS", "2"))
+# Idle connections are dropped after this; upstreams may close them sooner,
+# in which case the next call reconnects
+UPSTREAM_KEEPALIVE_SECONDS = float(os.getenv("UPSTREAM_KEEPALIVE_SECONDS", "30"))
+UPSTREAM_TIMEOUT_SECONDS = float(os.getenv("UPSTREAM_TIMEOUT_SECONDS", "5"))
+
+
+@dataclass(frozen=True, slots=True)
+class Upstream:
+    base_url: str
+    verify: bool = True
+
+
+class UpstreamClients:
+    def __init__(
+        self,
+        warm_connections: int = UPSTREAM_WARM_CONNECTIONS,
+        keepalive_expiry: float = UPSTREAM_KEEPALIVE_SECONDS,
+    ):
+        self.warm_connections = warm_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.upstreams: dict[str, Upstream] = {}
+        self._clients: dict[str, httpx.AsyncClient] = {}
+
+    def register(self, name: str, base_url: str, verify: bool = True) -> None:
+        self.upstreams[name] = Upstream(base_url.rstrip("/"), verify)
+
+    def client(self, name: str) -> httpx.AsyncClient:
+        """The upstream's shared client, created on first use"""
+        client = self._clients.get(name)
+        if client is None:
+            upstream = self.upstreams[name]
+            client = self._clients[name] = httpx.AsyncClient(
+                transport=BoundedTransport(
+                    name,
+                    verify=upstream.verify,
+                    limits=httpx.Limits(keepalive_expiry=self.keepalive_expiry),
+                ),
+                timeout=UPSTREAM_TIMEOUT_SECONDS,
+            )
+        return client
+
+    async def warm_up(self) -> dict[str, str]:
+        """Open keep-alive connections to every upstream.
+
+        Any HTTP response counts; returns "ok" or the error per upstream.
+        """
+        names = list(self.upstreams)
+        results = await asyncio.gather(*(self._warm(name) for name in names))
+        return dict(zip(names, results))
+
+    async def _warm(self, name: str) -> str:
+        client = self.client(name)
+        # Concurrent requests each need their own connection
+        responses = await asyncio.gather(
+            *(
+                client.head(self.upstreams[name].base_url)
+                for _ in range(self.warm_connections)
+            ),
+            return_exceptions=True,
+        )
+        errors = [r for r in responses if isinstance(r, Exception)]
+        if errors:
+            logger.warning(f"Could not warm up upstream {name}: {errors[0]!r}")
+            return type(errors[0]).__name__
+        return "ok"
+
+    async def aclose(self) -> None:
+        clients = list(self._clients.values())
+        self._clients.clear()
+        await asyncio.gather(*(c.aclose() for c in clients), return_exceptions=True)
+
+
+# Singleton instance
+upstream_clients = UpstreamClients()
@@ -0,0 +1,411 @@
+"""Hourly usage rollup per charging point.
+
+`charging_point_usage` is updated in the same transaction as the writes it
+summarises. Reservation writes add their hours through `record_reservation`.
+Status transitions from the provider add occupied time through
+`record_status_intervals`. Utilisation reads aggregate the hourly rows
+instead of scanning reservations.
+
+`rebuild` recomputes the reservation columns of a window from the
+reservations table, or from every shard's. It overwrites instead of adding,
+so it can be rerun safely. Occupied time is only known from status
+transitions as they arrive, so a rebuild leaves it as it is.
+
+Writers and rebuilds share advisory locks: every write takes them shared, for
+its charging points and for all points, until it commits. A rebuild takes the
+one for its point, or the one for all points, exclusively. So a rebuild waits
+for the writes in progress and later writes wait for it, and each reservation
+is counted once whether or not its hour already had a row.
+
+    python -m src.services.usage --start 2026-01-01T00:00Z --end 2026-02-01T00:00Z
+"""
+
+import argparse
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from enum import StrEnum
+from typing import Iterable, Iterator
+
+from sqlalchemy import Integer, Select, cast, func, select, text, true, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from src.database import SessionLocal
+from src.models.charging_point_usage import ChargingPointUsage
+from src.models.reservation import Reservation, ReservationStatus
+from src.services.sharding import reservation_shards
+
+ONE_HOUR = timedelta(hours=1)
+
+OCCUPIED_STATUS = "occupied"
+
+# First keys of the advisory locks between rollup writes and rebuilds, next to
+# STATUS_LOCK_NAMESPACE in src/services/charging_point.py. Point locks use the
+# hash of the point's ID as second key, the lock on all points uses 0.
+USAGE_LOCK_NAMESPACE = 2
+USAGE_ALL_POINTS_LOCK_NAMESPACE = 3
+
+
+class Granularity(StrEnum):
+    HOUR = "hour"
+    DAY = "day"
+    WEEK = "week"
+
+
+GRANULARITY_STEP = {
+    Granularity.HOUR: ONE_HOUR,
+    Granularity.DAY: timedelta(days=1),
+    Granularity.WEEK: timedelta(weeks=1),
+}
+
+
+def truncate(moment: datetime, granularity: Granularity) -> datetime:
+    """Start of the UTC hour, day or ISO week containing `moment`"""
+    hour = moment.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    if granularity == Granularity.HOUR:
+        return hour
+    day = hour.replace(hour=0)
+    if granularity == Granularity.DAY:
+        return day
+    return day - timedelta(days=day.weekday())
+
+
+def hour_window(start: datetime, end: datetime) -> tuple[datetime, datetime]:
+    """Widen a time range to whole UTC hours"""
+    aligned_end = truncate(end, Granularity.HOUR)
+    if aligned_end < end:
+        aligned_end += ONE_HOUR
+    return truncate(start, Granularity.HOUR), aligned_end
+
+
+def hourly_slices(start: datetime, end: datetime) -> Iterator[tuple[datetime, int]]:
+    """Each UTC hour overlapping the range, with the seconds of it covered"""
+    hour = truncate(start, Granularity.HOUR)
+    while hour < end:
+        next_hour = hour + ONE_HOUR
+        yield hour, round((min(end, next_hour) - max(start, hour)).total_seconds())
+        hour = next_hour
+
+
+@dataclass(frozen=True, slots=True)
+class StatusInterval:
+    """A charging point holding one status from `start` until `end`"""
+
+    charging_point_id: str
+    status: str
+    start: datetime
+    end: datetime
+
+
+@dataclass(slots=True)
+class UsageBucket:
+    start: datetime
+    seconds: int  # length of the bucket within the requested range
+    reservations_started: int = 0
+    reserved_seconds: int = 0
+    occupied_seconds: int = 0
+
+
+def lock_usage_writes(db: Session, charging_point_ids: Iterable[str]) -> None:
+    """Keep rebuilds of the points out until the transaction ends.
+
+    Shared, so writes do not wait for each other. Taken in key order.
+    """
+    db.execute(
+        text(
+            """
+            SELECT pg_advisory_xact_lock_shared(namespace, key)
+            FROM (
+                SELECT :all_points AS namespace, 0 AS key
+                UNION
+                SELECT :points, hashtext(id)
+                FROM unnest(CAST(:ids AS text[])) AS id
+                ORDER BY namespace DESC, key
+            ) AS keys
+            """
+        ),
+        {
+            "all_points": USAGE_ALL_POINTS_LOCK_NAMESPACE,
+            "points": USAGE_LOCK_NAMESPACE,
+            "ids": list(charging_point_ids),
+        },
+    )
+
+
+def lock_usage_rebuild(db: Session, charging_point_id: str | None = None) -> None:
+    """Wait for writes of the point, or of every point, and hold off new ones"""
+    if charging_point_id is None:
+        db.execute(
+            select(func.pg_advisory_xact_lock(USAGE_ALL_POINTS_LOCK_NAMESPACE, 0))
+        )
+    else:
+        db.execute(
+            select(
+                func.pg_advisory_xact_lock(
+                    USAGE_LOCK_NAMESPACE, func.hashtext(charging_point_id)
+                )
+            )
+        )
+
+
+class UsageRollup:
+    COUNTERS = ("reservations_started", "reserved_seconds", "occupied_seconds")
+
+    def record_reservation(
+        self, db: Session, reservation: Reservation, sign: int = 1
+    ) -> None:
+        """Add a reservation's hours, or remove them with `sign=-1`.
+
+        Runs in the caller's transaction, which commits it with the reservation.
+        """
+        self.record_reservations(db, [reservation], sign)
+
+    def record_reservations(
+        self, db: Session, reservations: Iterable[Reservation], sign: int = 1
+    ) -> None:
+        """Add or remove the hours of several reservations in one statement"""
+        totals: dict[tuple[str, datetime], list[int]] = defaultdict(lambda: [0, 0])
+        for reservation in reservations:
+            for index, (hour, seconds) in enumerate(
+                hourly_slices(reservation.start_time, reservation.end_time)
+            ):
+                counters = totals[reservation.charging_point_id, hour]
+                counters[0] += sign if index == 0 else 0
+                counters[1] += sign * seconds
+
+        self._add(
+            db,
+            [
+                {
+                    "charging_point_id": charging_point_id,
+                    "hour": hour,
+                    "reservations_started": started,
+                    "reserved_seconds": seconds,
+                    "occupied_seconds": 0,
+                }
+                for (charging_point_id, hour), (started, seconds) in sorted(
+                    totals.items()
+                )
+            ],
+        )
+
+    def record_status_intervals(
+        self, db: Session, intervals: Iterable[StatusInterval]
+    ) -> None:
+        """Add the occupied time of finished status intervals"""
+        occupied: dict[tuple[str, datetime], int] = defaultdict(int)
+        for interval in intervals:
+            if interval.status != OCCUPIED_STATUS:
+                continue
+            for hour, seconds in hourly_slices(interval.start, interval.end):
+                occupied[interval.charging_point_id, hour] += seconds
+
+        self._add(
+            db,
+            [
+                {
+                    "charging_point_id": charging_point_id,
+                    "hour": hour,
+                    "reservations_started": 0,
+                    "reserved_seconds": 0,
+                    "occupied_seconds": seconds,
+                }
+                for (charging_point_id, hour), seconds in sorted(occupied.items())
+            ],
+        )
+
+    def _add(self, db: Session, rows: list[dict]) -> None:
+        if not rows:
+            return
+        lock_usage_writes(db, {row["charging_point_id"] for row in rows})
+        stmt = insert(ChargingPointUsage).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[
+                ChargingPointUsage.charging_point_id,
+                ChargingPointUsage.hour,
+            ],
+            set_={
+                name: getattr(ChargingPointUsage, name) + getattr(stmt.excluded, name)
+                for name in self.COUNTERS
+            },
+        )
+        db.execute(stmt)
+
+    @staticmethod
+    def reservation_hours(
+        start: datetime, end: datetime, charging_point_id: str | None = None
+    ) -> Select:
+        """Hourly reservation totals per charging point, from the reservations"""
+        hours = (
+            func.generate_series(
+                func.date_trunc(
+                    "hour", func.greatest(Reservation.start_time, start), "UTC"
+                ),
+                func.least(Reservation.end_time, end) - timedelta(microseconds=1),
+                ONE_HOUR,
+            )
+            .table_valued("hour")
+            .render_derived()
+            .lateral("hours")
+        )
+        seconds = func.extract(
+            "epoch",
+            func.least(Reservation.end_time, hours.c.hour + ONE_HOUR)
+            - func.greatest(Reservation.start_time, hours.c.hour),
+        )
+        started = func.date_trunc("hour", Reservation.start_time, "UTC") == hours.c.hour
+
+        stmt = (
+            select(
+                Reservation.charging_point_id,
+                hours.c.hour,
+                func.count().filter(started).label("reservations_started"),
+                cast(func.round(func.sum(seconds)), Integer).label("reserved_seconds"),
+            )
+            .select_from(Reservation)
+            .join(hours, true())
+            .where(
+                Reservation.status != ReservationStatus.CANCELLED,
+                Reservation.start_time < end,
+                Reservation.end_time > start,
+            )
+            .group_by(Reservation.charging_point_id, hours.c.hour)
+        )
+        if charging_point_id is not None:
+            stmt = stmt.where(Reservation.charging_point_id == charging_point_id)
+        return stmt
+
+    def rebuild(
+        self,
+        db: Session,
+        start: datetime,
+        end: datetime,
+        charging_point_id: str | None = None,
+    ) -> int:
+        """Recompute the reservation columns of whole hours in the range.
+
+        Returns the number of hours written.
+        """
+        start, end = hour_window(start, end)
+        lock_usage_rebuild(db, charging_point_id)
+
+        reset = (
+            update(ChargingPointUsage)
+            .where(ChargingPointUsage.hour >= start, ChargingPointUsage.hour < end)
+            .values(reservations_started=0, reserved_seconds=0)
+        )
+        if charging_point_id is not None:
+            reset = reset.where(
+                ChargingPointUsage.charging_point_id == charging_point_id
+            )
+        db.execute(reset)
+
+        computed = self.reservation_hours(start, end, charging_point_id)
+        stmt = insert(ChargingPointUsage)
+        if not reservation_shards.enabled:
+            stmt = stmt.from_select(
+                [
+                    "charging_point_id",
+                    "hour",
+                    "reservations_started",
+                    "reserved_seconds",
+                ],
+                select(computed.subquery()),
+            )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[
+                ChargingPointUsage.charging_point_id,
+                ChargingPointUsage.hour,
+            ],
+            set_={
+                "reservations_started": stmt.excluded.reservations_started,
+                "reserved_seconds": stmt.excluded.reserved_seconds,
+            },
+        )
+        if not reservation_shards.enabled:
+            result = db.execute(stmt)
+            db.commit()
+            return result.rowcount
+
+        # The reservations are on the shards, so their totals are copied over
+        rows = [
+            row._asdict()
+            for shard_rows in reservation_shards.gather(
+                db, lambda s: s.execute(computed).all()
+            )
+            for row in shard_rows
+        ]
+        if rows:
+            db.execute(stmt, rows)
+        db.commit()
+        return len(rows)
+
+    def utilisation(
+        self,
+        db: Session,
+        charging_point_id: str,
+        start: datetime,
+        end: datetime,
+        granularity: Granularity,
+    ) -> list[UsageBucket]:
+        """Usage per bucket of the range, including empty buckets"""
+        start, end = hour_window(start, end)
+        bucket = func.date_trunc(granularity.value, ChargingPointUsage.hour, "UTC")
+        rows = db.execute(
+            select(
+                bucket.label("bucket"),
+                *(
+                    func.sum(getattr(ChargingPointUsage, name)).label(name)
+                    for name in self.COUNTERS
+                ),
+            )
+            .where(
+                ChargingPointUsage.charging_point_id == charging_point_id,
+                ChargingPointUsage.hour >= start,
+                ChargingPointUsage.hour < end,
+            )
+            .group_by(bucket)
+        ).all()
+        found = {row.bucket: row for row in rows}
+
+        buckets = []
+        step = GRANULARITY_STEP[granularity]
+        bucket_start = truncate(start, granularity)
+        while bucket_start < end:
+            bucket_end = bucket_start + step
+            usage = UsageBucket(
+                start=bucket_start,
+                seconds=round(
+                    (min(end, bucket_end) - max(start, bucket_start)).total_seconds()
+                ),
+            )
+            row = found.get(bucket_start)
+            if row is not None:
+                for name in self.COUNTERS:
+                    setattr(usage, name, getattr(row, name))
+            buckets.append(usage)
+            bucket_start = bucket_end
+        return buckets
+
+
+# Singleton instance
+usage_rollup = UsageRollup()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Rebuild the reservation columns of the usage rollup"
+    )
+    parser.add_argument("--start", type=datetime.fromisoformat, required=True)
+    parser.add_argument("--end", type=datetime.fromisoformat, required=True)
+    parser.add_argument("--charging-point")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        hours = usage_rollup.rebuild(db, args.start, args.end, args.charging_point)
+    print(f"Rebuilt {hours} charging point hours")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Waitlist for charging point windows that are already booked.
+
+Each charging point's waiting entries form a queue in `waitlist_entries`,
+oldest request first. When capacity frees up (a reservation or a series is
+cancelled) the matcher walks the point's queue in the same transaction and
+books every entry whose window is now free. A periodic pass matches all
+points with waiting entries, which covers slots freed any other way. Winners
+are notified once the booking is committed, so clients need not poll.
+
+Only reservations are matched against; the live charging point status is
+checked when the entry is registered, not when it is booked.
+"""
+
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+
+import httpx
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.admission.limits import Overloaded
+from src.database import SessionLocal
+from src.models.reservation import Reservation
+from src.models.user import User
+from src.models.waitlist_entry import WaitlistEntry, WaitlistStatus
+from src.services.availability import TimeWindow, find_conflicts, lock_charging_point
+from src.services.cache import read_cache
+from src.services.outbox import record_reservation_events
+from src.services.sharding import reservation_shards
+from src.services.upstreams import upstream_clients
+from src.services.usage import usage_rollup
+
+logger = logging.getLogger(__name__)
+
+# Winners are POSTed here as JSON; without it they are only logged
+WAITLIST_NOTIFY_URL = os.getenv("WAITLIST_NOTIFY_URL") or None
+WAITLIST_NOTIFY_TIMEOUT_SECONDS = float(
+    os.getenv("WAITLIST_NOTIFY_TIMEOUT_SECONDS", "5")
+)
+
+
+class WaitlistBooking(BaseModel):
+    """Notification sent to the owner of a booked waitlist entry"""
+
+    waitlist_entry_id: uuid.UUID
+    reservation_id: uuid.UUID
+    user_id: uuid.UUID
+    car_id: uuid.UUID
+    charging_point_id: str
+    start_time: datetime
+    end_time: datetime
+
+
+class WaitlistNotifier:
+    def __init__(self, url: str | None = WAITLIST_NOTIFY_URL):
+        self.url = url
+        if url is not None:
+            upstream_clients.register("waitlist_notify", url)
+
+    async def notify(self, bookings: list[WaitlistBooking]) -> None:
+        """Tell the winners about their bookings; failures are only logged"""
+        if not bookings:
+            return
+        if self.url is None:
+            for booking in bookings:
+                logger.info(
+                    f"Waitlist entry {booking.waitlist_entry_id} booked as "
+                    f"reservation {booking.reservation_id}"
+                )
+            return
+
+        client = upstream_clients.client("waitlist_notify")
+        for booking in bookings:
+            try:
+                response = await client.post(
+                    self.url,
+                    content=booking.model_dump_json(),
+                    headers={"Content-Type": "application/json"},
+                    timeout=WAITLIST_NOTIFY_TIMEOUT_SECONDS,
+                )
+                response.raise_for_status()
+            except (httpx.HTTPError, Overloaded) as e:
+                logger.warning(
+                    f"Could not notify waitlist entry {booking.waitlist_entry_id}: {e}"
+                )
+
+
+class WaitlistMatcher:
+    def match(self, db: Session, charging_point_id: str) -> list[WaitlistBooking]:
+        """Book the point's waiting entries that fit, oldest request first.
+
+        Runs in the caller's transaction, which with shards commits after the
+        reservations commit on theirs; notify the returned bookings after it.
+        Pending changes are flushed first, so a cancellation in the same
+        transaction frees its window. Entries whose window has started are
+        expired.
+        """
+        db.flush()
+        with reservation_shards.session_for(db, charging_point_id) as bookings:
+            lock_charging_point(bookings, charging_point_id)
+            queue = db.scalars(
+                select(WaitlistEntry)
+                .where(
+                    WaitlistEntry.charging_point_id == charging_point_id,
+                    WaitlistEntry.status == WaitlistStatus.WAITING,
+                )
+                .order_by(WaitlistEntry.requested_at)
+                .with_for_update(skip_locked=True)
+            ).all()
+
+            now = datetime.now(timezone.utc)
+            waiting = []
+            for entry in queue:
+                if entry.start_time <= now:
+                    entry.status = WaitlistStatus.EXPIRED
+                else:
+                    waiting.append(entry)
+
+            windows = [TimeWindow(e.start_time, e.end_time) for e in waiting]
+            conflicts = find_conflicts(bookings, charging_point_id, windows)
+
+            booked: list[tuple[WaitlistEntry, Reservation]] = []
+            for entry, window, clashes in zip(waiting, windows, conflicts):
+                # Earlier entries booked in this pass count as reservations too
+                if clashes or any(
+                    r.start_time < window.end and r.end_time > window.start
+                    for _, r in booked
+                ):
+                    continue
+                reservation = Reservation(
+                    id=uuid.uuid4(),
+                    start_time=entry.start_time,
+                    end_time=entry.end_time,
+                    charging_point_id=charging_point_id,
+                    user_id=entry.user_id,
+                    car_id=entry.car_id,
+                )
+                entry.status = WaitlistStatus.BOOKED
+                entry.reservation_id = reservation.id
+                booked.append((entry, reservation))
+
+            reservations = [r for _, r in booked]
+            bookings.add_all(reservations)
+            record_reservation_events(bookings, reservations)
+
+        if not booked:
+            return []
+
+        usage_rollup.record_reservations(db, reservations)
+        for user_id in {r.user_id for r in reservations}:
+            read_cache.invalidate_user(db.get(User, user_id))
+
+        return [
+            WaitlistBooking(
+                waitlist_entry_id=entry.id,
+                reservation_id=reservation.id,
+                user_id=reservation.user_id,
+                car_id=reservation.car_id,
+                charging_point_id=charging_point_id,
+                start_time=reservation.start_time,
+                end_time=reservation.end_time,
+            )
+            for entry, reservation in booked
+        ]
+
+    def match_all(self) -> list[WaitlistBooking]:
+        """Match every charging point with waiting entries, committing per point"""
+        bookings = []
+        with SessionLocal() as db:
+            charging_point_ids = db.scalars(
+                select(WaitlistEntry.charging_point_id)
+                .where(WaitlistEntry.status == WaitlistStatus.WAITING)
+                .distinct()
+            ).all()
+            for charging_point_id in charging_point_ids:
+                bookings.extend(self.match(db, charging_point_id))
+                db.commit()
+        return bookings
+
+
+# Singleton instances
+waitlist_matcher = WaitlistMatcher()
+waitlist_notifier = WaitlistNotifier()
+
+
+async def match_waitlists() -> None:
+    """Background job entry point"""
+    bookings = await asyncio.to_thread(waitlist_matcher.match_all)
+    # On the worker's event loop, where the shared client lives
+    await waitlist_notifier.notify(bookings)
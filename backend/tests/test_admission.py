@@ -0,0 +1,134 @@
+"""Admission control answers 429 and 503 per route"""
+
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from src.admission.limits import Limits
+from src.admission.middleware import AdmissionMiddleware
+
+
+def admitted_app(reads: Limits) -> tuple[FastAPI, asyncio.Event]:
+    """App whose `/slow` reads wait until the returned event is set"""
+    app = FastAPI()
+    app.add_middleware(
+        AdmissionMiddleware,
+        enabled=True,
+        limits={
+            "reads": reads,
+            "login": reads,
+            "reservations": reads,
+            "writes": reads,
+        },
+    )
+    finished = asyncio.Event()
+
+    @app.get("/api/v1/cars/{car_id}")
+    async def car(car_id: int):
+        return {"id": car_id}
+
+    @app.get("/api/v1/cars/")
+    async def cars():
+        return []
+
+    @app.get("/api/v1/slow")
+    async def slow():
+        await finished.wait()
+        return {}
+
+    return app, finished
+
+
+def admission(app: FastAPI) -> AdmissionMiddleware:
+    layer = app.middleware_stack
+    while not isinstance(layer, AdmissionMiddleware):
+        layer = layer.app
+    return layer
+
+
+def run(scenario, app: FastAPI) -> None:
+    async def with_client():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            await scenario(client)
+
+    asyncio.run(asyncio.wait_for(with_client(), timeout=5))
+
+
+def test_client_over_its_rate_gets_429():
+    app, _ = admitted_app(Limits(rate=0.5, burst=1, concurrency=8, queue_budget=1))
+
+    async def scenario(client):
+        assert (await client.get("/api/v1/cars/1")).status_code == 200
+
+        # Same route, though another path
+        response = await client.get("/api/v1/cars/2")
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "2"
+        # Other clients have their own bucket
+        other = await client.get(
+            "/api/v1/cars/1", headers={"Authorization": "Bearer other"}
+        )
+        assert other.status_code == 200
+
+    run(scenario, app)
+
+
+def test_route_over_its_rate_leaves_other_routes_alone():
+    app, _ = admitted_app(Limits(rate=0.5, burst=1, concurrency=8, queue_budget=1))
+
+    async def scenario(client):
+        assert (await client.get("/api/v1/cars/1")).status_code == 200
+        assert (await client.get("/api/v1/cars/1")).status_code == 429
+
+        assert (await client.get("/api/v1/cars/")).status_code == 200
+
+    run(scenario, app)
+
+
+def test_request_queued_past_the_budget_gets_503():
+    app, finished = admitted_app(
+        Limits(rate=0, burst=1, concurrency=1, queue_budget=0.05)
+    )
+
+    async def scenario(client):
+        busy = asyncio.create_task(client.get("/api/v1/slow"))
+        await asyncio.sleep(0.01)
+
+        shed = await client.get("/api/v1/slow")
+        assert shed.status_code == 503
+        assert shed.headers["Retry-After"] == "1"
+        # The busy route's slots are its own
+        assert (await client.get("/api/v1/cars/")).status_code == 200
+
+        finished.set()
+        assert (await busy).status_code == 200
+
+    run(scenario, app)
+
+
+def test_request_is_shed_at_once_when_the_queue_would_take_too_long():
+    app, finished = admitted_app(
+        Limits(rate=0, burst=1, concurrency=1, queue_budget=0.5)
+    )
+
+    async def scenario(client):
+        busy = asyncio.create_task(client.get("/api/v1/slow"))
+        await asyncio.sleep(0.01)
+        # Recent requests took 10 s each
+        admission(app).concurrency["/api/v1/slow"].service_time = 10
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        shed = await client.get("/api/v1/slow")
+        assert shed.status_code == 503
+        assert shed.headers["Retry-After"] == "10"
+        assert loop.time() - start < 0.5
+
+        finished.set()
+        await busy
+
+    run(scenario, app)
@@ -0,0 +1,173 @@
+import base64
+import json
+import time
+import uuid
+
+import httpx
+import pytest
+from sqlalchemy import event, func, select
+
+from src.models.user import User
+from src.services import cache
+from src.services.tokens import TokenCache, TokenUser, token_cache
+from src.services.upstreams import upstream_clients
+
+TOKEN_USER = TokenUser(1, "emilys")
+
+
+def jwt(exp: float) -> str:
+    claims = base64.urlsafe_b64encode(json.dumps({"exp": exp}).encode())
+    return f"header.{claims.decode().rstrip('=')}.signature"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_cache_keeps_tokens_for_its_ttl(clock):
+    tokens = TokenCache(ttl=60)
+    tokens.set("opaque", TOKEN_USER)
+
+    clock[0] += 60
+    assert tokens.get("opaque") == TOKEN_USER
+    clock[0] += 1
+    assert tokens.get("opaque") is None
+
+
+def test_cache_ttl_is_capped_by_the_tokens_expiry(clock):
+    tokens = TokenCache(ttl=60)
+    token = jwt(time.time() + 20)
+    tokens.set(token, TOKEN_USER)
+
+    clock[0] += 18
+    assert tokens.get(token) == TOKEN_USER
+    clock[0] += 3
+    assert tokens.get(token) is None
+
+
+def test_expired_token_is_not_cached():
+    tokens = TokenCache(ttl=60)
+    token = jwt(time.time() - 1)
+    tokens.set(token, TOKEN_USER)
+
+    assert tokens.get(token) is None
+
+
+def test_discard():
+    tokens = TokenCache(ttl=60)
+    tokens.set("opaque", TOKEN_USER)
+    tokens.discard("opaque")
+    tokens.discard("unknown")
+
+    assert tokens.get("opaque") is None
+
+
+@pytest.fixture
+def dummyjson(monkeypatch, user):
+    """Stands in for DummyJSON; refreshes to a new token of `user`"""
+
+    class DummyJSON:
+        def __init__(self):
+            self.paths: list[str] = []
+            self.access_token = f"access-{uuid.uuid4().hex}"
+            self.user = {"id": user.external_user_id, "username": user.username}
+
+        def __call__(self, request: httpx.Request) -> httpx.Response:
+            self.paths.append(request.url.path)
+            if request.url.path == "/auth/refresh":
+                if json.loads(request.content)["refreshToken"] != "refresh":
+                    return httpx.Response(401)
+                return httpx.Response(
+                    200,
+                    json={
+                        "accessToken": self.access_token,
+                        "refreshToken": "refresh-2",
+                    },
+                )
+            if request.headers["Authorization"] == f"Bearer {self.access_token}":
+                return httpx.Response(200, json=self.user)
+            return httpx.Response(401)
+
+    stub = DummyJSON()
+    monkeypatch.setitem(
+        upstream_clients._clients,
+        "dummyjson",
+        httpx.AsyncClient(transport=httpx.MockTransport(stub)),
+    )
+    return stub
+
+
+@pytest.fixture
+def writes(database):
+    """SQL statements other than SELECT run during the test"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(("SELECT", "BEGIN")):
+            statements.append(statement)
+
+    event.listen(database, "before_cursor_execute", record)
+    yield statements
+    event.remove(database, "before_cursor_execute", record)
+
+
+def refresh(client, headers=None, refresh_token="refresh"):
+    return client.post(
+        "/api/v1/auth/refresh",
+        json={"refresh_token": refresh_token},
+        headers=headers or {},
+    )
+
+
+def test_refresh_of_a_known_user_writes_nothing(client, dummyjson, user, writes):
+    response = refresh(client)
+
+    assert response.status_code == 200
+    assert response.json()["access_token"] == dummyjson.access_token
+    assert response.json()["refresh_token"] == "refresh-2"
+    assert response.json()["user"]["id"] == str(user.id)
+    assert writes == []
+
+
+def test_refresh_creates_an_unknown_user(client, db, dummyjson, user):
+    dummyjson.user = {"id": user.external_user_id + 1, "username": "new-user"}
+
+    assert refresh(client).status_code == 200
+
+    assert db.scalar(select(func.count()).select_from(User)) == 2
+
+
+def test_refreshed_token_is_served_from_the_cache(client, dummyjson, user):
+    refresh(client)
+    assert dummyjson.paths == ["/auth/refresh", "/auth/me"]
+
+    response = client.get(
+        "/api/v1/auth/me",
+        headers={"Authorization": f"Bearer {dummyjson.access_token}"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["id"] == str(user.id)
+    assert dummyjson.paths == ["/auth/refresh", "/auth/me"]
+
+
+def test_refresh_drops_the_replaced_token(client, dummyjson, auth_headers):
+    old_token = auth_headers["Authorization"].removeprefix("Bearer ")
+
+    assert refresh(client, auth_headers).status_code == 200
+
+    assert token_cache.get(old_token) is None
+    # Asks DummyJSON again, which no longer accepts it
+    assert client.get("/api/v1/auth/me", headers=auth_headers).status_code == 401
+
+
+def test_refresh_with_an_invalid_refresh_token(client, dummyjson, auth_headers):
+    response = refresh(client, auth_headers, refresh_token="revoked")
+
+    assert response.status_code == 401
+    assert dummyjson.paths == ["/auth/refresh"]
+    # Nothing was replaced
+    assert client.get("/api/v1/auth/me", headers=auth_headers).status_code == 200
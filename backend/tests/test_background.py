@@ -0,0 +1,95 @@
+"""Background jobs run in one worker at a time"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import text
+
+from src.services.background import BACKGROUND_JOBS_LOCK_NAMESPACE, JobLeader
+
+RETRY_SECONDS = 0.05
+
+
+@pytest.fixture
+def leaders(database):
+    """Two workers' leaders, taking the lock on separate connections"""
+    return JobLeader(database, RETRY_SECONDS), JobLeader(database, RETRY_SECONDS)
+
+
+def test_only_one_worker_holds_the_lock(leaders):
+    first, second = leaders
+
+    held = first.acquire()
+    assert held is not None
+    assert second.acquire() is None
+
+    first.release(held)
+    taken_over = second.acquire()
+    assert taken_over is not None
+    second.release(taken_over)
+
+
+def recording_job(name: str, runs: list[str]):
+    return (name, 0.01, lambda: runs.append(name))
+
+
+async def until(condition, timeout: float = 5) -> None:
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+def test_jobs_move_to_another_worker_when_the_first_stops(leaders):
+    first, second = leaders
+    runs = []
+
+    async def scenario():
+        running = asyncio.create_task(first.run([recording_job("first", runs)]))
+        await until(lambda: "first" in runs)
+        waiting = asyncio.create_task(second.run([recording_job("second", runs)]))
+        await asyncio.sleep(RETRY_SECONDS * 3)
+        assert "second" not in runs
+
+        running.cancel()
+        await asyncio.gather(running, return_exceptions=True)
+        assert not first.leading
+        await until(lambda: "second" in runs)
+        assert second.leading
+
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+
+def test_jobs_move_when_the_lock_connection_is_lost(leaders, database):
+    first, second = leaders
+    runs = []
+
+    async def scenario():
+        running = asyncio.create_task(first.run([recording_job("first", runs)]))
+        await until(lambda: first.leading)
+        waiting = asyncio.create_task(second.run([recording_job("second", runs)]))
+
+        with database.begin() as conn:
+            # Two-key advisory locks keep the first key in classid
+            conn.execute(
+                text(
+                    "SELECT pg_terminate_backend(pid) FROM pg_locks "
+                    "WHERE locktype = 'advisory' AND objsubid = 2 "
+                    "AND classid = :namespace AND granted"
+                ),
+                {"namespace": BACKGROUND_JOBS_LOCK_NAMESPACE},
+            )
+        await until(lambda: second.leading)
+        # The first stops its jobs once its next check fails
+        await until(lambda: not first.leading)
+        runs.clear()
+        await asyncio.sleep(RETRY_SECONDS * 3)
+        assert set(runs) == {"second"}
+
+        for task in (running, waiting):
+            task.cancel()
+        await asyncio.gather(running, waiting, return_exceptions=True)
+
+    asyncio.run(scenario())
@@ -0,0 +1,216 @@
+import socket
+import threading
+import uuid
+
+import pytest
+from pydantic import TypeAdapter
+
+from src.models.user import User
+from src.services import cache
+from src.services.cache import LRUCache, ReadCache, RedisCache, create_backend
+
+adapter = TypeAdapter(dict[str, int])
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    return clock
+
+
+def test_lru_evicts_the_least_recently_used_entry():
+    lru = LRUCache(max_entries=2)
+    lru.set("a", 1, adapter, ttl=60)
+    lru.set("b", 2, adapter, ttl=60)
+    # Reading "a" makes "b" the oldest
+    assert lru.get("a", adapter) == 1
+
+    lru.set("c", 3, adapter, ttl=60)
+
+    assert lru.get("b", adapter) is None
+    assert lru.get("a", adapter) == 1
+    assert lru.get("c", adapter) == 3
+
+
+def test_lru_entries_expire(clock):
+    lru = LRUCache()
+    lru.set("a", 1, adapter, ttl=60)
+
+    clock.now += 60
+    assert lru.get("a", adapter) == 1
+    clock.now += 1
+    assert lru.get("a", adapter) is None
+
+
+class RespServer:
+    """Redis-protocol stand-in knowing AUTH, SELECT, GET and SET ... EX"""
+
+    def __init__(self, password: str | None = None):
+        self.password = password
+        self.rejected_auths = 0
+        self.data: dict[bytes, bytes] = {}
+        self.commands: list[list[bytes]] = []
+        self.connections = 0
+        self._server = socket.create_server(("127.0.0.1", 0))
+        self.port = self._server.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def url(self, password: str | None = None, db: int = 0) -> str:
+        auth = f":{password}@" if password else ""
+        return f"redis://{auth}127.0.0.1:{self.port}/{db}"
+
+    def close(self):
+        self._server.close()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn: socket.socket):
+        reader = conn.makefile("rb")
+        with conn:
+            while line := reader.readline():
+                args = []
+                for _ in range(int(line[1:])):
+                    length = int(reader.readline()[1:])
+                    args.append(reader.read(length + 2)[:-2])
+                self.commands.append(args)
+                conn.sendall(self._reply(*args))
+
+    def _reply(self, command: bytes, *args: bytes) -> bytes:
+        if command == b"AUTH":
+            if self.rejected_auths:
+                self.rejected_auths -= 1
+                return b"-ERR try again\r\n"
+            if args[0].decode() != self.password:
+                return b"-WRONGPASS invalid password\r\n"
+            return b"+OK\r\n"
+        if command == b"SELECT":
+            return b"+OK\r\n"
+        if command == b"GET":
+            value = self.data.get(args[0])
+            if value is None:
+                return b"$-1\r\n"
+            return b"$%d\r\n%s\r\n" % (len(value), value)
+        if command == b"SET":
+            self.data[args[0]] = args[1]
+            return b"+OK\r\n"
+        return b"-ERR unknown command\r\n"
+
+
+@pytest.fixture
+def resp_server():
+    server = RespServer(password="secret")
+    yield server
+    server.close()
+
+
+def test_redis_round_trip(resp_server):
+    redis = RedisCache(resp_server.url("secret", db=2))
+
+    assert redis.get("k", adapter) is None
+    redis.set("k", {"a": 1}, adapter, ttl=30)
+
+    assert redis.get("k", adapter) == {"a": 1}
+    assert resp_server.commands == [
+        [b"AUTH", b"secret"],
+        [b"SELECT", b"2"],
+        [b"GET", b"k"],
+        [b"SET", b"k", b'{"a":1}', b"EX", b"30"],
+        [b"GET", b"k"],
+    ]
+    assert resp_server.connections == 1
+
+
+def test_create_backend_from_url(resp_server):
+    assert isinstance(create_backend(resp_server.url()), RedisCache)
+    assert isinstance(create_backend(None), LRUCache)
+
+
+def test_redis_reconnects_after_a_failed_handshake(resp_server):
+    resp_server.data[b"k"] = b'{"a":1}'
+    resp_server.rejected_auths = 1
+    redis = RedisCache(resp_server.url("secret"))
+
+    assert redis.get("k", adapter) is None
+    # The rejected connection is not reused
+    assert redis.get("k", adapter) == {"a": 1}
+    assert resp_server.connections == 2
+
+
+def test_redis_wrong_password_is_a_miss(resp_server):
+    resp_server.data[b"k"] = b'{"a":1}'
+    redis = RedisCache(resp_server.url("wrong"))
+
+    assert redis.get("k", adapter) is None
+    assert [b"GET", b"k"] not in resp_server.commands
+
+
+def test_redis_incompatible_entry_is_a_miss(resp_server):
+    # Written by an older version of the schema
+    resp_server.data[b"k"] = b'{"a":"one"}'
+    redis = RedisCache(resp_server.url("secret"))
+
+    assert redis.get("k", adapter) is None
+
+
+def test_redis_unavailable_is_a_miss(resp_server):
+    with socket.create_server(("127.0.0.1", 0)) as closed:
+        # Nothing listens there once it is closed
+        redis = RedisCache(resp_server.url("secret"))
+        redis.port = closed.getsockname()[1]
+
+    redis.set("k", {"a": 1}, adapter, ttl=30)
+    assert redis.get("k", adapter) is None
+
+
+def test_key_includes_the_users_cache_version():
+    user = User(id=uuid.uuid4(), cache_version=3)
+
+    assert ReadCache.key(user, "car", 7) == f"{user.id}:3:car:7"
+
+
+def test_invalidate_user_makes_the_next_read_miss(db, user):
+    read_cache = ReadCache(LRUCache())
+    read_cache.set(user, "cars", value={"a": 1}, adapter=adapter)
+    assert read_cache.get(user, "cars", adapter=adapter) == {"a": 1}
+
+    ReadCache.invalidate_user(user)
+    db.commit()
+
+    assert user.cache_version == 1
+    assert read_cache.get(user, "cars", adapter=adapter) is None
+
+
+def test_write_shows_up_in_the_next_read(client, auth_headers, car):
+    assert len(client.get("/api/v1/cars/", headers=auth_headers).json()) == 1
+
+    response = client.put(
+        f"/api/v1/cars/{car.id}",
+        json={
+            "name": "Renamed",
+            "connector_types": ["CCS"],
+            "battery_size": 60,
+            "max_kw_ac": 11,
+            "max_kw_dc": 100,
+        },
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+
+    [listed] = client.get("/api/v1/cars/", headers=auth_headers).json()
+    assert listed["name"] == "Renamed"
@@ -0,0 +1,106 @@
+import pytest
+
+from src.api.routes.cars import _validate_import_rows
+from src.models.car import ConnectorType
+from src.services.car_import import ImportFormat, read_rows
+
+CSV = (
+    "\ufeffname,connector_types,battery_charge_limit,battery_size,max_kw_ac,max_kw_dc\r\n"
+    "Model 3, CCS ; Type 2 ,,75,11,250\r\n"
+    "Leaf,CHAdeMO,90,40,7,50\r\n"
+)
+
+
+def test_read_csv_rows():
+    assert read_rows(CSV.encode(), ImportFormat.CSV) == [
+        {
+            "name": "Model 3",
+            "connector_types": ["CCS", "Type 2"],
+            # Empty cell left out, so the default applies
+            "battery_size": "75",
+            "max_kw_ac": "11",
+            "max_kw_dc": "250",
+        },
+        {
+            "name": "Leaf",
+            "connector_types": ["CHAdeMO"],
+            "battery_charge_limit": "90",
+            "battery_size": "40",
+            "max_kw_ac": "7",
+            "max_kw_dc": "50",
+        },
+    ]
+
+
+def test_read_json_rows():
+    assert read_rows(b'[{"name": "Leaf"}]', ImportFormat.JSON) == [{"name": "Leaf"}]
+
+
+@pytest.mark.parametrize(
+    "body, import_format, message",
+    [
+        (b"\xff\xfe", ImportFormat.JSON, "not UTF-8"),
+        (b"[{", ImportFormat.JSON, "invalid JSON"),
+        (b'{"name": "Leaf"}', ImportFormat.JSON, "expected a JSON array"),
+    ],
+)
+def test_read_rows_rejects_unreadable_files(body, import_format, message):
+    with pytest.raises(ValueError, match=message):
+        read_rows(body, import_format)
+
+
+@pytest.mark.parametrize(
+    "content_type, import_format",
+    [
+        ("application/json", ImportFormat.JSON),
+        ("text/csv; charset=utf-8", ImportFormat.CSV),
+        ("Text/CSV", ImportFormat.CSV),
+        ("text/plain", None),
+        (None, None),
+    ],
+)
+def test_format_from_content_type(content_type, import_format):
+    assert ImportFormat.from_content_type(content_type) is import_format
+
+
+def test_validate_import_rows():
+    rows = read_rows(CSV.encode(), ImportFormat.CSV)
+
+    values, errors = _validate_import_rows(rows)
+
+    assert errors == []
+    assert values[0] == {
+        "name": "Model 3",
+        "battery_charge_limit": 80,
+        "battery_size": 75,
+        "max_kw_ac": 11,
+        "max_kw_dc": 250,
+        "connector_types": [ConnectorType.CCS, ConnectorType.TYPE_2],
+    }
+    assert values[1]["battery_charge_limit"] == 90
+
+
+def test_validate_import_rows_reports_every_invalid_row():
+    valid = {
+        "name": "Leaf",
+        "connector_types": ["CHAdeMO"],
+        "battery_size": 40,
+        "max_kw_ac": 7,
+        "max_kw_dc": 50,
+    }
+    rows = [
+        valid,
+        {**valid, "battery_size": 0},
+        {**valid, "connector_types": ["NACS"]},
+        "not an object",
+    ]
+
+    values, errors = _validate_import_rows(rows)
+
+    assert len(values) == 1
+    assert [error["loc"] for error in errors] == [
+        ("body", 1, "battery_size"),
+        ("body", 2, "connector_types"),
+        ("body", 3),
+    ]
+    assert errors[1]["input"] == ["NACS"]
@@ -0,0 +1,72 @@
+import asyncio
+import uuid
+
+import pytest
+from fastapi import HTTPException, Response
+
+from src.api.models.cars import CarCreateRequest
+from src.api.routes.cars import update_car
+from src.database import SessionLocal
+from src.models.car import Car
+from src.models.user import User
+
+CHANGES = {
+    "connector_types": ["CCS"],
+    "battery_size": 60,
+    "max_kw_ac": 11,
+    "max_kw_dc": 100,
+}
+
+
+def put(client, car, headers, name="Renamed"):
+    return client.put(
+        f"/api/v1/cars/{car.id}", json={"name": name, **CHANGES}, headers=headers
+    )
+
+
+def test_update_with_the_current_etag(client, auth_headers, car):
+    response = put(client, car, {**auth_headers, "If-Match": '"1"'})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"2"'
+
+
+def test_update_with_a_stale_etag(client, auth_headers, car):
+    assert put(client, car, {**auth_headers, "If-Match": '"1"'}).status_code == 200
+
+    response = put(client, car, {**auth_headers, "If-Match": '"1"'}, name="Lost")
+
+    assert response.status_code == 412
+
+
+def test_concurrent_updates_of_the_same_version(client, auth_headers, car):
+    with SessionLocal() as session:
+        # Both requests have read version 1 before either writes
+        session.get(Car, car.id)
+        assert put(client, car, {**auth_headers, "If-Match": '"1"'}).status_code == 200
+
+        with pytest.raises(HTTPException) as lost:
+            asyncio.run(
+                update_car(
+                    car.id,
+                    CarCreateRequest(name="Lost", **CHANGES),
+                    Response(),
+                    if_match='"1"',
+                    current_user=session.get(User, car.user_id),
+                    db=session,
+                )
+            )
+
+    assert lost.value.status_code == 412
+    [listed] = client.get("/api/v1/cars/", headers=auth_headers).json()
+    assert listed["name"] == "Renamed"
+
+
+def test_update_of_another_users_car(client, auth_headers, db, car):
+    other = User(external_user_id=uuid.uuid4().int % 1_000_000_000, username="other")
+    db.add(other)
+    db.flush()
+    car.user_id = other.id
+    db.commit()
+
+    assert put(client, car, auth_headers).status_code == 404
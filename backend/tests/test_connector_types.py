@@ -0,0 +1,39 @@
+import pytest
+
+from src.models.car import (
+    ConnectorType,
+    canonical_connector_types,
+    connector_mask,
+    masks_supporting,
+)
+
+ALL_MASKS = range(1, 1 << len(ConnectorType))
+
+
+def test_bits_are_distinct():
+    bits = [ct.bit for ct in ConnectorType]
+    assert len(set(bits)) == len(bits)
+    assert connector_mask(ConnectorType) == max(ALL_MASKS)
+
+
+@pytest.mark.parametrize("connector_type", list(ConnectorType))
+def test_masks_supporting(connector_type):
+    masks = masks_supporting(connector_type)
+
+    assert masks == sorted(masks)
+    assert masks == [m for m in ALL_MASKS if m & connector_type.bit]
+    # Half of all non-empty combinations include any one type
+    assert len(masks) == 1 << (len(ConnectorType) - 1)
+
+
+def test_masks_supporting_matches_cars_with_that_type():
+    car = [ConnectorType.CCS, ConnectorType.TYPE_2]
+    mask = connector_mask(car)
+    for connector_type in ConnectorType:
+        assert (mask in masks_supporting(connector_type)) is (connector_type in car)
+
+
+def test_canonical_connector_types():
+    assert canonical_connector_types(
+        [ConnectorType.SCHUKO, ConnectorType.CCS, ConnectorType.SCHUKO]
+    ) == [ConnectorType.CCS, ConnectorType.SCHUKO]
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.api.etags import (
+    EPOCH,
+    etag_matches,
+    not_modified,
+    precondition_failed,
+    timestamp_etag,
+    version_etag,
+)
+
+
+@pytest.mark.parametrize(
+    "if_none_match, matches",
+    [
+        (None, False),
+        ("", False),
+        ('"7"', True),
+        ('W/"7"', True),
+        ('"6"', False),
+        ('"6", "7"', True),
+        ('"6",W/"7" ', True),
+        ("*", True),
+        (" * ", True),
+        ("7", False),
+        ('"77"', False),
+    ],
+)
+def test_etag_matches(if_none_match, matches):
+    assert etag_matches(if_none_match, version_etag(7)) is matches
+
+
+@pytest.mark.parametrize(
+    "if_match, failed",
+    [
+        (None, False),
+        ("*", False),
+        ('"7"', False),
+        ('"6", "7"', False),
+        ('"6"', True),
+        # Strong comparison
+        ('W/"7"', True),
+    ],
+)
+def test_precondition_failed(if_match, failed):
+    assert precondition_failed(if_match, version_etag(7)) is failed
+
+
+def test_timestamp_etag_is_exact_to_the_microsecond():
+    updated_at = datetime(2026, 1, 5, 8, tzinfo=timezone.utc)
+    assert timestamp_etag(EPOCH + timedelta(microseconds=1)) == '"1"'
+    assert timestamp_etag(updated_at) != timestamp_etag(
+        updated_at + timedelta(microseconds=1)
+    )
+
+
+def test_not_modified():
+    response = not_modified('"7"')
+    assert response.status_code == 304
+    assert response.headers["ETag"] == '"7"'
+    assert response.body == b""
@@ -0,0 +1,248 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func, select
+
+from src.api.models.cars import CarCreateRequest
+from src.api.routes.cars import _create_car
+from src.database import SessionLocal
+from src.models.car import Car
+from src.models.idempotency_key import IdempotencyKey
+from src.models.user import User
+from src.services.idempotency import (
+    REPLAY_HEADER,
+    IdempotencyService,
+    request_fingerprint,
+)
+
+
+def car_request(connector_types=("CCS", "Type 2"), **changes) -> CarCreateRequest:
+    return CarCreateRequest(
+        **{
+            "name": "Test car",
+            "connector_types": list(connector_types),
+            "battery_size": 60,
+            "max_kw_ac": 11,
+            "max_kw_dc": 100,
+            **changes,
+        }
+    )
+
+
+def test_fingerprint_depends_on_route_and_body():
+    fingerprint = request_fingerprint("POST /cars/", car_request())
+    assert len(fingerprint) == 64
+    assert fingerprint == request_fingerprint("POST /cars/", car_request())
+    assert fingerprint != request_fingerprint("POST /other/", car_request())
+    assert fingerprint != request_fingerprint("POST /cars/", car_request(name="x"))
+
+
+def test_fingerprint_ignores_the_order_of_sets():
+    assert request_fingerprint(
+        "POST /cars/", car_request(["CCS", "TYPE2", "CHADEMO"])
+    ) == request_fingerprint("POST /cars/", car_request(["CHADEMO", "TYPE2", "CCS"]))
+
+
+def test_fingerprint_is_the_same_in_every_worker():
+    # Set iteration order follows the per-process hash seed
+    script = (
+        "from tests.test_idempotency import car_request\n"
+        "from src.services.idempotency import request_fingerprint\n"
+        "print(request_fingerprint('POST /cars/', "
+        "car_request(['CCS', 'TYPE2', 'CHADEMO', 'NACS'])))"
+    )
+    fingerprints = {
+        subprocess.run(
+            [sys.executable, "-c", script],
+            env={**os.environ, "PYTHONHASHSEED": str(seed)},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        for seed in range(4)
+    }
+    assert len(fingerprints) == 1
+
+
+class Crash(BaseException):
+    """Stands in for the worker dying"""
+
+
+def crash_after_complete(service, session, monkeypatch, commit_first: bool):
+    """Make the worker die at the commit that follows storing the response"""
+    complete = service._complete
+    commit = session.commit
+
+    def crashing_commit():
+        if commit_first:
+            commit()
+        raise Crash
+
+    def complete_then_crash(*args):
+        complete(*args)
+        monkeypatch.setattr(session, "commit", crashing_commit)
+
+    monkeypatch.setattr(service, "_complete", complete_then_crash)
+
+
+def create_car(service, session, user_id, key, payload):
+    user = session.get(User, user_id)
+    return asyncio.run(
+        service.run(
+            session,
+            user_id,
+            key,
+            route="POST /cars/",
+            payload=payload,
+            handler=lambda: _create_car(payload, user, session),
+        )
+    )
+
+
+def count_cars(db, user) -> int:
+    return db.scalar(select(func.count()).where(Car.user_id == user.id))
+
+
+def test_replay_after_crash_does_not_insert_again(db, user, monkeypatch):
+    service = IdempotencyService()
+    key = str(uuid.uuid4())
+    payload = car_request()
+
+    with SessionLocal() as session:
+        crash_after_complete(service, session, monkeypatch, commit_first=True)
+        with pytest.raises(Crash):
+            create_car(service, session, user.id, key, payload)
+
+    with SessionLocal() as session:
+        replayed = create_car(service, session, user.id, key, payload)
+
+    assert replayed.headers[REPLAY_HEADER] == "true"
+    assert count_cars(db, user) == 1
+
+
+def test_crash_before_commit_leaves_nothing_to_replay(db, user, monkeypatch):
+    service = IdempotencyService()
+    key = str(uuid.uuid4())
+    payload = car_request()
+
+    with SessionLocal() as session:
+        crash_after_complete(service, session, monkeypatch, commit_first=False)
+        # Nothing cleans up after a worker that died
+        monkeypatch.setattr(service, "_release", lambda *args: None)
+        with pytest.raises(Crash):
+            create_car(service, session, user.id, key, payload)
+    monkeypatch.undo()
+
+    assert count_cars(db, user) == 0
+    # The key stays in flight until its holder times out
+    db.get(IdempotencyKey, (user.id, key)).expires_at = func.now()
+    db.commit()
+
+    with SessionLocal() as session:
+        created = create_car(service, session, user.id, key, payload)
+
+    assert created.name == payload.name
+    assert count_cars(db, user) == 1
+
+
+async def create_car_once(service, user_id, key, payload, executions, before=None):
+    """POST /cars/ in its own session; `before` runs ahead of the insert"""
+    with SessionLocal() as session:
+        user = session.get(User, user_id)
+
+        async def handler():
+            executions.append(key)
+            if before is not None:
+                await before()
+            return await _create_car(payload, user, session)
+
+        return await service.run(
+            session,
+            user_id,
+            key,
+            route="POST /cars/",
+            payload=payload,
+            handler=handler,
+        )
+
+
+class WaitingService(IdempotencyService):
+    """Signals once a duplicate starts waiting for the first request"""
+
+    def __init__(self, waiting):
+        super().__init__()
+        self.waiting = waiting
+
+    async def _wait(self, *args):
+        self.waiting.set()
+        return await super()._wait(*args)
+
+
+def test_duplicate_in_another_worker_waits_for_the_first(db, user):
+    key = str(uuid.uuid4())
+    payload = car_request()
+    executions = []
+    started, release, waiting = (threading.Event() for _ in range(3))
+
+    async def hold():
+        started.set()
+        await asyncio.to_thread(release.wait, 5)
+
+    def first():
+        return asyncio.run(
+            create_car_once(
+                IdempotencyService(), user.id, key, payload, executions, hold
+            )
+        )
+
+    def duplicate():
+        return asyncio.run(
+            create_car_once(WaitingService(waiting), user.id, key, payload, executions)
+        )
+
+    with ThreadPoolExecutor(2) as pool:
+        created = pool.submit(first)
+        assert started.wait(5)
+        replayed = pool.submit(duplicate)
+        assert waiting.wait(5)
+        release.set()
+        created, replayed = created.result(5), replayed.result(5)
+
+    assert executions == [key]
+    assert count_cars(db, user) == 1
+    assert replayed.headers[REPLAY_HEADER] == "true"
+    assert json.loads(replayed.body) == jsonable_encoder(created)
+
+
+def test_duplicate_in_the_same_worker_waits_for_the_first(db, user):
+    key = str(uuid.uuid4())
+    payload = car_request()
+    executions = []
+
+    async def both():
+        waiting, release = asyncio.Event(), asyncio.Event()
+        service = WaitingService(waiting)
+        created = asyncio.create_task(
+            create_car_once(service, user.id, key, payload, executions, release.wait)
+        )
+        replayed = asyncio.create_task(
+            create_car_once(service, user.id, key, payload, executions)
+        )
+        await waiting.wait()
+        release.set()
+        return await created, await replayed
+
+    created, replayed = asyncio.run(asyncio.wait_for(both(), timeout=5))
+
+    assert executions == [key]
+    assert count_cars(db, user) == 1
+    assert replayed.headers[REPLAY_HEADER] == "true"
+    assert json.loads(replayed.body) == jsonable_encoder(created)
@@ -0,0 +1,43 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from src.instrumentation.context import RequestStats, request_stats
+from src.instrumentation.database import instrument_engine
+
+
+@pytest.fixture
+def stats():
+    stats = RequestStats(statements=[])
+    token = request_stats.set(stats)
+    yield stats
+    request_stats.reset(token)
+
+
+def test_statements_are_counted_and_timed(stats):
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        conn.execute(text("SELECT 2"))
+
+    assert stats.db_statements == 2
+    assert stats.statements == ["SELECT 1", "SELECT 2"]
+    assert 0 < stats.db_seconds < 1
+
+
+def test_failed_statements_leave_nothing_behind(stats):
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+
+    with engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM missing"))
+        assert conn.info == {}
+        conn.execute(text("SELECT 1"))
+
+    # Only statements that completed are counted
+    assert stats.db_statements == 1
+    assert stats.statements == ["SELECT 1"]
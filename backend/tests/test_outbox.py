@@ -0,0 +1,205 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from sqlalchemy import select
+
+from src.models.outbox_event import OutboxEvent
+from src.models.reservation import Reservation, ReservationStatus
+from src.services import outbox
+from src.services.outbox import (
+    Claimed,
+    OutboxDispatcher,
+    record_reservation_events,
+)
+from src.services.upstreams import upstream_clients
+
+NOW = datetime(2026, 1, 5, 8, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    """Stands in for the provider; answers with `provider.status`"""
+
+    class Provider:
+        def __init__(self):
+            self.status = 200
+            self.batches: list[list[dict]] = []
+
+        def __call__(self, request: httpx.Request) -> httpx.Response:
+            self.batches.append(json.loads(request.content)["events"])
+            return httpx.Response(self.status)
+
+    stub = Provider()
+    monkeypatch.setitem(
+        upstream_clients._clients,
+        "reservation_events",
+        httpx.AsyncClient(transport=httpx.MockTransport(stub)),
+    )
+    return stub
+
+
+def claimed(n: int = 2) -> list[Claimed]:
+    return [Claimed(uuid.uuid4(), {"n": i}, NOW) for i in range(n)]
+
+
+@pytest.mark.parametrize("attempts", [1, 2, 5, 30])
+def test_backoff_doubles_with_jitter_up_to_the_maximum(attempts):
+    delay = min(
+        outbox.OUTBOX_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1),
+        outbox.OUTBOX_BACKOFF_MAX_SECONDS,
+    )
+    for _ in range(50):
+        backoff = OutboxDispatcher.backoff(attempts).total_seconds()
+        assert delay / 2 <= backoff <= delay
+
+
+class RecordingSession:
+    def __init__(self):
+        self.added = []
+        self.flushed = False
+
+    def flush(self):
+        self.flushed = True
+
+    def add(self, instance):
+        self.added.append(instance)
+
+
+def test_record_reservation_events():
+    reservation = Reservation(
+        id=uuid.uuid4(),
+        start_time=NOW,
+        end_time=NOW + timedelta(hours=1),
+        charging_point_id="cp-1",
+        status=ReservationStatus.CANCELLED,
+        updated_at=NOW - timedelta(minutes=5),
+    )
+    db = RecordingSession()
+
+    record_reservation_events(db, [reservation])
+
+    assert db.flushed
+    [event] = db.added
+    assert event.event_type == "reservation.cancelled"
+    assert event.aggregate_id == reservation.id
+    assert event.payload == {
+        "event_id": str(event.id),
+        "event_type": "reservation.cancelled",
+        "reservation_id": str(reservation.id),
+        "charging_point_id": "cp-1",
+        "status": "cancelled",
+        "start_time": "2026-01-05T08:00:00Z",
+        "end_time": "2026-01-05T09:00:00Z",
+        "occurred_at": "2026-01-05T07:55:00Z",
+    }
+
+
+def test_record_nothing_without_reservations():
+    db = RecordingSession()
+    record_reservation_events(db, [])
+    assert not db.flushed and db.added == []
+
+
+def test_post_sends_the_batch_in_one_request(provider):
+    batch = claimed(3)
+
+    assert asyncio.run(OutboxDispatcher().post(batch)) is None
+    assert provider.batches == [[c.payload for c in batch]]
+
+
+def test_post_returns_the_error(provider):
+    provider.status = 503
+
+    error = asyncio.run(OutboxDispatcher().post(claimed()))
+
+    assert error.startswith("HTTPStatusError: Server error '503 Service Unavailable'")
+    assert "\n" not in error
+
+
+def test_post_returns_connection_errors(monkeypatch):
+    def refuse(request):
+        raise httpx.ConnectError("Connection refused", request=request)
+
+    monkeypatch.setitem(
+        upstream_clients._clients,
+        "reservation_events",
+        httpx.AsyncClient(transport=httpx.MockTransport(refuse)),
+    )
+
+    error = asyncio.run(OutboxDispatcher().post(claimed()))
+
+    assert error == "ConnectError: Connection refused"
+
+
+@pytest.fixture
+def pending(db):
+    events = [
+        OutboxEvent(
+            event_type="reservation.booked",
+            aggregate_id=uuid.uuid4(),
+            payload={"n": i},
+        )
+        for i in range(3)
+    ]
+    db.add_all(events)
+    db.commit()
+    return [e.id for e in events]
+
+
+def stored(db, ids) -> list[OutboxEvent]:
+    db.expire_all()
+    return db.scalars(select(OutboxEvent).where(OutboxEvent.id.in_(ids))).all()
+
+
+def test_dispatch_marks_delivered_events(db, pending, provider):
+    assert asyncio.run(OutboxDispatcher().dispatch()) == 3
+
+    assert sorted(e["n"] for e in provider.batches[0]) == [0, 1, 2]
+    for event in stored(db, pending):
+        assert event.delivered_at is not None
+        assert event.attempts == 1
+    # Nothing left to send
+    assert asyncio.run(OutboxDispatcher().dispatch()) == 0
+    assert len(provider.batches) == 1
+
+
+def test_dispatch_retries_failed_events_later(db, pending, provider):
+    provider.status = 500
+    before = datetime.now(timezone.utc)
+
+    asyncio.run(OutboxDispatcher().dispatch())
+
+    for event in stored(db, pending):
+        assert event.delivered_at is None
+        assert event.attempts == 1
+        assert event.last_error.startswith("HTTPStatusError")
+        assert event.next_attempt_at > before
+    # Not due yet
+    assert asyncio.run(OutboxDispatcher().dispatch()) == 0
+
+
+def test_dispatch_gives_up_after_max_attempts(db, pending, provider):
+    provider.status = 500
+    dispatcher = OutboxDispatcher(max_attempts=1)
+
+    asyncio.run(dispatcher.dispatch())
+    for event in stored(db, pending):
+        event.next_attempt_at = datetime.now(timezone.utc)
+    db.commit()
+
+    assert asyncio.run(dispatcher.dispatch()) == 0
+    assert len(provider.batches) == 1
+
+
+def test_purge_keeps_recent_and_undelivered_events(db, pending):
+    old, recent, undelivered = stored(db, pending)
+    old.delivered_at = datetime.now(timezone.utc) - outbox.OUTBOX_RETENTION * 2
+    recent.delivered_at = datetime.now(timezone.utc)
+    db.commit()
+
+    assert OutboxDispatcher().purge_delivered() == 1
+    assert {e.id for e in stored(db, pending)} == {recent.id, undelivered.id}
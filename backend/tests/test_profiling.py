@@ -0,0 +1,164 @@
+import os
+import pstats
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.routes.admin import router as admin_router
+from src.instrumentation.context import RequestStats
+from src.instrumentation.profiling import (
+    ProfilingMiddleware,
+    phase_timings,
+    profiler as shared_profiler,
+)
+
+TOKEN = "secret"
+
+
+@pytest.fixture
+def profiler(monkeypatch, tmp_path):
+    """The shared profiler, writing to a temporary directory"""
+    for name, value in {
+        "token": TOKEN,
+        "sample_rate": 0.0,
+        "directory": tmp_path / "profiles",
+        "keep": 100,
+        "enabled": True,
+    }.items():
+        monkeypatch.setattr(shared_profiler, name, value)
+    return shared_profiler
+
+
+@pytest.fixture
+def client(profiler):
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+    app.include_router(admin_router)
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    return TestClient(app)
+
+
+def stored(profiler) -> set[str]:
+    return {path.stem for path in profiler.directory.glob("*.prof")}
+
+
+def test_phase_timings_in_milliseconds():
+    stats = RequestStats(db_seconds=0.2, upstream_seconds=0.3, auth_seconds=0.35)
+
+    assert phase_timings(stats, 1.0, 0.1) == {
+        "total": 1000.0,
+        "auth": 350.0,
+        "db": 200.0,
+        "upstream": 300.0,
+        "serialise": 100.0,
+        "app": 400.0,
+    }
+    assert phase_timings(stats, 0.4, 0.1)["app"] == 0.0
+
+
+def test_requests_are_not_profiled_by_default(client, profiler):
+    response = client.get("/items/1")
+
+    assert response.status_code == 200
+    assert "Server-Timing" not in response.headers
+    assert stored(profiler) == set()
+
+
+def test_wrong_token_is_not_profiled(client, profiler):
+    response = client.get("/items/1", headers={"X-Profile": "guess"})
+
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+    assert stored(profiler) == set()
+
+
+def test_request_with_the_token_gets_its_timings(client, profiler):
+    response = client.get("/items/1", headers={"X-Profile": TOKEN})
+
+    assert response.json() == {"id": 1}
+    profile_id = response.headers["X-Profile-Id"]
+    assert stored(profiler) == {profile_id}
+    timings = dict(
+        phase.split(";dur=") for phase in response.headers["Server-Timing"].split(", ")
+    )
+    assert list(timings) == ["total", "auth", "db", "upstream", "serialise", "app"]
+    assert float(timings["total"]) > 0
+
+    [summary] = profiler.summaries()
+    assert summary["id"] == profile_id
+    assert summary["route"] == "/items/{item_id}"
+    assert summary["path"] == "/items/1"
+    assert summary["status"] == 200
+
+
+def test_sampled_requests_are_stored_without_headers(client, profiler):
+    profiler.sample_rate = 1.0
+
+    response = client.get("/items/1")
+
+    assert "Server-Timing" not in response.headers
+    assert "X-Profile-Id" not in response.headers
+    assert len(stored(profiler)) == 1
+
+
+def test_only_the_newest_profiles_are_kept(client, profiler):
+    profiler.keep = 2
+
+    ids = []
+    for age in (3, 2, 1):
+        response = client.get("/items/1", headers={"X-Profile": TOKEN})
+        ids.append(response.headers["X-Profile-Id"])
+        # File times are too coarse to order requests this quick
+        summary = profiler.directory / f"{ids[-1]}.json"
+        os.utime(summary, (time.time() - age,) * 2)
+
+    assert stored(profiler) == set(ids[1:])
+    assert [s["id"] for s in profiler.summaries()] == ids[:0:-1]
+
+
+@pytest.mark.parametrize("headers", [{}, {"X-Profile": "guess"}])
+@pytest.mark.parametrize("path", ["/admin/profiles", "/admin/profiles/" + "0" * 32])
+def test_admin_endpoints_need_the_token(client, headers, path):
+    response = client.get(path, headers=headers)
+
+    assert response.status_code == 401
+
+
+def test_admin_endpoints_without_a_token_configured(client, profiler):
+    profiler.token = None
+
+    response = client.get("/admin/profiles", headers={"X-Profile": TOKEN})
+
+    assert response.status_code == 503
+
+
+@pytest.mark.parametrize("profile_id", ["0" * 32, "..%2Fprofiles", "not-an-id"])
+def test_unknown_profile_is_404(client, profile_id):
+    response = client.get(f"/admin/profiles/{profile_id}", headers={"X-Profile": TOKEN})
+
+    assert response.status_code == 404
+
+
+def test_admin_serves_stored_profiles(client, profiler, tmp_path):
+    headers = {"X-Profile": TOKEN}
+    profile_id = client.get("/items/1", headers=headers).headers["X-Profile-Id"]
+
+    listed = client.get("/admin/profiles", headers=headers).json()
+    assert [s["id"] for s in listed] == [profile_id]
+
+    response = client.get(f"/admin/profiles/{profile_id}", headers=headers)
+    assert response.status_code == 200
+    downloaded = tmp_path / "downloaded.prof"
+    downloaded.write_bytes(response.content)
+    assert pstats.Stats(str(downloaded)).total_calls > 0
+
+    text = client.get(
+        f"/admin/profiles/{profile_id}", params={"format": "text"}, headers=headers
+    )
+    assert "function calls" in text.text
@@ -0,0 +1,150 @@
+"""Lambda statements match the plain statements they replaced"""
+
+import uuid
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.dialects.postgresql import psycopg
+
+from src import queries
+from src.models.car import Car, ConnectorType, masks_supporting
+from src.models.reservation import Reservation
+from src.models.user import User
+
+DIALECT = psycopg.dialect()
+
+
+def plain_cars_of_user(user_id, connector_type=None):
+    stmt = select(Car).where(Car.user_id == user_id)
+    if connector_type:
+        stmt = stmt.where(Car.connector_mask.in_(masks_supporting(connector_type)))
+    return stmt
+
+
+def rendered(stmt) -> str:
+    """SQL with the bound values inlined; parameter names differ for lambdas"""
+    return str(stmt.compile(dialect=DIALECT, compile_kwargs={"literal_binds": True}))
+
+
+# (lambda statement, plain statement, arguments for two calls)
+STATEMENTS = {
+    "user_by_external_id": (
+        queries.user_by_external_id,
+        lambda external_user_id: select(User).where(
+            User.external_user_id == external_user_id
+        ),
+        lambda: (7,),
+    ),
+    "cars_of_user": (
+        queries.cars_of_user,
+        plain_cars_of_user,
+        lambda: (uuid.uuid4(),),
+    ),
+    "cars_of_user_by_connector": (
+        queries.cars_of_user,
+        plain_cars_of_user,
+        lambda: (uuid.uuid4(), ConnectorType.CCS),
+    ),
+    "car_version": (
+        queries.car_version,
+        lambda car_id, user_id: select(Car.version).where(
+            Car.id == car_id, Car.user_id == user_id
+        ),
+        lambda: (uuid.uuid4(), uuid.uuid4()),
+    ),
+    "reservations_of_user": (
+        queries.reservations_of_user,
+        lambda user_id: (
+            select(Reservation)
+            .where(Reservation.user_id == user_id)
+            .order_by(Reservation.start_time, Reservation.id)
+        ),
+        lambda: (uuid.uuid4(),),
+    ),
+    "reservation_of_user": (
+        queries.reservation_of_user,
+        lambda reservation_id, user_id: select(Reservation).where(
+            Reservation.id == reservation_id, Reservation.user_id == user_id
+        ),
+        lambda: (uuid.uuid4(), uuid.uuid4()),
+    ),
+    "reservation_updated_at": (
+        queries.reservation_updated_at,
+        lambda reservation_id, user_id: select(Reservation.updated_at).where(
+            Reservation.id == reservation_id, Reservation.user_id == user_id
+        ),
+        lambda: (uuid.uuid4(), uuid.uuid4()),
+    ),
+}
+
+
+@pytest.mark.parametrize("name", STATEMENTS)
+def test_lambda_statement_compiles_like_the_plain_one(name):
+    cached, plain, arguments = STATEMENTS[name]
+    # The second call reuses what the first one analysed
+    for args in (arguments(), arguments()):
+        assert rendered(cached(*args)) == rendered(plain(*args))
+
+
+def test_connector_type_changes_the_masks():
+    user_id = uuid.uuid4()
+
+    for connector_type in ConnectorType:
+        params = (
+            queries.cars_of_user(user_id, connector_type)
+            .compile(dialect=DIALECT)
+            .params
+        )
+        assert masks_supporting(connector_type) in params.values()
+
+
+@pytest.fixture
+def executed(database):
+    """Parameters of the statements run during the test"""
+    parameters = []
+
+    def record(conn, cursor, statement, params, context, executemany):
+        parameters.append(params)
+
+    event.listen(database, "before_cursor_execute", record)
+    yield parameters
+    event.remove(database, "before_cursor_execute", record)
+
+
+def test_executions_bind_their_own_values(db, executed):
+    owners = [User(external_user_id=n, username=f"owner-{n}") for n in (1, 2)]
+    db.add_all(owners)
+    db.flush()
+    for owner, connector_type in zip(owners, [ConnectorType.CCS, ConnectorType.TYPE_2]):
+        db.add(
+            Car(
+                name=owner.username,
+                connector_types=[connector_type],
+                battery_size=60,
+                max_kw_ac=11,
+                max_kw_dc=100,
+                user_id=owner.id,
+            )
+        )
+    db.commit()
+    keys = [(owner.external_user_id, owner.id) for owner in owners]
+    executed.clear()
+
+    for external_user_id, user_id in keys:
+        user = db.scalar(queries.user_by_external_id(external_user_id))
+        assert user.id == user_id
+        [car] = db.scalars(queries.cars_of_user(user_id)).all()
+        assert car.user_id == user_id
+    assert executed == [
+        params
+        for external_user_id, user_id in keys
+        for params in (
+            {"external_user_id_1": external_user_id},
+            {"user_id_1": user_id},
+        )
+    ]
+
+    first, second = owners
+    assert db.scalars(queries.cars_of_user(first.id, ConnectorType.CCS)).all()
+    assert not db.scalars(queries.cars_of_user(first.id, ConnectorType.TYPE_2)).all()
+    assert db.scalars(queries.cars_of_user(second.id, ConnectorType.TYPE_2)).all()
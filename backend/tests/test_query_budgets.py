@@ -0,0 +1,137 @@
+"""Budgeted routes stay within their declared number of SQL statements"""
+
+import textwrap
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.instrumentation.context import request_stats
+from src.instrumentation.query_watch import QueryWatchMiddleware, query_budget
+from src.services.cache import LRUCache, read_cache
+
+
+@pytest.fixture
+def reservation(db, user, car):
+    from src.models.reservation import Reservation
+
+    start = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(days=1)
+    reservation = Reservation(
+        start_time=start,
+        end_time=start + timedelta(hours=1),
+        charging_point_id="cp-budget",
+        user_id=user.id,
+        car_id=car.id,
+    )
+    db.add(reservation)
+    db.commit()
+    return reservation
+
+
+def test_list_cars(enforce_query_budgets, client, auth_headers, car):
+    response = client.get("/api/v1/cars/", headers=auth_headers)
+    assert response.status_code == 200
+    assert [c["id"] for c in response.json()] == [str(car.id)]
+
+
+def test_get_car(enforce_query_budgets, client, auth_headers, car):
+    response = client.get(f"/api/v1/cars/{car.id}", headers=auth_headers)
+    assert response.status_code == 200
+
+
+def test_revalidate_car(enforce_query_budgets, client, auth_headers, car, monkeypatch):
+    etag = client.get(f"/api/v1/cars/{car.id}", headers=auth_headers).headers["ETag"]
+    # Revalidated from the database rather than from the cached entry
+    monkeypatch.setattr(read_cache, "backend", LRUCache())
+
+    response = client.get(
+        f"/api/v1/cars/{car.id}", headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+
+
+def test_list_reservations(enforce_query_budgets, client, auth_headers, reservation):
+    response = client.get("/api/v1/reservations/", headers=auth_headers)
+    assert response.status_code == 200
+    assert [r["id"] for r in response.json()] == [str(reservation.id)]
+
+
+def test_get_reservation(enforce_query_budgets, client, auth_headers, reservation):
+    response = client.get(
+        f"/api/v1/reservations/{reservation.id}", headers=auth_headers
+    )
+    assert response.status_code == 200
+
+
+def test_revalidate_reservation(
+    enforce_query_budgets, client, auth_headers, reservation, monkeypatch
+):
+    url = f"/api/v1/reservations/{reservation.id}"
+    etag = client.get(url, headers=auth_headers).headers["ETag"]
+    monkeypatch.setattr(read_cache, "backend", LRUCache())
+
+    response = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_charging_point_utilisation(
+    enforce_query_budgets, client, auth_headers, reservation
+):
+    start = reservation.start_time.replace(minute=0, second=0)
+    response = client.get(
+        f"/api/v1/analytics/charging-points/{reservation.charging_point_id}"
+        "/utilisation",
+        params={
+            "start": start.isoformat(),
+            "end": (start + timedelta(days=1)).isoformat(),
+        },
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+
+
+def over_budget_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(QueryWatchMiddleware)
+
+    @app.get("/over")
+    @query_budget(statements=1)
+    async def over():
+        request_stats.get().db_statements += 2
+        return {}
+
+    return app
+
+
+def test_over_budget_route_is_recorded(enforce_query_budgets):
+    TestClient(over_budget_app()).get("/over")
+
+    [report] = enforce_query_budgets.budget_violations
+    assert report.route == "/over"
+    assert report.statements == 2
+    # Expected here; the fixture would fail the test otherwise
+    enforce_query_budgets.budget_violations.clear()
+
+
+def test_over_budget_route_fails_the_test(pytester):
+    pytester.makeconftest('pytest_plugins = ["src.instrumentation.pytest_plugin"]')
+    pytester.makepyfile(
+        textwrap.dedent(
+            """
+            from fastapi.testclient import TestClient
+
+            from tests.test_query_budgets import over_budget_app
+
+            def test_over(enforce_query_budgets):
+                TestClient(over_budget_app()).get("/over")
+            """
+        )
+    )
+
+    result = pytester.runpytest_inprocess()
+
+    result.assert_outcomes(passed=1, errors=1)
+    result.stdout.fnmatch_lines(
+        ["*Query budget exceeded*", "GET /over: 2 SQL statements (limit 1)"]
+    )
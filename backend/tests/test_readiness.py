@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+
+from src.services import readiness as readiness_module
+from src.services.readiness import Readiness, ping
+from src.services.sharding import reservation_shards
+
+# Nothing listens on port 1
+UNREACHABLE = "postgresql+psycopg://nobody@127.0.0.1:1/none?connect_timeout=1"
+
+
+@pytest.fixture
+def pings(monkeypatch):
+    """Stub `ping`; set `pings.results[url]` to fail one, `pings.calls` counts"""
+
+    class Pings:
+        def __init__(self):
+            self.results: dict[str, str] = {}
+            self.calls = 0
+
+        def __call__(self, target) -> str:
+            self.calls += 1
+            return self.results.get(str(target.url), "ok")
+
+    stub = Pings()
+    monkeypatch.setattr(readiness_module, "ping", stub)
+    return stub
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(readiness_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def status(readiness: Readiness) -> tuple[bool, dict]:
+    return asyncio.run(readiness.status())
+
+
+def test_not_ready_before_warm_up(pings):
+    readiness = Readiness()
+
+    assert status(readiness) == (False, {"status": "starting"})
+    assert pings.calls == 0
+
+
+def test_ready_after_warm_up(pings):
+    readiness = Readiness()
+    asyncio.run(readiness.warm_up(enabled=False))
+
+    ready, body = status(readiness)
+
+    assert ready
+    assert body == {"status": "ready", "checks": {"database": "ok"}, "upstreams": {}}
+
+
+def test_checks_are_cached_for_their_ttl(pings, clock):
+    readiness = Readiness(cache_seconds=5)
+    readiness.warmed_up = True
+
+    status(readiness)
+    clock[0] += 4.9
+    status(readiness)
+    assert pings.calls == 1
+
+    clock[0] += 0.1
+    status(readiness)
+    assert pings.calls == 2
+
+
+def test_concurrent_probes_share_one_round_of_checks(pings):
+    readiness = Readiness()
+    readiness.warmed_up = True
+
+    async def probes():
+        return await asyncio.gather(*(readiness.status() for _ in range(5)))
+
+    assert all(ready for ready, _ in asyncio.run(probes()))
+    assert pings.calls == 1
+
+
+def test_not_ready_while_a_shard_is_down(pings, monkeypatch):
+    shards = {
+        "a": create_engine("postgresql+psycopg://shard-a/db"),
+        "b": create_engine("postgresql+psycopg://shard-b/db"),
+    }
+    monkeypatch.setattr(reservation_shards, "engines", shards)
+    pings.results["postgresql+psycopg://shard-b/db"] = "OperationalError"
+    readiness = Readiness()
+    readiness.warmed_up = True
+
+    ready, body = status(readiness)
+
+    assert not ready
+    assert body["status"] == "unavailable"
+    assert body["checks"] == {
+        "database": "ok",
+        "shard:a": "ok",
+        "shard:b": "OperationalError",
+    }
+
+
+def test_ping_reports_the_error():
+    assert ping(create_engine(UNREACHABLE)) == "OperationalError"
+
+
+@pytest.fixture
+def app_readiness(monkeypatch):
+    """The app's readiness, not warmed up yet and checking on every probe"""
+    readiness = readiness_module.readiness
+    for name, value in {
+        "warmed_up": False,
+        "cache_seconds": 0,
+        "_checks": {},
+        "_checked_at": float("-inf"),
+    }.items():
+        monkeypatch.setattr(readiness, name, value)
+    return readiness
+
+
+def test_ready_endpoint(client, app_readiness):
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json() == {"status": "starting"}
+
+    app_readiness.warmed_up = True
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["checks"] == {"database": "ok"}
+
+
+def test_ready_endpoint_while_the_database_is_down(client, app_readiness, monkeypatch):
+    app_readiness.warmed_up = True
+    monkeypatch.setattr(readiness_module, "engine", create_engine(UNREACHABLE))
+
+    response = client.get("/ready")
+
+    assert response.status_code == 503
+    assert response.json()["checks"] == {"database": "OperationalError"}
+    # Liveness does not depend on it
+    assert client.get("/health").status_code == 200
@@ -0,0 +1,74 @@
+from datetime import datetime, timezone
+from itertools import islice
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from src.services.recurrence import Frequency, Recurrence
+
+UTC = ZoneInfo("UTC")
+AMSTERDAM = ZoneInfo("Europe/Amsterdam")
+
+
+def starts(rule: str, first_start: datetime, tz: ZoneInfo = UTC, n: int = 10):
+    return list(islice(Recurrence.parse(rule).starts(first_start, tz), n))
+
+
+def test_parse_round_trips():
+    rule = "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,FR;UNTIL=20260301T000000Z"
+    recurrence = Recurrence.parse(rule)
+    assert recurrence.frequency == Frequency.WEEKLY
+    assert recurrence.by_day == (0, 4)
+    assert str(recurrence) == rule
+    assert Recurrence.parse(f"RRULE:{rule.lower()}") == recurrence
+
+
+@pytest.mark.parametrize(
+    "rule",
+    [
+        "",
+        "FREQ=MONTHLY",
+        "INTERVAL=2",
+        "FREQ=DAILY;BYDAY=MO",
+        "FREQ=WEEKLY;BYDAY=XX",
+        "FREQ=DAILY;COUNT=2;UNTIL=20260101",
+        "FREQ=DAILY;INTERVAL=0",
+        "FREQ=DAILY;FREQ=WEEKLY",
+        "FREQ=DAILY;BYHOUR=8",
+        "FREQ=DAILY;UNTIL=tomorrow",
+    ],
+)
+def test_parse_rejects_rules_outside_the_subset(rule):
+    with pytest.raises(ValueError):
+        Recurrence.parse(rule)
+
+
+def test_daily_with_interval_and_count():
+    first = datetime(2026, 1, 5, 8, tzinfo=timezone.utc)
+    assert [s.day for s in starts("FREQ=DAILY;INTERVAL=3;COUNT=4", first)] == [
+        5,
+        8,
+        11,
+        14,
+    ]
+
+
+def test_weekly_by_day_starts_from_the_first_occurrence():
+    # A Wednesday: the Monday of that week is skipped
+    first = datetime(2026, 1, 7, 8, tzinfo=timezone.utc)
+    found = starts("FREQ=WEEKLY;BYDAY=MO,WE,FR", first, n=5)
+    assert [s.day for s in found] == [7, 9, 12, 14, 16]
+
+
+def test_until_date_includes_the_whole_day():
+    first = datetime(2026, 1, 5, 20, tzinfo=timezone.utc)
+    found = starts("FREQ=DAILY;UNTIL=20260107", first)
+    assert [s.day for s in found] == [5, 6, 7]
+
+
+def test_wall_clock_time_is_kept_across_daylight_saving():
+    # 08:00 in Amsterdam is 07:00 UTC in winter and 06:00 UTC in summer
+    first = datetime(2026, 3, 27, 7, tzinfo=timezone.utc)
+    found = starts("FREQ=DAILY;COUNT=3", first, AMSTERDAM)
+    assert [s.hour for s in found] == [7, 7, 6]
+    assert all(s.astimezone(AMSTERDAM).hour == 8 for s in found)
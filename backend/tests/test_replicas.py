@@ -0,0 +1,117 @@
+"""Routing reads to read replicas"""
+
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, select
+
+from src.database import (
+    REPLICA_COMMIT_MARGIN,
+    ReplicaSet,
+    RoutingSession,
+    create_database_engine,
+)
+from src.models.user import User
+
+TEST_REPLICA_DATABASE_URL = os.getenv("TEST_REPLICA_DATABASE_URL")
+
+items = Table("items", MetaData(), Column("id", Integer, primary_key=True))
+
+
+def replica_set(positions: dict) -> ReplicaSet:
+    replicas = ReplicaSet(list(positions))
+    replicas.position = positions.get
+    return replicas
+
+
+def test_choose_skips_lagging_and_unreachable_replicas():
+    now = datetime.now(timezone.utc)
+    current, lagging, down = (create_engine("sqlite://") for _ in range(3))
+    replicas = replica_set(
+        {current: now, lagging: now - timedelta(minutes=5), down: None}
+    )
+
+    assert replicas.choose() is current
+
+
+def test_choose_waits_for_the_users_last_write():
+    now = datetime.now(timezone.utc)
+    replica = create_engine("sqlite://")
+    replicas = replica_set({replica: now - timedelta(seconds=2)})
+
+    assert replicas.choose(now - timedelta(minutes=1)) is replica
+    # Not applied yet, or within the commit margin
+    assert replicas.choose(now) is None
+    assert (
+        replicas.choose(now - timedelta(seconds=2) - REPLICA_COMMIT_MARGIN / 2) is None
+    )
+
+
+def test_session_reads_from_replica_until_it_writes():
+    primary, replica = create_engine("sqlite://"), create_engine("sqlite://")
+    db = RoutingSession(bind=primary)
+    db.info["replica"] = replica
+
+    assert db.get_bind(clause=select(items)) is replica
+    assert db.get_bind(clause=select(items).with_for_update()) is primary
+    # Stays on the primary, so it reads its own writes
+    assert db.get_bind(clause=select(items)) is primary
+
+
+def test_route_reads_keeps_a_session_that_wrote_on_the_primary():
+    replica = create_engine("sqlite://")
+    replicas = replica_set({replica: datetime.now(timezone.utc)})
+    db = RoutingSession(bind=create_engine("sqlite://"))
+    db.info["primary"] = True
+
+    replicas.route_reads(db)
+    assert "replica" not in db.info
+
+
+@pytest.fixture
+def replica_database(database):
+    """A second database standing in for a replica of the test database.
+
+    Not actually replicated: rows written to each one are only visible there,
+    which shows where a read went.
+    """
+    if not TEST_REPLICA_DATABASE_URL:
+        pytest.skip("needs TEST_REPLICA_DATABASE_URL")
+    from src.database import Base
+
+    replica = create_database_engine(TEST_REPLICA_DATABASE_URL)
+    Base.metadata.drop_all(replica)
+    Base.metadata.create_all(replica)
+    yield replica
+    Base.metadata.drop_all(replica)
+    replica.dispose()
+
+
+def test_reads_go_to_the_replica_and_writes_to_the_primary(db, replica_database, user):
+    from src.database import SessionLocal
+
+    with RoutingSession(bind=replica_database) as replica_db:
+        replica_db.add(
+            User(
+                id=user.id,
+                external_user_id=user.external_user_id,
+                username="on-replica",
+            )
+        )
+        replica_db.commit()
+
+    replicas = ReplicaSet([replica_database])
+    with SessionLocal() as session:
+        replicas.route_reads(session)
+        read = session.scalar(select(User.username).where(User.id == user.id))
+        assert read == "on-replica"
+
+        session.get(User, user.id, with_for_update=True).username = "renamed"
+        session.flush()
+        read = session.scalar(select(User.username).where(User.id == user.id))
+        assert read == "renamed"
+        session.commit()
+
+    with RoutingSession(bind=replica_database) as replica_db:
+        assert replica_db.get(User, user.id).username == "on-replica"
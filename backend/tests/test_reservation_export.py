@@ -0,0 +1,127 @@
+"""Memory use of the reservation export stays bounded by its batch size"""
+
+import json
+import os
+import subprocess
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import psycopg
+import pytest
+from sqlalchemy import event, insert
+
+from src.models.reservation import Reservation
+from src.services import reservation_export
+from src.services.reservation_export import ExportFormat, export_reservations
+
+ROWS = 20_000
+BATCH_SIZE = 200
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def history(db, user, car):
+    db.execute(
+        insert(Reservation),
+        [
+            {
+                "id": uuid.uuid4(),
+                "start_time": START + timedelta(hours=i),
+                "end_time": START + timedelta(hours=i, minutes=30),
+                "charging_point_id": f"cp-{i % 50}",
+                "user_id": user.id,
+                "car_id": car.id,
+            }
+            for i in range(ROWS)
+        ],
+    )
+    db.commit()
+    return user
+
+
+# Exports in a fresh interpreter and prints how far the export raised the
+# peak RSS above what importing and a first small export needed, and the
+# size exported. VmHWM is used rather than ru_maxrss, which the interpreter
+# inherits from pytest across exec.
+EXPORT_SCRIPT = """
+import re
+import sys
+import uuid
+from datetime import datetime
+
+from src.services.reservation_export import ExportFormat, export_reservations
+
+
+def peak_rss():
+    with open("/proc/self/status") as status:
+        return int(re.search(r"VmHWM:\\s+(\\d+) kB", status.read())[1]) * 1024
+
+
+user_id, export_format = uuid.UUID(sys.argv[1]), ExportFormat(sys.argv[2])
+warm_up = datetime.fromisoformat(sys.argv[3])
+for _ in export_reservations(user_id, export_format, end=warm_up):
+    pass
+
+before = peak_rss()
+exported = sum(len(chunk) for chunk in export_reservations(user_id, export_format))
+print(peak_rss() - before, exported)
+"""
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="reads /proc/self/status")
+@pytest.mark.parametrize("export_format", list(ExportFormat))
+def test_export_peak_rss_does_not_grow_with_rows(history, export_format):
+    first_rows = START + timedelta(hours=10)
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            EXPORT_SCRIPT,
+            str(history.id),
+            export_format,
+            first_rows.isoformat(),
+        ],
+        cwd=Path(__file__).parents[1],
+        env={**os.environ, "EXPORT_BATCH_SIZE": str(BATCH_SIZE)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    growth, exported = map(int, result.stdout.split())
+
+    # Holding every row at once costs several times the exported size, which
+    # is about 6 MB; streaming needs a few batches' worth
+    assert growth < exported / 4
+
+
+def test_export_reads_through_a_server_side_cursor(history, database):
+    cursors = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "FROM reservations" in statement:
+            cursors.append(cursor)
+
+    event.listen(database, "before_cursor_execute", record)
+    try:
+        chunks = export_reservations(history.id, ExportFormat.NDJSON)
+        next(chunks)
+        chunks.close()
+    finally:
+        event.remove(database, "before_cursor_execute", record)
+
+    [cursor] = cursors
+    assert isinstance(cursor, psycopg.ServerCursor)
+
+
+def test_export_is_sorted_across_batches(history, monkeypatch):
+    monkeypatch.setattr(reservation_export, "EXPORT_BATCH_SIZE", BATCH_SIZE)
+
+    starts = [
+        json.loads(line)["start_time"]
+        for chunk in export_reservations(history.id, ExportFormat.NDJSON)
+        for line in chunk.splitlines()
+    ]
+    assert len(starts) == ROWS
+    assert starts == sorted(starts)
@@ -0,0 +1,73 @@
+"""Expanding recurring reservations from several workers at once"""
+
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select
+
+from src.database import SessionLocal
+from src.models.reservation import Reservation
+from src.models.reservation_series import ReservationSeries
+from src.services.reservation_series import ReservationSeriesService
+
+
+@pytest.fixture
+def due_series(db, user, car):
+    # Seven daily occurrences fall within a seven day horizon
+    first_start = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(hours=1)
+    series = ReservationSeries(
+        rrule="FREQ=DAILY",
+        timezone="UTC",
+        first_start=first_start,
+        duration_minutes=60,
+        expanded_until=first_start,
+        charging_point_id="cp-series",
+        user_id=user.id,
+        car_id=car.id,
+    )
+    db.add(series)
+    db.commit()
+    return series
+
+
+def booked(db, series) -> int:
+    return db.scalar(select(func.count()).where(Reservation.series_id == series.id))
+
+
+def test_claimed_series_is_skipped_by_other_workers(db, due_series):
+    service = ReservationSeriesService(timedelta(days=7))
+    with SessionLocal() as other_worker:
+        # Holds the row lock, as a worker in the middle of expanding it would
+        other_worker.execute(
+            select(ReservationSeries).with_for_update().filter_by(id=due_series.id)
+        )
+        assert service.expand_due() == 0
+
+    assert service.expand_due() == 1
+    assert booked(db, due_series) == 7
+
+
+def test_two_workers_expand_a_due_series_once(db, due_series):
+    service = ReservationSeriesService(timedelta(days=7))
+    start = threading.Barrier(2)
+    results, errors = [], []
+
+    def worker():
+        start.wait()
+        try:
+            results.append(service.expand_due())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert sorted(results) == [0, 1]
+    # Each day booked once, none skipped as clashing with the other worker's
+    assert booked(db, due_series) == 7
+    assert service.expand_due() == 0
@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+from src import server
+from src.server import available_cpus, worker_count
+
+
+@pytest.fixture
+def cpus(monkeypatch, tmp_path):
+    """Let the process run on `cpus.count` CPUs under the quota `cpus.quota`"""
+
+    class Cpus:
+        count = 8
+        cpu_max = tmp_path / "cpu.max"
+
+        def quota(self, text: str) -> None:
+            self.cpu_max.write_text(text)
+
+    cpus = Cpus()
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(cpus.count)))
+    monkeypatch.setattr(server, "CGROUP_CPU_MAX", str(cpus.cpu_max))
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    return cpus
+
+
+@pytest.mark.parametrize(
+    "quota, expected",
+    [
+        ("max 100000\n", 8),
+        ("200000 100000\n", 2),
+        # Whole CPUs only, and at least one
+        ("250000 100000\n", 2),
+        ("50000 100000\n", 1),
+        ("1600000 100000\n", 8),
+        ("garbage\n", 8),
+    ],
+)
+def test_available_cpus_follow_the_cgroup_quota(cpus, quota, expected):
+    cpus.quota(quota)
+
+    assert available_cpus() == expected
+
+
+def test_available_cpus_without_a_cgroup_quota(cpus):
+    assert available_cpus() == 8
+
+
+def test_available_cpus_follow_the_affinity(cpus):
+    cpus.count = 3
+    cpus.quota("400000 100000\n")
+
+    assert available_cpus() == 3
+
+
+def test_available_cpus_without_affinity_support(cpus, monkeypatch):
+    monkeypatch.delattr(os, "sched_getaffinity")
+    monkeypatch.setattr(os, "cpu_count", lambda: 6)
+
+    assert available_cpus() == 6
+
+
+@pytest.mark.parametrize("configured, expected", [("3", 3), ("0", 1), ("", 8)])
+def test_worker_count(cpus, monkeypatch, configured, expected):
+    monkeypatch.setenv("WEB_CONCURRENCY", configured)
+
+    assert worker_count() == expected
+
+
+@pytest.mark.parametrize("reload, workers", [(False, 8), (True, 1)])
+def test_main_starts_the_app(cpus, monkeypatch, reload, workers):
+    calls = []
+    monkeypatch.setattr(
+        server.uvicorn, "run", lambda app, **options: calls.append((app, options))
+    )
+
+    server.main(reload=reload)
+
+    [(app, options)] = calls
+    assert app == "src.main:app"
+    assert options["workers"] == workers
+    assert options["reload"] == reload
@@ -0,0 +1,125 @@
+"""The primary's side of shard writes is repaired after a failed commit"""
+
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import insert, select
+
+from src.models.charging_point_usage import ChargingPointUsage
+from src.models.reservation import Reservation, ReservationStatus
+from src.models.waitlist_entry import WaitlistEntry, WaitlistStatus
+from src.services.shard_reconciliation import ShardReconciler
+from src.services.sharding import ShardRouter, reservation_shards, shard_schema
+
+TEST_REPLICA_DATABASE_URL = os.getenv("TEST_REPLICA_DATABASE_URL")
+
+START = datetime(2026, 1, 5, 8, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def shard(database, monkeypatch):
+    """The second test database as the only reservation shard"""
+    if not TEST_REPLICA_DATABASE_URL:
+        pytest.skip("needs TEST_REPLICA_DATABASE_URL")
+    router = ShardRouter({"a": TEST_REPLICA_DATABASE_URL})
+    schema = shard_schema()
+    schema.drop_all(router.engines["a"])
+    schema.create_all(router.engines["a"])
+    for name in ("engines", "sessions", "ring", "overrides", "executor"):
+        monkeypatch.setattr(reservation_shards, name, getattr(router, name))
+    yield router.sessions["a"]
+    schema.drop_all(router.engines["a"])
+    router.engines["a"].dispose()
+    router.executor.shutdown()
+
+
+def lost_primary_commit(shard, rows: list[dict]) -> None:
+    """Write reservations on the shard only, as when the primary's commit fails"""
+    with shard() as session:
+        session.execute(insert(Reservation), rows)
+        session.commit()
+
+
+def reservation(user, car, hours: float, status=ReservationStatus.ACTIVE) -> dict:
+    return {
+        "id": uuid.uuid4(),
+        "charging_point_id": "cp-1",
+        "start_time": START,
+        "end_time": START + timedelta(hours=hours),
+        "status": status,
+        "user_id": user.id,
+        "car_id": car.id,
+    }
+
+
+def usage(db) -> list[tuple]:
+    return db.execute(
+        select(
+            ChargingPointUsage.hour,
+            ChargingPointUsage.reservations_started,
+            ChargingPointUsage.reserved_seconds,
+        )
+        .where(ChargingPointUsage.reserved_seconds != 0)
+        .order_by(ChargingPointUsage.hour)
+    ).all()
+
+
+def test_reconcile_repairs_usage_cache_version_and_waitlist(db, shard, user, car):
+    entry = WaitlistEntry(
+        charging_point_id="cp-1",
+        start_time=START,
+        end_time=START + timedelta(hours=1.5),
+        user_id=user.id,
+        car_id=car.id,
+    )
+    db.add(entry)
+    db.commit()
+    booked = reservation(user, car, hours=1.5)
+    lost_primary_commit(shard, [booked])
+    since = datetime.now(timezone.utc) - timedelta(minutes=1)
+
+    assert ShardReconciler().reconcile(db, since) == 1
+
+    db.expire_all()
+    assert usage(db) == [(START, 1, 3600), (START + timedelta(hours=1), 0, 1800)]
+    assert user.cache_version == 1
+    assert entry.status == WaitlistStatus.BOOKED
+    assert entry.reservation_id == booked["id"]
+
+    # Rerunning changes nothing but the cache version
+    ShardReconciler().reconcile(db, since)
+    db.expire_all()
+    assert usage(db) == [(START, 1, 3600), (START + timedelta(hours=1), 0, 1800)]
+
+
+def test_reconcile_removes_cancelled_reservations_from_usage(db, shard, user, car):
+    cancelled = reservation(user, car, hours=1)
+    lost_primary_commit(shard, [cancelled])
+    since = datetime.now(timezone.utc) - timedelta(minutes=1)
+    ShardReconciler().reconcile(db, since)
+
+    with shard() as session:
+        session.get(Reservation, cancelled["id"]).status = ReservationStatus.CANCELLED
+        session.commit()
+    ShardReconciler().reconcile(db, since)
+
+    db.expire_all()
+    assert usage(db) == []
+
+
+def test_reconcile_only_looks_at_recent_changes(db, shard, user, car):
+    lost_primary_commit(shard, [reservation(user, car, hours=1)])
+
+    reconciled = ShardReconciler().reconcile(
+        db, datetime.now(timezone.utc) + timedelta(minutes=1)
+    )
+
+    assert reconciled == 0
+    assert usage(db) == []
+
+
+def test_reconcile_without_shards(db):
+    assert not reservation_shards.enabled
+    assert ShardReconciler().reconcile_recent() == 0
@@ -0,0 +1,129 @@
+from collections import Counter
+
+import pytest
+
+from src.services import sharding
+from src.services.sharding import (
+    ChargingPointMoved,
+    HashRing,
+    ShardRouter,
+    parse_shard_urls,
+)
+
+POINTS = [f"cp-{i}" for i in range(5000)]
+
+
+def test_ring_placement_is_stable():
+    ring = HashRing(["a", "b", "c"])
+    # Same nodes in another order, as another worker might list them
+    other = HashRing(["c", "a", "b"])
+
+    assert [ring.node_for(p) for p in POINTS] == [other.node_for(p) for p in POINTS]
+
+
+def test_ring_spreads_points_evenly():
+    ring = HashRing(["a", "b", "c", "d"])
+    counts = Counter(ring.node_for(p) for p in POINTS)
+
+    assert set(counts) == {"a", "b", "c", "d"}
+    assert all(0.15 < n / len(POINTS) < 0.35 for n in counts.values())
+
+
+def test_adding_a_node_only_moves_points_to_it():
+    before = HashRing(["a", "b", "c"])
+    after = HashRing(["a", "b", "c", "d"])
+
+    moved = [p for p in POINTS if before.node_for(p) != after.node_for(p)]
+
+    assert all(after.node_for(p) == "d" for p in moved)
+    assert 0.15 < len(moved) / len(POINTS) < 0.35
+
+
+def test_merge_keeps_order_and_drops_copies():
+    # A point being moved is briefly on both shards
+    a = [(1, "x"), (3, "y"), (5, "z")]
+    b = [(2, "u"), (3, "y"), (6, "v")]
+
+    merged = list(ShardRouter.merge([a, b], key=lambda row: row))
+
+    assert merged == [(1, "x"), (2, "u"), (3, "y"), (5, "z"), (6, "v")]
+
+
+def test_merge_of_nothing():
+    assert list(ShardRouter.merge([[], []], key=lambda row: row)) == []
+
+
+def test_parse_shard_urls():
+    assert parse_shard_urls(" a=postgresql://one , b=postgresql://two,") == {
+        "a": "postgresql://one",
+        "b": "postgresql://two",
+    }
+    with pytest.raises(ValueError):
+        parse_shard_urls("postgresql://one")
+
+
+class ShardSession:
+    """Stands in for a shard session; `moved_to` is the point's tombstone"""
+
+    def __init__(self, moved_to: str | None = None):
+        self.moved_to = moved_to
+        self.committed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, statement):
+        pass
+
+    def scalar(self, statement):
+        return self.moved_to
+
+    def commit(self):
+        self.committed = True
+
+
+@pytest.fixture
+def router(monkeypatch):
+    router = ShardRouter(
+        {"a": "postgresql+psycopg://shard-a/db", "b": "postgresql+psycopg://shard-b/db"}
+    )
+    monkeypatch.setattr(sharding, "lock_charging_point", lambda db, point: None)
+    yield router
+    router.executor.shutdown()
+
+
+def owned_by(router: ShardRouter, shard: str) -> str:
+    return next(p for p in POINTS if router.ring.node_for(p) == shard)
+
+
+def test_session_for_the_owning_shard(router):
+    point = owned_by(router, "a")
+    # No override stored on the primary
+    router.overrides.set(point, "", adapter=None, ttl=60)
+    session = ShardSession()
+    router.sessions = {"a": lambda: session, "b": ShardSession}
+
+    with router.session_for(None, point) as bookings:
+        assert bookings is session
+
+    assert session.committed
+
+
+def test_moved_point_answers_503_and_is_routed_to_its_new_shard(router):
+    point = owned_by(router, "a")
+    router.overrides.set(point, "", adapter=None, ttl=60)
+    tombstone = ShardSession(moved_to="b")
+    router.sessions = {"a": lambda: tombstone, "b": ShardSession}
+
+    with pytest.raises(ChargingPointMoved) as moved:
+        with router.session_for(None, point):
+            pytest.fail("the block must not run on the old shard")
+
+    assert moved.value.status_code == 503
+    assert moved.value.headers == {"Retry-After": "1"}
+    assert not tombstone.committed
+    # The retry goes to the new shard without asking the primary
+    assert router.shard_for(None, point) == "b"
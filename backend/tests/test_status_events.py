@@ -0,0 +1,93 @@
+"""Applying charging point status events pushed by the provider"""
+
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select
+
+from src.database import SessionLocal
+from src.models.charging_point_status import ChargingPointStatus
+from src.models.charging_point_usage import ChargingPointUsage
+from src.services.charging_point import (
+    ChargingPointStatusEvent,
+    charging_point_service,
+    lock_status_updates,
+)
+
+START = datetime(2026, 1, 5, 8, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def point(db) -> str:
+    return f"cp-{uuid.uuid4().hex[:8]}"
+
+
+def event(point: str, status: str, minutes: int) -> ChargingPointStatusEvent:
+    return ChargingPointStatusEvent(
+        charging_point_id=point,
+        status=status,
+        observed_at=START + timedelta(minutes=minutes),
+    )
+
+
+def occupied_seconds(db, point: str) -> int:
+    return db.scalar(
+        select(func.coalesce(func.sum(ChargingPointUsage.occupied_seconds), 0)).where(
+            ChargingPointUsage.charging_point_id == point
+        )
+    )
+
+
+def test_replayed_batch_is_ignored(db, point):
+    batch = [event(point, "occupied", 0), event(point, "available", 30)]
+
+    applied = charging_point_service.apply_status_events(db, batch)
+    assert [e.status for e in applied] == ["available"]
+    assert occupied_seconds(db, point) == 30 * 60
+
+    assert charging_point_service.apply_status_events(db, batch) == []
+    assert occupied_seconds(db, point) == 30 * 60
+
+
+def test_events_out_of_order(db, point):
+    charging_point_service.apply_status_events(db, [event(point, "occupied", 0)])
+    charging_point_service.apply_status_events(db, [event(point, "available", 45)])
+    # Arrives late: older than the stored status
+    assert (
+        charging_point_service.apply_status_events(db, [event(point, "occupied", 20)])
+        == []
+    )
+
+    stored = db.get(ChargingPointStatus, point)
+    assert (stored.status, stored.observed_at) == (
+        "available",
+        START + timedelta(minutes=45),
+    )
+    assert occupied_seconds(db, point) == 45 * 60
+
+
+def test_batches_for_a_new_point_wait_for_each_other(db, point):
+    applied = []
+
+    def apply():
+        with SessionLocal() as session:
+            applied.extend(
+                charging_point_service.apply_status_events(
+                    session, [event(point, "occupied", 0)]
+                )
+            )
+
+    with SessionLocal() as other_batch:
+        # The point has no stored status, so there is no row to lock
+        lock_status_updates(other_batch, [point])
+        thread = threading.Thread(target=apply)
+        thread.start()
+        thread.join(timeout=0.5)
+        assert thread.is_alive()
+        other_batch.rollback()
+
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    assert [e.status for e in applied] == ["occupied"]
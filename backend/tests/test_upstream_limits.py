@@ -0,0 +1,105 @@
+"""Upstream concurrency slots are held until the response body is closed"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from src.admission.http import BoundedTransport
+from src.admission.limits import ConcurrencyLimiter, Overloaded
+
+
+class SlowBody(httpx.AsyncByteStream):
+    def __init__(self, finished: asyncio.Event):
+        self.finished = finished
+
+    async def __aiter__(self):
+        yield b"first"
+        await self.finished.wait()
+        yield b"last"
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Answers every request with a body that ends once `finished` is set"""
+    bodies = []
+
+    async def respond(transport, request):
+        body = SlowBody(asyncio.Event())
+        bodies.append(body)
+        return httpx.Response(200, stream=body)
+
+    monkeypatch.setattr(httpx.AsyncHTTPTransport, "handle_async_request", respond)
+    return bodies
+
+
+def run(scenario) -> None:
+    # A slot that is never given back would otherwise hang the test
+    asyncio.run(asyncio.wait_for(scenario(), timeout=5))
+
+
+def bounded_client(limit: int, queue_budget: float) -> httpx.AsyncClient:
+    transport = BoundedTransport("test", enabled=True)
+    transport.limiter = ConcurrencyLimiter(limit, queue_budget)
+    return httpx.AsyncClient(transport=transport, base_url="http://upstream")
+
+
+def test_slot_is_held_while_the_body_streams(upstream):
+    async def scenario():
+        client = bounded_client(limit=1, queue_budget=1.0)
+        limiter = client._transport.limiter
+        async with client.stream("GET", "/") as response:
+            assert limiter.in_flight == 1
+            chunks = response.aiter_raw()
+            assert await anext(chunks) == b"first"
+            assert limiter.in_flight == 1
+            upstream[0].finished.set()
+            assert await anext(chunks) == b"last"
+            # Reading the whole body closes the response
+            assert [chunk async for chunk in chunks] == []
+            assert limiter.in_flight == 0
+
+    run(scenario)
+
+
+def test_next_call_waits_for_the_body_to_be_closed(upstream):
+    async def scenario():
+        client = bounded_client(limit=1, queue_budget=1.0)
+        async with client.stream("GET", "/"):
+            second = asyncio.create_task(client.get("/"))
+            await asyncio.sleep(0.05)
+            # Headers of the first response arrived, but its body is open
+            assert not second.done()
+            assert len(upstream) == 1
+        while len(upstream) < 2:
+            await asyncio.sleep(0.01)
+        upstream[1].finished.set()
+        response = await second
+        assert response.content == b"firstlast"
+
+    run(scenario)
+
+
+def test_call_is_shed_while_the_body_streams(upstream):
+    async def scenario():
+        client = bounded_client(limit=1, queue_budget=0.05)
+        async with client.stream("GET", "/"):
+            with pytest.raises(Overloaded):
+                await client.get("/")
+
+    run(scenario)
+
+
+def test_slot_is_released_when_the_call_fails(monkeypatch):
+    async def refuse(transport, request):
+        raise httpx.ConnectError("Connection refused", request=request)
+
+    monkeypatch.setattr(httpx.AsyncHTTPTransport, "handle_async_request", refuse)
+
+    async def scenario():
+        client = bounded_client(limit=1, queue_budget=0.05)
+        with pytest.raises(httpx.ConnectError):
+            await client.get("/")
+        assert client._transport.limiter.in_flight == 0
+
+    run(scenario)
@@ -0,0 +1,225 @@
+"""Hourly usage rollup and its rebuild"""
+
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import delete, select
+
+from src.database import SessionLocal
+from src.models.charging_point_usage import ChargingPointUsage
+from src.models.reservation import Reservation, ReservationStatus
+from src.services.usage import (
+    Granularity,
+    StatusInterval,
+    hour_window,
+    hourly_slices,
+    lock_usage_rebuild,
+    truncate,
+    usage_rollup,
+)
+
+START = datetime(2026, 1, 5, 8, tzinfo=timezone.utc)  # a Monday
+
+
+def at(hours: float) -> datetime:
+    return START + timedelta(hours=hours)
+
+
+def test_truncate():
+    moment = at(3.5) + timedelta(days=2)  # Wednesday 11:30
+    assert truncate(moment, Granularity.HOUR) == at(3) + timedelta(days=2)
+    assert truncate(moment, Granularity.DAY) == at(-8) + timedelta(days=2)
+    assert truncate(moment, Granularity.WEEK) == at(-8)
+
+
+def test_truncate_converts_to_utc():
+    moment = datetime(2026, 1, 5, 1, 30, tzinfo=timezone(timedelta(hours=2)))
+    assert truncate(moment, Granularity.DAY) == datetime(
+        2026, 1, 4, tzinfo=timezone.utc
+    )
+
+
+def test_hour_window_widens_to_whole_hours():
+    assert hour_window(at(0.25), at(2.1)) == (at(0), at(3))
+    assert hour_window(at(0), at(2)) == (at(0), at(2))
+
+
+def test_hourly_slices():
+    assert list(hourly_slices(at(0.5), at(2.25))) == [
+        (at(0), 1800),
+        (at(1), 3600),
+        (at(2), 900),
+    ]
+    assert list(hourly_slices(at(1), at(1.5))) == [(at(1), 1800)]
+    assert list(hourly_slices(at(1), at(1))) == []
+
+
+@pytest.fixture
+def reservations(db, user, car):
+    def reserve(point, start, end, status=ReservationStatus.ACTIVE):
+        return Reservation(
+            charging_point_id=point,
+            start_time=start,
+            end_time=end,
+            status=status,
+            user_id=user.id,
+            car_id=car.id,
+        )
+
+    return [
+        reserve("cp-a", at(0.5), at(2.25)),
+        reserve("cp-a", at(3), at(4)),
+        reserve("cp-a", at(25), at(26.5)),
+        reserve("cp-b", at(1.75), at(2.5)),
+        reserve("cp-b", at(5), at(6), ReservationStatus.CANCELLED),
+    ]
+
+
+def rows(db) -> list[tuple]:
+    db.expire_all()
+    return [
+        tuple(row)
+        for row in db.execute(
+            select(
+                ChargingPointUsage.charging_point_id,
+                ChargingPointUsage.hour,
+                ChargingPointUsage.reservations_started,
+                ChargingPointUsage.reserved_seconds,
+                ChargingPointUsage.occupied_seconds,
+            )
+            .where(
+                (ChargingPointUsage.reservations_started != 0)
+                | (ChargingPointUsage.reserved_seconds != 0)
+                | (ChargingPointUsage.occupied_seconds != 0)
+            )
+            .order_by(ChargingPointUsage.charging_point_id, ChargingPointUsage.hour)
+        )
+    ]
+
+
+def book_incrementally(db, reservations):
+    """Write the reservations the way bookings and cancellations do"""
+    for reservation in reservations:
+        cancelled = reservation.status == ReservationStatus.CANCELLED
+        reservation.status = ReservationStatus.ACTIVE
+        db.add(reservation)
+        usage_rollup.record_reservation(db, reservation)
+        db.commit()
+        if cancelled:
+            reservation.status = ReservationStatus.CANCELLED
+            usage_rollup.record_reservation(db, reservation, sign=-1)
+            db.commit()
+
+
+def test_rebuild_matches_incremental_rows(db, reservations):
+    book_incrementally(db, reservations)
+    incremental = rows(db)
+    assert ("cp-a", at(0), 1, 1800, 0) in incremental
+
+    usage_rollup.rebuild(db, at(0), at(48))
+    assert rows(db) == incremental
+    # Rerunning changes nothing
+    usage_rollup.rebuild(db, at(0), at(48))
+    assert rows(db) == incremental
+
+
+def test_rebuild_restores_lost_and_doubled_rows(db, reservations):
+    book_incrementally(db, reservations)
+    incremental = rows(db)
+    db.execute(delete(ChargingPointUsage).where(ChargingPointUsage.hour == at(1)))
+    usage_rollup.record_reservation(db, reservations[1])
+    db.commit()
+
+    usage_rollup.rebuild(db, at(0), at(48))
+
+    assert rows(db) == incremental
+
+
+def test_rebuild_of_one_point_and_part_of_the_range(db, reservations):
+    book_incrementally(db, reservations)
+    incremental = rows(db)
+    db.execute(delete(ChargingPointUsage))
+    db.commit()
+
+    usage_rollup.rebuild(db, at(0.5), at(3.5), "cp-a")
+
+    assert rows(db) == [
+        row for row in incremental if row[0] == "cp-a" and at(0) <= row[1] < at(4)
+    ]
+
+
+def test_rebuild_keeps_occupied_time(db, reservations):
+    book_incrementally(db, reservations)
+    usage_rollup.record_status_intervals(
+        db, [StatusInterval("cp-a", "occupied", at(1), at(1.5))]
+    )
+    db.commit()
+
+    usage_rollup.rebuild(db, at(0), at(48))
+
+    assert ("cp-a", at(1), 0, 3600, 1800) in rows(db)
+
+
+def test_utilisation_fills_empty_buckets(db, reservations):
+    book_incrementally(db, reservations)
+
+    buckets = usage_rollup.utilisation(db, "cp-a", at(-8), at(40), Granularity.DAY)
+
+    assert [(b.start, b.seconds) for b in buckets] == [
+        (at(-8), 24 * 3600),
+        (at(16), 24 * 3600),
+    ]
+    assert buckets[0].reservations_started == 2
+    assert buckets[0].reserved_seconds == 1.75 * 3600 + 3600
+    assert buckets[1].reservations_started == 1
+    assert buckets[1].reserved_seconds == 1.5 * 3600
+
+    [week] = usage_rollup.utilisation(db, "cp-a", at(2), at(3), Granularity.WEEK)
+    assert (week.start, week.seconds) == (at(-8), 3600)
+    assert week.reserved_seconds == 900
+
+
+def test_rebuild_waits_for_a_booking_in_progress(db, reservations):
+    """The booking writes an hour that has no row yet"""
+    booked = threading.Event()
+    with SessionLocal() as booking:
+        reservation = reservations[0]
+        booking.add(reservation)
+        usage_rollup.record_reservation(booking, reservation)
+        booking.flush()
+
+        def rebuild():
+            with SessionLocal() as session:
+                usage_rollup.rebuild(session, at(0), at(48))
+            booked.set()
+
+        thread = threading.Thread(target=rebuild)
+        thread.start()
+        assert not booked.wait(0.5)
+        booking.commit()
+    thread.join(5)
+
+    assert booked.is_set()
+    assert [row[2:4] for row in rows(db)] == [(1, 1800), (0, 3600), (0, 900)]
+
+
+def test_booking_waits_for_a_rebuild_in_progress(db, reservations):
+    committed = threading.Event()
+    with SessionLocal() as rebuilding:
+        # Held by a rebuild of the point until it commits
+        lock_usage_rebuild(rebuilding, "cp-a")
+
+        def book():
+            with SessionLocal() as booking:
+                book_incrementally(booking, reservations[:1])
+            committed.set()
+
+        thread = threading.Thread(target=book)
+        thread.start()
+        assert not committed.wait(0.5)
+        rebuilding.rollback()
+    thread.join(5)
+
+    assert committed.is_set()
+    assert [row[2:4] for row in rows(db)] == [(1, 1800), (0, 3600), (0, 900)]
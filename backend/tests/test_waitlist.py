@@ -0,0 +1,231 @@
+import asyncio
+import json
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from sqlalchemy import select
+
+from src.database import SessionLocal
+from src.models.reservation import Reservation, ReservationStatus
+from src.models.waitlist_entry import WaitlistEntry, WaitlistStatus
+from src.services.availability import lock_charging_point
+from src.services.background import run_periodically
+from src.services.upstreams import upstream_clients
+from src.services.waitlist import (
+    WaitlistBooking,
+    WaitlistNotifier,
+    waitlist_matcher,
+)
+
+URL = "http://notify.test/waitlist"
+
+
+def booking() -> WaitlistBooking:
+    start = datetime(2026, 1, 5, 8, tzinfo=timezone.utc)
+    return WaitlistBooking(
+        waitlist_entry_id=uuid.uuid4(),
+        reservation_id=uuid.uuid4(),
+        user_id=uuid.uuid4(),
+        car_id=uuid.uuid4(),
+        charging_point_id="cp-1",
+        start_time=start,
+        end_time=start + timedelta(hours=1),
+    )
+
+
+@pytest.fixture
+def notifier(monkeypatch):
+    """Notifier whose shared client posts to a stub; `notifier.received`"""
+    received = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        received.append(body)
+        return httpx.Response(500 if body["charging_point_id"] == "fail" else 204)
+
+    monkeypatch.setattr(upstream_clients, "upstreams", {**upstream_clients.upstreams})
+    notifier = WaitlistNotifier(URL)
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handle))
+    monkeypatch.setitem(upstream_clients._clients, "waitlist_notify", client)
+    notifier.received = received
+    return notifier
+
+
+def test_notifier_uses_the_shared_upstream_client(notifier):
+    assert upstream_clients.upstreams["waitlist_notify"].base_url == URL
+    bookings = [booking(), booking()]
+
+    asyncio.run(notifier.notify(bookings))
+
+    assert [b["waitlist_entry_id"] for b in notifier.received] == [
+        str(b.waitlist_entry_id) for b in bookings
+    ]
+
+
+def test_failed_notifications_are_logged_and_skipped(notifier, caplog):
+    failing = booking().model_copy(update={"charging_point_id": "fail"})
+
+    with caplog.at_level(logging.WARNING):
+        asyncio.run(notifier.notify([failing, booking()]))
+
+    assert len(notifier.received) == 2
+    assert f"Could not notify waitlist entry {failing.waitlist_entry_id}" in caplog.text
+
+
+def test_notifier_without_url_only_logs(caplog):
+    with caplog.at_level(logging.INFO):
+        asyncio.run(WaitlistNotifier(None).notify([booking()]))
+
+    assert "booked as reservation" in caplog.text
+
+
+def test_run_periodically_runs_coroutine_jobs_on_the_loop():
+    job_loops = []
+
+    async def job():
+        job_loops.append(asyncio.get_running_loop())
+        raise RuntimeError("logged, then run again")
+
+    async def scenario():
+        task = asyncio.create_task(run_periodically("job", 0.01, job))
+        while len(job_loops) < 2:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        return asyncio.get_running_loop()
+
+    loop = asyncio.run(scenario())
+    assert all(job_loop is loop for job_loop in job_loops)
+
+
+# Tomorrow, so that entries have not started yet
+TOMORROW = datetime.now(timezone.utc).replace(
+    minute=0, second=0, microsecond=0
+) + timedelta(days=1)
+
+
+def at(hours: float) -> datetime:
+    return TOMORROW + timedelta(hours=hours)
+
+
+@pytest.fixture
+def wait(db, user, car):
+    """Add a waitlist entry for [start, end) hours from TOMORROW"""
+
+    def wait(start, end, requested_at, status=WaitlistStatus.WAITING, point="cp-1"):
+        entry = WaitlistEntry(
+            charging_point_id=point,
+            start_time=at(start),
+            end_time=at(end),
+            status=status,
+            requested_at=at(-48 + requested_at),
+            user_id=user.id,
+            car_id=car.id,
+        )
+        db.add(entry)
+        db.commit()
+        return entry
+
+    return wait
+
+
+def reserved(db) -> list[tuple]:
+    db.expire_all()
+    return db.execute(
+        select(
+            Reservation.charging_point_id, Reservation.start_time, Reservation.end_time
+        )
+        .where(Reservation.status == ReservationStatus.ACTIVE)
+        .order_by(Reservation.start_time)
+    ).all()
+
+
+def test_match_books_the_oldest_request_first(db, wait):
+    # Added first, requested last
+    later = wait(0, 2, requested_at=3)
+    earlier = wait(1, 3, requested_at=1)
+    apart = wait(4, 5, requested_at=2)
+
+    bookings = waitlist_matcher.match(db, "cp-1")
+    db.commit()
+
+    assert [b.waitlist_entry_id for b in bookings] == [earlier.id, apart.id]
+    assert reserved(db) == [("cp-1", at(1), at(3)), ("cp-1", at(4), at(5))]
+    assert earlier.status == apart.status == WaitlistStatus.BOOKED
+    assert earlier.reservation_id == bookings[0].reservation_id
+    assert later.status == WaitlistStatus.WAITING
+    assert later.reservation_id is None
+
+
+def test_match_leaves_entries_clashing_with_reservations(db, wait, user, car):
+    reservation = Reservation(
+        charging_point_id="cp-1",
+        start_time=at(1),
+        end_time=at(2),
+        user_id=user.id,
+        car_id=car.id,
+    )
+    db.add(reservation)
+    db.commit()
+    entry = wait(0, 2, requested_at=1)
+    other_point = wait(0, 2, requested_at=1, point="cp-2")
+
+    assert waitlist_matcher.match(db, "cp-1") == []
+
+    # Cancelled in the same transaction, not yet flushed
+    reservation.status = ReservationStatus.CANCELLED
+    [booking] = waitlist_matcher.match(db, "cp-1")
+    db.commit()
+
+    assert booking.waitlist_entry_id == entry.id
+    assert reserved(db) == [("cp-1", at(0), at(2))]
+    assert other_point.status == WaitlistStatus.WAITING
+
+
+def test_match_skips_started_and_withdrawn_entries(db, wait):
+    started = wait(-25, -23, requested_at=1)
+    withdrawn = wait(2, 3, requested_at=2, status=WaitlistStatus.WITHDRAWN)
+    booked = wait(4, 5, requested_at=3, status=WaitlistStatus.BOOKED)
+
+    assert waitlist_matcher.match(db, "cp-1") == []
+    db.commit()
+
+    assert reserved(db) == []
+    assert started.status == WaitlistStatus.EXPIRED
+    assert withdrawn.status == WaitlistStatus.WITHDRAWN
+    assert booked.status == WaitlistStatus.BOOKED
+
+
+def test_concurrent_passes_book_each_window_once(db, wait):
+    entries = [wait(0, 2, requested_at=1), wait(1, 3, requested_at=2)]
+    entries.append(wait(4, 5, requested_at=3))
+    results, done = [], threading.Event()
+
+    def match_all():
+        results.append(waitlist_matcher.match_all())
+        if len(results) == 2:
+            done.set()
+
+    with SessionLocal() as booking:
+        # A booking of the point in progress holds both passes back
+        lock_charging_point(booking, "cp-1")
+        threads = [threading.Thread(target=match_all) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        assert not done.wait(0.5)
+        booking.rollback()
+    for thread in threads:
+        thread.join(5)
+
+    assert done.is_set()
+    assert sorted(len(bookings) for bookings in results) == [0, 2]
+    assert reserved(db) == [("cp-1", at(0), at(2)), ("cp-1", at(4), at(5))]
+    db.expire_all()
+    assert [e.status for e in entries] == [
+        WaitlistStatus.BOOKED,
+        WaitlistStatus.WAITING,
+        WaitlistStatus.BOOKED,
+    ]